@@ -1,22 +1,22 @@
 import asyncio
-import os
 from logging.config import fileConfig
 
-from dotenv import load_dotenv
 from sqlalchemy import pool
 from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import async_engine_from_config
 
 from alembic import context
+from bot import constants
 from core.db import Base
 
-load_dotenv(".env")
-
 config = context.config
 
-config.set_main_option("sqlalchemy.url", os.environ["DB_URL"])
+config.set_main_option("sqlalchemy.url", constants.DB_URL)
 
-if config.config_file_name is not None:
+# При запуске миграций из бота логирование уже настроено setup_logging.
+if config.config_file_name is not None and config.attributes.get(
+    "configure_logging", True
+):
     fileConfig(config.config_file_name)
 
 target_metadata = Base.metadata
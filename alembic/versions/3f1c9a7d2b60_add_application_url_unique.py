@@ -0,0 +1,26 @@
+"""add unique constraint on application url
+
+Revision ID: 3f1c9a7d2b60
+Revises: 9cdc7b91404e
+Create Date: 2026-10-19 10:12:41.318214
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f1c9a7d2b60"
+down_revision: Union[str, None] = "9cdc7b91404e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # INSERT ... ON CONFLICT (url) при импорте требует уникального индекса.
+    op.create_unique_constraint("application_url_key", "application", ["url"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("application_url_key", "application", type_="unique")
@@ -0,0 +1,117 @@
+"""add persistent schedule and circuit state
+
+Revision ID: a7d3e5f9b2c8
+Revises: f4a9c2d6e8b1
+Create Date: 2026-10-19 14:08:52.316907
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a7d3e5f9b2c8"
+down_revision: Union[str, None] = "f4a9c2d6e8b1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NOTIFY_FUNCTION = """
+CREATE OR REPLACE FUNCTION application_notify_change() RETURNS trigger AS $$
+DECLARE
+    row application%ROWTYPE;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        row := OLD;
+    ELSE
+        row := NEW;
+    END IF;
+    PERFORM pg_notify(
+        'application_changes',
+        json_build_object(
+            'op', TG_OP,
+            'id', row.id,
+            'name', row.name,
+            'url', row.url,
+            'ads_url', row.ads_url,
+            'expected_content', row.expected_content,
+            'content_is_regex', row.content_is_regex,
+            'max_body_size', row.max_body_size,
+            'expected_headers', row.expected_headers,
+            'latency_slo', row.latency_slo{schedule}
+        )::text
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+SCHEDULE_PAYLOAD = """,
+            'check_interval', row.check_interval"""
+
+NOTIFY_TRIGGER = """
+CREATE TRIGGER application_notify_change
+AFTER INSERT OR DELETE OR UPDATE OF {columns}
+ON application
+FOR EACH ROW EXECUTE FUNCTION application_notify_change();
+"""
+
+CATALOGUE_COLUMNS = (
+    "url, name, ads_url, expected_content, content_is_regex, "
+    "max_body_size, expected_headers, latency_slo"
+)
+
+
+def _replace_trigger(columns: str) -> None:
+    op.execute(
+        "DROP TRIGGER IF EXISTS application_notify_change ON application"
+    )
+    op.execute(NOTIFY_TRIGGER.format(columns=columns))
+
+
+def upgrade() -> None:
+    op.add_column(
+        "application", sa.Column("check_interval", sa.Integer(), nullable=True)
+    )
+    op.add_column(
+        "application",
+        sa.Column(
+            "circuit_open",
+            sa.Boolean(),
+            server_default=sa.false(),
+            nullable=False,
+        ),
+    )
+    op.add_column(
+        "application",
+        sa.Column(
+            "last_checked_at", sa.DateTime(timezone=True), nullable=True
+        ),
+    )
+    op.add_column(
+        "application",
+        sa.Column("next_check_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_table(
+        "setting",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("key", sa.String(length=64), nullable=False),
+        sa.Column("value", sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("key", name="setting_key_key"),
+    )
+    # Расписание и состояние проверок пишет сам бот, уведомления нужны
+    # только для check_interval, который задает администратор.
+    op.execute(NOTIFY_FUNCTION.format(schedule=SCHEDULE_PAYLOAD))
+    _replace_trigger(CATALOGUE_COLUMNS + ", check_interval")
+
+
+def downgrade() -> None:
+    _replace_trigger(CATALOGUE_COLUMNS)
+    op.execute(NOTIFY_FUNCTION.format(schedule=""))
+    op.drop_table("setting")
+    op.drop_column("application", "next_check_at")
+    op.drop_column("application", "last_checked_at")
+    op.drop_column("application", "circuit_open")
+    op.drop_column("application", "check_interval")
@@ -0,0 +1,40 @@
+"""add token used_at for retention
+
+Revision ID: b2e6f1a9d4c7
+Revises: a7d3e5f9b2c8
+Create Date: 2026-10-19 15:41:06.552718
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b2e6f1a9d4c7"
+down_revision: Union[str, None] = "a7d3e5f9b2c8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "token", sa.Column("used_at", sa.DateTime(timezone=True), nullable=True)
+    )
+    # Время погашения старых токенов неизвестно, поэтому срок хранения
+    # отсчитывается от применения миграции.
+    op.execute("UPDATE token SET used_at = now() WHERE NOT is_active")
+    # Частичный индекс покрывает только погашенные токены, которые
+    # выбирает задача очистки.
+    op.create_index(
+        "ix_token_used_at",
+        "token",
+        ["used_at"],
+        postgresql_where=sa.text("NOT is_active"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_token_used_at", table_name="token")
+    op.drop_column("token", "used_at")
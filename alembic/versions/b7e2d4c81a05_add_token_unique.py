@@ -0,0 +1,26 @@
+"""add unique constraint on token
+
+Revision ID: b7e2d4c81a05
+Revises: 3f1c9a7d2b60
+Create Date: 2026-10-19 10:47:05.902117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e2d4c81a05"
+down_revision: Union[str, None] = "3f1c9a7d2b60"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Генерация токенов полагается на ON CONFLICT вместо предварительного SELECT.
+    op.create_unique_constraint("token_token_key", "token", ["token"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("token_token_key", "token", type_="unique")
@@ -0,0 +1,28 @@
+"""add unique constraint on user telegram_user_id
+
+Revision ID: c58a0e93f4d1
+Revises: b7e2d4c81a05
+Create Date: 2026-10-19 11:20:33.640582
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c58a0e93f4d1"
+down_revision: Union[str, None] = "b7e2d4c81a05"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # /start регистрирует пользователя через INSERT ... ON CONFLICT DO NOTHING.
+    op.create_unique_constraint(
+        "user_telegram_user_id_key", "user", ["telegram_user_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("user_telegram_user_id_key", "user", type_="unique")
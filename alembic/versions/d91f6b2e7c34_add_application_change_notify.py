@@ -0,0 +1,63 @@
+"""add application change notifications
+
+Revision ID: d91f6b2e7c34
+Revises: c58a0e93f4d1
+Create Date: 2026-10-19 12:05:18.227406
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d91f6b2e7c34"
+down_revision: Union[str, None] = "c58a0e93f4d1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE FUNCTION application_notify_change() RETURNS trigger AS $$
+        DECLARE
+            row application%ROWTYPE;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                row := OLD;
+            ELSE
+                row := NEW;
+            END IF;
+            PERFORM pg_notify(
+                'application_changes',
+                json_build_object(
+                    'op', TG_OP,
+                    'id', row.id,
+                    'name', row.name,
+                    'url', row.url,
+                    'ads_url', row.ads_url
+                )::text
+            );
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+    )
+    # Обновления failure_counter после проверок не меняют каталог
+    # и не должны рассылать уведомления.
+    op.execute(
+        """
+        CREATE TRIGGER application_notify_change
+        AFTER INSERT OR DELETE OR UPDATE OF url, name, ads_url
+        ON application
+        FOR EACH ROW EXECUTE FUNCTION application_notify_change();
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        "DROP TRIGGER IF EXISTS application_notify_change ON application"
+    )
+    op.execute("DROP FUNCTION IF EXISTS application_notify_change()")
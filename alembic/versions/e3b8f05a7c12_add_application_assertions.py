@@ -0,0 +1,104 @@
+"""add application probe assertions
+
+Revision ID: e3b8f05a7c12
+Revises: d91f6b2e7c34
+Create Date: 2026-10-19 12:41:09.518730
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e3b8f05a7c12"
+down_revision: Union[str, None] = "d91f6b2e7c34"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NOTIFY_FUNCTION = """
+CREATE OR REPLACE FUNCTION application_notify_change() RETURNS trigger AS $$
+DECLARE
+    row application%ROWTYPE;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        row := OLD;
+    ELSE
+        row := NEW;
+    END IF;
+    PERFORM pg_notify(
+        'application_changes',
+        json_build_object(
+            'op', TG_OP,
+            'id', row.id,
+            'name', row.name,
+            'url', row.url,
+            'ads_url', row.ads_url{assertions}
+        )::text
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+ASSERTION_PAYLOAD = """,
+            'expected_content', row.expected_content,
+            'content_is_regex', row.content_is_regex,
+            'max_body_size', row.max_body_size,
+            'expected_headers', row.expected_headers,
+            'latency_slo', row.latency_slo"""
+
+NOTIFY_TRIGGER = """
+CREATE TRIGGER application_notify_change
+AFTER INSERT OR DELETE OR UPDATE OF {columns}
+ON application
+FOR EACH ROW EXECUTE FUNCTION application_notify_change();
+"""
+
+
+def _replace_trigger(columns: str) -> None:
+    op.execute(
+        "DROP TRIGGER IF EXISTS application_notify_change ON application"
+    )
+    op.execute(NOTIFY_TRIGGER.format(columns=columns))
+
+
+def upgrade() -> None:
+    op.add_column(
+        "application", sa.Column("expected_content", sa.Text(), nullable=True)
+    )
+    op.add_column(
+        "application",
+        sa.Column(
+            "content_is_regex",
+            sa.Boolean(),
+            server_default=sa.false(),
+            nullable=False,
+        ),
+    )
+    op.add_column(
+        "application", sa.Column("max_body_size", sa.Integer(), nullable=True)
+    )
+    op.add_column(
+        "application", sa.Column("expected_headers", sa.JSON(), nullable=True)
+    )
+    op.add_column(
+        "application", sa.Column("latency_slo", sa.Float(), nullable=True)
+    )
+    # Каталог в памяти получает проверки вместе с остальными полями.
+    op.execute(NOTIFY_FUNCTION.format(assertions=ASSERTION_PAYLOAD))
+    _replace_trigger(
+        "url, name, ads_url, expected_content, content_is_regex, "
+        "max_body_size, expected_headers, latency_slo"
+    )
+
+
+def downgrade() -> None:
+    _replace_trigger("url, name, ads_url")
+    op.execute(NOTIFY_FUNCTION.format(assertions=""))
+    op.drop_column("application", "latency_slo")
+    op.drop_column("application", "expected_headers")
+    op.drop_column("application", "max_body_size")
+    op.drop_column("application", "content_is_regex")
+    op.drop_column("application", "expected_content")
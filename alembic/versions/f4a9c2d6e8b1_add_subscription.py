@@ -0,0 +1,54 @@
+"""add subscription model
+
+Revision ID: f4a9c2d6e8b1
+Revises: e3b8f05a7c12
+Create Date: 2026-10-19 13:22:47.105364
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f4a9c2d6e8b1"
+down_revision: Union[str, None] = "e3b8f05a7c12"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "subscription",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("application_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"], ["user.id"], ondelete="CASCADE"
+        ),
+        sa.ForeignKeyConstraint(
+            ["application_id"], ["application.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "application_id",
+            "user_id",
+            name="subscription_application_id_user_id_key",
+        ),
+    )
+    # Удаление пользователя ищет его подписки по user_id.
+    op.create_index("ix_subscription_user_id", "subscription", ["user_id"])
+    # До появления подписок уведомления получали все пользователи, поэтому
+    # существующие пользователи подписываются на все приложения.
+    op.execute(
+        """
+        INSERT INTO subscription (user_id, application_id)
+        SELECT "user".id, application.id FROM "user" CROSS JOIN application
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_subscription_user_id", table_name="subscription")
+    op.drop_table("subscription")
@@ -0,0 +1,109 @@
+"""Микробенчмарк подготовки разметки ответов бота.
+
+Сравнивает построение разметки на каждый запрос с заранее построенной
+и закэшированной по версии каталога разметкой. Для каждого варианта
+выводит время и объем выделенной памяти на одну подготовку ответа,
+включая сериализацию, которую выполняет PTB перед отправкой.
+Пиковая память считается за 100 подготовок подряд.
+
+Запуск: python benchmarks/render_benchmark.py
+"""
+
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from telegram import (  # noqa: E402
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    KeyboardButton,
+    ReplyKeyboardMarkup,
+)
+
+from bot import constants  # noqa: E402
+from bot.keyboard import (  # noqa: E402
+    build_keyboard,
+    build_launch_links_keyboard,
+)
+
+APPLICATIONS = [
+    SimpleNamespace(id=number, name=f"application-{number}")
+    for number in range(200)
+]
+ITERATIONS = 2000
+
+
+def rebuild_main_keyboard():
+    markup = ReplyKeyboardMarkup(
+        [
+            [
+                KeyboardButton("Список приложений"),
+                KeyboardButton("Сформировать ссылку для запуска"),
+                KeyboardButton("FAQ"),
+            ]
+        ]
+    )
+    return json.dumps(markup.to_dict())
+
+
+def prebuilt_main_keyboard():
+    return json.dumps(build_keyboard().to_dict())
+
+
+def rebuild_launch_links():
+    markup = InlineKeyboardMarkup(
+        [
+            [
+                InlineKeyboardButton(app.name, callback_data=str(app.id)),
+                InlineKeyboardButton(
+                    "Подписаться",
+                    callback_data=f"{constants.SUBSCRIBE_CALLBACK}:{app.id}",
+                ),
+                InlineKeyboardButton(
+                    "Отписаться",
+                    callback_data=f"{constants.UNSUBSCRIBE_CALLBACK}:{app.id}",
+                ),
+            ]
+            for app in APPLICATIONS
+        ]
+    )
+    return json.dumps(markup.to_dict())
+
+
+CACHED_LAUNCH_LINKS = build_launch_links_keyboard(APPLICATIONS)
+
+
+def cached_launch_links():
+    return json.dumps(CACHED_LAUNCH_LINKS.to_dict())
+
+
+def measure(function):
+    seconds = min(timeit.repeat(function, number=ITERATIONS, repeat=3))
+    tracemalloc.start()
+    for _ in range(100):
+        function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds / ITERATIONS * 1e6, peak
+
+
+def main():
+    cases = [
+        ("main keyboard, rebuild", rebuild_main_keyboard),
+        ("main keyboard, prebuilt", prebuilt_main_keyboard),
+        (f"launch links x{len(APPLICATIONS)}, rebuild", rebuild_launch_links),
+        (f"launch links x{len(APPLICATIONS)}, cached", cached_launch_links),
+    ]
+    print(f"{'case':<36}{'us/op':>10}{'peak KiB':>12}")
+    for name, function in cases:
+        microseconds, peak = measure(function)
+        print(f"{name:<36}{microseconds:>10.1f}{peak / 1024:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
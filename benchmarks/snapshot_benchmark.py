@@ -0,0 +1,111 @@
+"""Бенчмарк снимка каталога для цикла проверок.
+
+Загружает TARGETS приложений из SQLite в памяти двумя способами и
+выводит объем памяти Python, который занимают загруженные данные:
+
+- orm: объекты Application, привязанные к сессии, как до перехода на
+  снимки;
+- snapshot: проекция колонок MonitoredTarget.COLUMNS в MonitoredTarget,
+  как в ApplicationServices.get_monitoring_snapshot.
+
+Затем сравнивает поиск приложений для сохранения после проверки:
+обход всего каталога со сравнением состояния и список измененных,
+который ведет Catalogue. Изменено CHANGED приложений.
+
+Запуск: python benchmarks/snapshot_benchmark.py [TARGETS]
+"""
+
+import gc
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# core импортируется первым: bot.constants и core.db ссылаются друг на друга.
+import core  # noqa: E402,F401
+from sqlalchemy import create_engine, insert, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from core.db import Base  # noqa: E402
+from database.models import Application  # noqa: E402
+from services.catalogue import Catalogue  # noqa: E402
+from services.monitoring import MonitoredTarget  # noqa: E402
+
+TARGETS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+CHANGED = 100
+ITERATIONS = 20
+
+
+def create_database():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(
+            insert(Application),
+            [
+                {
+                    "url": f"https://application-{number}.example.com/health",
+                    "name": f"application-{number}",
+                    "ads_url": f"https://ads-{number}.example.com/",
+                }
+                for number in range(TARGETS)
+            ],
+        )
+    return engine
+
+
+def load_orm(session):
+    return session.scalars(select(Application)).all()
+
+
+def load_snapshot(session):
+    columns = [getattr(Application, name) for name in MonitoredTarget.COLUMNS]
+    return [MonitoredTarget(*row) for row in session.execute(select(*columns))]
+
+
+def retained(engine, load):
+    """Возвращает память, занятую результатом load и сессией, в байтах."""
+    gc.collect()
+    tracemalloc.start()
+    with Session(engine) as session:
+        before, _ = tracemalloc.get_traced_memory()
+        result = load(session)
+        gc.collect()
+        after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def main():
+    engine = create_database()
+    print(f"{'case':<28}{'MiB':>10}")
+    for name, load in (("orm", load_orm), ("snapshot", load_snapshot)):
+        print(f"{name:<28}{retained(engine, load) / 2**20:>10.1f}")
+
+    with Session(engine) as session:
+        targets = load_snapshot(session)
+    catalogue = Catalogue()
+    catalogue._targets = {target.id: target for target in targets}
+    for target in targets:
+        target.track(catalogue._changed)
+    for target in targets[:: len(targets) // CHANGED][:CHANGED]:
+        target.failure_counter += 1
+
+    def scan():
+        return [target for target in targets if target.dirty]
+
+    assert len(scan()) == len(catalogue.changed_targets()) == CHANGED
+    print(f"\n{'dirty lookup':<28}{'ms':>10}")
+    for name, function in (
+        ("scan all targets", scan),
+        ("catalogue.changed_targets", catalogue.changed_targets),
+    ):
+        seconds = min(timeit.repeat(function, number=ITERATIONS, repeat=3))
+        print(f"{name:<28}{seconds / ITERATIONS * 1e3:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Бенчмарк холодного старта бота.
+
+Каждый замер выполняется в новом интерпретаторе, как при запуске или
+перезапуске контейнера:
+
+- import: импорт bot/app.py со всеми зависимостями;
+- head: поиск head-ревизии по файлам миграций, которым бот после
+  импорта решает, нужно ли запускать alembic;
+- alembic: то же через импорт alembic и ScriptDirectory для сравнения.
+
+Для каждого варианта выводит медиану и максимум по нескольким запускам.
+Подключение к БД не требуется: движок создается лениво.
+
+Запуск: python benchmarks/startup_benchmark.py
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RUNS = 7
+
+TIMED = """
+import time
+{setup}
+started = time.perf_counter()
+{code}
+print(time.perf_counter() - started)
+"""
+
+# Название: (подготовка вне замера, измеряемый код).
+SCENARIOS = {
+    "import": ("", "import app"),
+    "head": (
+        "import app\nfrom core.migrations import head_revisions",
+        "head_revisions()",
+    ),
+    "alembic": (
+        "import app",
+        "from alembic.config import Config\n"
+        "from alembic.script import ScriptDirectory\n"
+        "ScriptDirectory.from_config(Config('alembic.ini')).get_current_head()",
+    ),
+}
+
+
+def measure(setup: str, code: str) -> float:
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join(
+            [PROJECT_DIR, os.path.join(PROJECT_DIR, "bot")]
+        ),
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", TIMED.format(setup=setup, code=code)],
+        cwd=PROJECT_DIR,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    for name, (setup, code) in SCENARIOS.items():
+        timings = [measure(setup, code) for _ in range(RUNS)]
+        print(
+            f"{name:<8} медиана {statistics.median(timings) * 1000:7.1f} мс, "
+            f"максимум {max(timings) * 1000:7.1f} мс"
+        )
+
+
+if __name__ == "__main__":
+    main()
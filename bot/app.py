@@ -1,30 +1,75 @@
 import asyncio
+import csv
+import io
+import json
 import logging
 import os
+import tempfile
+from collections import defaultdict
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
 
-import aiohttp
 from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram import Update
 from telegram.ext import (
     Application,
+    ApplicationHandlerStop,
     CallbackContext,
     CallbackQueryHandler,
     CommandHandler,
     ContextTypes,
     MessageHandler,
+    TypeHandler,
     filters,
 )
 
-import constants
-from keyboard import build_keyboard
-from core.db import get_async_session
-from services import application_service, token_service, user_service
+from bot import constants
+from bot.keyboard import build_keyboard, build_launch_links_keyboard
+from core.bot_request import create_bot_request
+from core.certificates import certificate_cache
+from core.db import get_async_session, get_engine, get_replica_engine
+from core.log import bind_correlation_id, setup_logging
+from core.loop_monitor import loop_monitor
+from core.metrics import (
+    bytes_purged,
+    db_pool_checked_out,
+    handler_latency,
+    rows_purged,
+    start_metrics_server,
+    sweep_duration,
+    timed,
+)
+from core.migrations import ensure_schema
+from core.outbox import outbox
+from core.rate_limit import command_of, rate_limiter
+from core.replica import replica_monitor
+from services import (
+    APPLICATION_FIELDS,
+    application_service,
+    setting_service,
+    subscription_service,
+    token_service,
+    user_service,
+)
+from services.agents import probe_agents
+from services.alerts import alert_aggregator
+from services.catalogue import catalogue
+from services.probe import last_ads_results, last_results
+from services.scheduler import scheduler
+from utils.catalogue_io import SUPPORTED_FORMATS, CatalogueWriter, read_batches
+from utils.cache import VersionedCache
 from utils.dependecies import Depends, inject_db
 
-logger = logging.Logger("BOT", logging.INFO)
+logger = logging.getLogger("BOT")
+probe_logger = logging.getLogger("BOT.probe")
 
+# Построенные по каталогу ответы, действительные до его следующего изменения.
+status_lines_cache = VersionedCache()
+launch_links_cache = VersionedCache()
 
+
+@timed(handler_latency, command="start")
 @inject_db
 async def start(
     update: Update,
@@ -47,49 +92,50 @@ async def start(
     """
     logger.info("Обработка команды start")
 
-    if await user_service.get_user_by_attr(
-        "telegram_user_id", update.message.from_user.id, session
-    ):
-        await update.message.reply_text(
-            constants.START_ALREADY_AUTHORIZED, reply_markup=build_keyboard()
-        )
-        logger.info("Пользователь уже авторизован")
-        return
-
     if not context.args:
+        if await user_service.get_user_by_attr(
+            "telegram_user_id", update.message.from_user.id, session
+        ):
+            await update.message.reply_text(
+                constants.START_ALREADY_AUTHORIZED, reply_markup=build_keyboard()
+            )
+            logger.info("Пользователь уже авторизован")
+            return
         await update.message.reply_text(constants.START_NO_ARGS)
         logger.warning("Отсутствуют аргументы в команде start")
         return
 
     user_token = context.args.pop()
-    print(constants.SECRET_ADMIN_TOKEN)
-    if user_token == constants.SECRET_ADMIN_TOKEN:
-        await user_service.create_user(
+    is_admin = user_token == constants.SECRET_ADMIN_TOKEN
+    try:
+        registered = await user_service.register_user(
             {
-            "telegram_user_id": update.message.from_user.id,
-             "is_admin": True,
-            }, session
-        )
-        await update.message.reply_text(
-            constants.SECRET_REPLY, reply_markup=build_keyboard()
+                "telegram_user_id": update.message.from_user.id,
+                "is_admin": is_admin,
+            },
+            session,
+            token=None if is_admin else user_token,
         )
-        return
-    try:
-        await token_service.check_user_token(user_token, session)
     except ValueError as error:
         await update.message.reply_text(str(error))
         logger.error("Ошибка при проверке токена пользователя: %s", error)
         return
 
-    await user_service.create_user(
-        {"telegram_user_id": update.message.from_user.id}, session
-    )
+    if not registered:
+        await update.message.reply_text(
+            constants.START_ALREADY_AUTHORIZED, reply_markup=build_keyboard()
+        )
+        logger.info("Пользователь уже авторизован")
+        return
+
     await update.message.reply_text(
-        constants.START_REGISTERED, reply_markup=build_keyboard()
+        constants.SECRET_REPLY if is_admin else constants.START_REGISTERED,
+        reply_markup=build_keyboard(),
     )
     logger.info("Пользователь успешно зарегистрирован")
 
 
+@timed(handler_latency, command="setinterval")
 @inject_db
 async def set_interval(
     update: Update,
@@ -98,6 +144,9 @@ async def set_interval(
 ) -> None:
     """Устанавливает интервал опроса доступности приложений.
 
+    Без url меняет общий интервал, с url - интервал одного приложения.
+    Оба значения хранятся в БД и переживают перезапуск бота.
+
     Args:
         update (Update): Обновление от Telegram.
         context (ContextTypes.DEFAULT_TYPE): Контекст выполнения команды.
@@ -119,17 +168,46 @@ async def set_interval(
         )
         return
 
-    if len(context.args) != 1:
-        await update.message.reply_text(constants.INTERVAL_ARGS)
-        logger.warning("Отсутствует аргумент в команде set_interval")
+    if (
+        len(context.args) not in (1, 2)
+        or not context.args[0].isdigit()
+        or not constants.MIN_INTERVAL_VALUE
+        <= int(context.args[0])
+        <= constants.MAX_INTERVAL_VALUE
+    ):
+        await update.message.reply_text(
+            constants.INTERVAL_ARGS.format(
+                constants.MIN_INTERVAL_VALUE, constants.MAX_INTERVAL_VALUE
+            )
+        )
+        logger.warning("Некорректные аргументы в команде set_interval")
         return
 
-    interval = int(context.args.pop())
-    await context.application.job_queue.stop(wait=False)
-    context.application.job_queue.run_repeating(
-        check_applications, interval=interval, first=0
-    )
-    await context.application.job_queue.start()
+    interval = int(context.args[0])
+    if len(context.args) == 2:
+        url = context.args[1]
+        try:
+            await application_service.set_check_interval(
+                url, interval, session
+            )
+        except ValueError as error:
+            await update.message.reply_text(str(error))
+            logger.warning("Приложение для set_interval не найдено")
+            return
+        # Каталог получит новый интервал через NOTIFY, а время следующей
+        # проверки пересчитается после ближайшей проверки приложения.
+        await update.message.reply_text(
+            constants.APPLICATION_INTERVAL_SET_MESSAGE.format(url, interval)
+        )
+        logger.info(
+            "Интервал опроса приложения изменен",
+            extra={"url": url, "interval": interval},
+        )
+        return
+
+    await setting_service.set_interval(interval, session)
+    scheduler.interval = interval
+    scheduler.reschedule(catalogue.targets(), datetime.now(timezone.utc))
 
     await update.message.reply_text(
         constants.INTERVAL_SET_MESSAGE.format(interval)
@@ -137,6 +215,7 @@ async def set_interval(
     logger.info("Интервал опроса приложений успешно изменен: %d", interval)
 
 
+@timed(handler_latency, command="add")
 @inject_db
 async def add_application(
     update: Update,
@@ -185,6 +264,185 @@ async def add_application(
     logger.info("Приложение успешно добавлено: %s", name)
 
 
+@timed(handler_latency, command="setcheck")
+@inject_db
+async def set_check(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    session: AsyncSession = Depends(get_async_session),
+) -> None:
+    """Задает проверки содержимого, заголовков и времени ответа приложения.
+
+    Args:
+        update (Update): Обновление от Telegram.
+        context (ContextTypes.DEFAULT_TYPE): Контекст выполнения команды.
+        session (AsyncSession, optional): Сессия асинхронного соединения с базой данных.
+
+    Returns:
+        None
+
+    """
+    logger.info("Обработка команды set_check")
+
+    if not await user_service.is_admin(update.message.from_user.id, session):
+        await update.message.reply_text(constants.ONLY_ADMIN)
+        logger.warning("Попытка изменения проверок неадминистратором")
+        return
+
+    if not context.args:
+        await update.message.reply_text(constants.SET_CHECK_ARGS)
+        logger.warning("Недостаточно аргументов в команде set_check")
+        return
+
+    url = context.args[0]
+    try:
+        data = json.loads(" ".join(context.args[1:]) or "{}")
+    except json.JSONDecodeError:
+        await update.message.reply_text(constants.ASSERTIONS_FORMAT)
+        logger.warning("Некорректный JSON в команде set_check")
+        return
+    try:
+        await application_service.set_assertions(url, data, session)
+    except ValueError as error:
+        await update.message.reply_text(str(error))
+        logger.error("Ошибка изменения проверок: %s", error)
+        return
+    await update.message.reply_text(constants.ASSERTIONS_SET.format(url))
+    logger.info("Проверки приложения обновлены: %s", url)
+
+
+@timed(handler_latency, command="import")
+@inject_db
+async def import_applications(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    session: AsyncSession = Depends(get_async_session),
+) -> None:
+    """Импортирует приложения из присланного файла csv или jsonl.
+
+    Файл читается пачками по constants.IMPORT_BATCH_SIZE строк, каждая
+    пачка проверяется и сохраняется одним upsert по url, а прогресс
+    выводится в редактируемом сообщении.
+
+    Args:
+        update (Update): Обновление от Telegram.
+        context (ContextTypes.DEFAULT_TYPE): Контекст выполнения команды.
+        session (AsyncSession, optional): Сессия асинхронного соединения с базой данных.
+
+    Returns:
+        None
+
+    """
+    logger.info("Обработка импорта приложений")
+
+    if not await user_service.is_admin(update.message.from_user.id, session):
+        await update.message.reply_text(constants.ONLY_ADMIN)
+        logger.warning("Попытка импорта приложений неадминистратором")
+        return
+
+    document = update.message.document
+    file_format = os.path.splitext(document.file_name or "")[1].lstrip(".")
+    if file_format not in SUPPORTED_FORMATS:
+        await update.message.reply_text(constants.IMPORT_UNSUPPORTED_FORMAT)
+        logger.warning("Неподдерживаемый формат файла импорта")
+        return
+
+    progress = await update.message.reply_text(constants.IMPORT_STARTED)
+    file_descriptor, path = tempfile.mkstemp(suffix=f".{file_format}")
+    os.close(file_descriptor)
+    processed = 0
+    errors = []
+    try:
+        telegram_file = await document.get_file()
+        await telegram_file.download_to_drive(path)
+        batches = read_batches(path, file_format, constants.IMPORT_BATCH_SIZE)
+        while batch := await asyncio.to_thread(next, batches, None):
+            errors.extend(
+                await application_service.import_applications(batch, session)
+            )
+            processed += len(batch)
+            await progress.edit_text(
+                constants.IMPORT_PROGRESS.format(processed, len(errors))
+            )
+    except (csv.Error, UnicodeDecodeError) as error:
+        await update.message.reply_text(
+            constants.IMPORT_READ_ERROR.format(error, processed, len(errors))
+        )
+        logger.warning(
+            "Не удалось прочитать файл импорта",
+            extra={"error": str(error), "processed": processed},
+        )
+        return
+    finally:
+        os.remove(path)
+
+    report = [constants.IMPORT_FINISHED.format(processed, len(errors))]
+    report.extend(
+        constants.IMPORT_ERROR_LINE.format(line_number, error)
+        for line_number, error in errors[: constants.IMPORT_MAX_REPORTED_ERRORS]
+    )
+    await update.message.reply_text("\n".join(report))
+    logger.info(
+        "Импорт приложений завершен",
+        extra={"processed": processed, "errors": len(errors)},
+    )
+
+
+@timed(handler_latency, command="export")
+@inject_db
+async def export_applications(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    session: AsyncSession = Depends(get_async_session),
+) -> None:
+    """Выгружает каталог приложений в файл csv или jsonl.
+
+    Строки читаются серверным курсором пачками по
+    constants.EXPORT_BATCH_SIZE и сразу дописываются во временный файл.
+
+    Args:
+        update (Update): Обновление от Telegram.
+        context (ContextTypes.DEFAULT_TYPE): Контекст выполнения команды.
+        session (AsyncSession, optional): Сессия асинхронного соединения с базой данных.
+
+    Returns:
+        None
+
+    """
+    logger.info("Обработка команды export_applications")
+
+    if not await user_service.is_admin(update.message.from_user.id, session):
+        await update.message.reply_text(constants.ONLY_ADMIN)
+        logger.warning("Попытка выгрузки приложений неадминистратором")
+        return
+
+    file_format = context.args[0] if context.args else "csv"
+    if len(context.args) > 1 or file_format not in SUPPORTED_FORMATS:
+        await update.message.reply_text(constants.EXPORT_ARGS)
+        logger.warning("Некорректные аргументы в команде export_applications")
+        return
+
+    file_descriptor, path = tempfile.mkstemp(suffix=f".{file_format}")
+    exported = 0
+    try:
+        with os.fdopen(file_descriptor, "w", newline="", encoding="utf-8") as file:
+            writer = CatalogueWriter(file, file_format, APPLICATION_FIELDS)
+            async for rows in application_service.stream_applications(
+                session, constants.EXPORT_BATCH_SIZE
+            ):
+                await asyncio.to_thread(writer.write, rows)
+                exported += len(rows)
+        await update.message.reply_document(
+            path,
+            filename=f"applications.{file_format}",
+            caption=constants.EXPORT_FINISHED.format(exported),
+        )
+    finally:
+        os.remove(path)
+    logger.info("Выгружено приложений: %d", exported)
+
+
+@timed(handler_latency, command="remove")
 @inject_db
 async def remove_application(
     update: Update,
@@ -234,6 +492,7 @@ async def remove_application(
     logger.info("Приложение успешно удалено: %s", application)
 
 
+@timed(handler_latency, command="generatekey")
 @inject_db
 async def generate_key(
     update: Update,
@@ -273,6 +532,71 @@ async def generate_key(
         logger.error("Ошибка генерации токена: %s", error)
 
 
+@timed(handler_latency, command="generatekeys")
+@inject_db
+async def generate_keys(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    session: AsyncSession = Depends(get_async_session),
+) -> None:
+    """Генерирует пачку случайных токенов и отправляет их файлом.
+
+    Args:
+        update (Update): Обновление от Telegram.
+        context (ContextTypes.DEFAULT_TYPE): Контекст выполнения команды.
+        session (AsyncSession, optional): Сессия асинхронного соединения с базой данных.
+
+    Returns:
+        None
+
+    """
+    logger.info("Обработка команды generate_keys")
+
+    if not await user_service.is_admin(update.message.from_user.id, session):
+        await update.message.reply_text(constants.ONLY_ADMIN)
+        logger.warning("Попытка генерации токенов неадминистратором")
+        return
+
+    if (
+        len(context.args) != 1
+        or not context.args[0].isdigit()
+        or not 0 < int(context.args[0]) <= constants.MAX_GENERATED_TOKENS
+    ):
+        await update.message.reply_text(
+            constants.GENERATE_KEYS_ARGS.format(constants.MAX_GENERATED_TOKENS)
+        )
+        logger.warning("Некорректные аргументы в команде generate_keys")
+        return
+
+    tokens = await token_service.generate_tokens(int(context.args[0]), session)
+    await update.message.reply_document(
+        io.BytesIO("\n".join(tokens).encode()),
+        filename="tokens.txt",
+        caption=constants.TOKENS_GENERATED.format(len(tokens)),
+    )
+    logger.info("Сгенерировано токенов: %d", len(tokens))
+
+
+async def send_messages(bot, messages: list) -> None:
+    """Отправляет сообщения через общую очередь исходящих.
+
+    Сообщения в один чат объединяются, ошибка доставки одному
+    получателю не прерывает отправку остальным.
+
+    Args:
+        bot: Экземпляр Telegram Bot.
+        messages (list): Пары (chat_id, текст сообщения).
+
+    Returns:
+        None
+
+    """
+    await asyncio.gather(
+        *[outbox.send(bot, chat_id, text) for chat_id, text in messages],
+        return_exceptions=True,
+    )
+
+
 async def send_message_to_all_users(bot, message: str, session: AsyncSession):
     """Отправляет сообщение всем пользователям.
 
@@ -288,88 +612,273 @@ async def send_message_to_all_users(bot, message: str, session: AsyncSession):
     logger.info("Отправка сообщения всем пользователям")
 
     users = await user_service.get_all_users(session)
-    await asyncio.gather(
-        *[
-            bot.send_message(chat_id=user.telegram_user_id, text=message)
-            for user in users
-        ]
+    await send_messages(
+        bot, [(user.telegram_user_id, message) for user in users]
     )
 
 
 async def request_application_info(
-    context: CallbackContext, application, session: AsyncSession
+    context: CallbackContext,
+    application,
+    results: dict,
+    session: AsyncSession,
 ):
-    """Запрашивает информацию о приложении.
+    """Обрабатывает результаты проверки приложения.
+
+    Результаты берутся из общего для всей проверки словаря, в котором
+    каждый адрес проверен один раз. Меняет только счетчик ошибок и
+    состояние цепи снимка в памяти, сохраняет их check_applications
+    одним пакетом после проверки всех приложений. Уведомление о
+    недоступности попадает в сводку alert_aggregator один раз при
+    размыкании цепи, а не после каждых нескольких неудачных проверок.
 
     Args:
         context (CallbackContext): Контекст выполнения команды.
-        application: Приложение для мониторинга.
+        application (MonitoredTarget): Снимок приложения для мониторинга.
+        results (dict): Результаты probe_many по паре (url, проверки).
         session (AsyncSession): Сессия асинхронного соединения с базой данных.
 
     Returns:
         None
 
     """
-    logger.info("Запрос информации о приложении: %s", application.name)
-
-    async with aiohttp.ClientSession() as http_session:
-        try:
-            async with http_session.get(application.url) as response:
-                logger.info(
-                    "Статус запроса: %s, URL: %s",
-                    response.status,
-                    application.url,
-                )
-
-                if response.status == constants.HTTP_200_OK:
-                    await application_service.reset_failure_counter(
-                        application, session
-                    )
-                else:
-                    await application_service.increment_failure_counter(
-                        application, session
-                    )
-        except aiohttp.ClientError as error:
-            await application_service.increment_failure_counter(
-                application, session
+    result = results[(application.url, application.assertions)]
+    last_results[application.id] = result
+    ads_result = None
+    if constants.PROBE_ADS_URL and (application.ads_url, None) in results:
+        ads_result = results[(application.ads_url, None)]
+        last_ads_results[application.id] = ads_result
+
+    probe_fields = {
+        "application": application.name,
+        "url": application.url,
+        "status": result.status,
+        "error": result.error,
+        "assertion_error": result.assertion_error,
+        "timings": asdict(result.timings),
+    }
+    if ads_result is not None:
+        probe_fields.update(
+            ads_url=application.ads_url,
+            ads_status=ads_result.status,
+            ads_error=ads_result.error,
+        )
+    if result.ok and (ads_result is None or ads_result.ok):
+        if result.degraded:
+            logger.warning(
+                "Приложение отвечает медленнее SLO", extra=probe_fields
+            )
+        else:
+            probe_logger.info("Приложение доступно", extra=probe_fields)
+        if application.circuit_open:
+            logger.info("Приложение снова доступно", extra=probe_fields)
+        application.failure_counter = 0
+        application.circuit_open = False
+    else:
+        application.failure_counter += 1
+        if result.dns_error or (ads_result is not None and ads_result.dns_error):
+            logger.error(
+                "Ошибка DNS при запросе приложения", extra=probe_fields
             )
+        elif result.tls_error:
             logger.error(
-                "Ошибка при запросе информации о приложении: %s", error
+                "Ошибка TLS-рукопожатия при запросе приложения",
+                extra=probe_fields,
             )
+        else:
+            logger.warning("Приложение недоступно", extra=probe_fields)
 
-    if application.failure_counter >= constants.MINIMAL_FAILURE_COUNTER_VALUE:
-        await send_message_to_all_users(
-            context.bot,
-            constants.APPLICATION_UNAVAILABLE.format(
+    if (
+        not application.circuit_open
+        and application.failure_counter
+        >= constants.MINIMAL_FAILURE_COUNTER_VALUE
+    ):
+        if result.ok:
+            message = constants.ADS_URL_UNAVAILABLE.format(
+                application.name, application.ads_url
+            )
+        else:
+            message = constants.APPLICATION_UNAVAILABLE.format(
                 application.name, application.url
+            )
+        alert_aggregator.add(application.id, message)
+        application.circuit_open = True
+
+    certificate = result.certificate
+    if (
+        result.ok
+        and certificate is not None
+        and certificate_cache.should_alert(certificate)
+    ):
+        alert_aggregator.add(
+            application.id,
+            constants.CERTIFICATE_EXPIRES.format(
+                application.name,
+                application.url,
+                certificate.not_after,
+                certificate.days_left(),
             ),
-            session,
         )
-        await application_service.reset_failure_counter(application, session)
+        logger.warning(
+            "Сертификат приложения скоро истекает",
+            extra={**probe_fields, "not_after": str(certificate.not_after)},
+        )
 
 
+@inject_db
+async def send_alert_digest(
+    context: CallbackContext,
+    session: AsyncSession = Depends(get_async_session),
+) -> None:
+    """Отправляет подписчикам сводку уведомлений за окно группировки.
+
+    Подписчики ищутся только для приложений из сводки, и каждый из них
+    получает одно сообщение со своими приложениями, независимо от их
+    количества.
+
+    Args:
+        context (CallbackContext): Контекст выполнения задачи.
+        session (AsyncSession, optional): Сессия асинхронного соединения с базой данных.
+
+    Returns:
+        None
+
+    """
+    alerts = alert_aggregator.drain()
+    subscribers = await subscription_service.get_subscribers(
+        list(alerts), session
+    )
+    user_alerts = defaultdict(list)
+    for application_id in alerts:
+        for telegram_user_id in subscribers.get(application_id, ()):
+            user_alerts[telegram_user_id].append(application_id)
+
+    # Пользователи с одинаковым набором приложений получают одну сводку.
+    digests = {}
+    messages = []
+    for telegram_user_id, application_ids in user_alerts.items():
+        key = tuple(application_ids)
+        if key not in digests:
+            digests[key] = alert_aggregator.build_digest(
+                [alerts[application_id] for application_id in application_ids]
+            )
+        messages.extend((telegram_user_id, text) for text in digests[key])
+    await send_messages(context.bot, messages)
+    logger.info(
+        "Отправлена сводка уведомлений",
+        extra={"alerts": len(alerts), "recipients": len(user_alerts)},
+    )
+
+
+async def run_scheduled_checks(context: CallbackContext) -> None:
+    """Запускает проверку приложений, время проверки которых наступило.
+
+    Выполняется каждые SCHEDULER_TICK секунд и не открывает сессию БД,
+    пока проверять нечего.
+
+    Args:
+        context (CallbackContext): Контекст выполнения задачи.
+
+    Returns:
+        None
+
+    """
+    applications = scheduler.due(
+        catalogue.targets(), datetime.now(timezone.utc)
+    )
+    if applications:
+        await check_applications(context, applications)
+
+
+@timed(sweep_duration)
 @inject_db
 async def check_applications(
     context: CallbackContext,
+    applications: list,
     session: AsyncSession = Depends(get_async_session),
 ) -> None:
     """Проверяет доступность приложений и отправляет уведомления при необходимости.
 
+    Одинаковые адреса разных приложений проверяются один раз каждым
+    агентом проверки, а решение кворума агентов раздается всем
+    приложениям, которые на них ссылаются.
+
     Args:
         context (CallbackContext): Контекст выполнения команды.
+        applications (list): Снимки приложений, которые нужно проверить.
         session (AsyncSession, optional): Сессия асинхронного соединения с базой данных.
 
     Returns:
         None
 
     """
-    logger.info("Выполнение периодической проверки приложений")
+    bind_correlation_id()
+    logger.info(
+        "Выполнение периодической проверки приложений",
+        extra={"applications": len(applications)},
+    )
 
-    applications = await application_service.get_all_applications(session)
+    keys = [
+        (application.url, application.assertions)
+        for application in applications
+    ]
+    if constants.PROBE_ADS_URL:
+        keys += [(application.ads_url, None) for application in applications]
+    results = await probe_agents.probe_many(keys)
+    checked_at = datetime.now(timezone.utc)
     for application in applications:
-        await request_application_info(context, application, session)
+        # Без результата, если все агенты проверки завершились с ошибкой.
+        if (application.url, application.assertions) in results:
+            await request_application_info(
+                context, application, results, session
+            )
+        scheduler.checked(application, checked_at)
+    # Сохраняются и приложения, которым планировщик только назначил время.
+    await application_service.save_monitoring_state(
+        catalogue.changed_targets(), session
+    )
+    if alert_aggregator and not alert_aggregator.flush_scheduled:
+        alert_aggregator.flush_scheduled = True
+        context.job_queue.run_once(
+            send_alert_digest, constants.ALERT_GROUPING_WINDOW
+        )
 
 
+@inject_db
+async def purge_history(
+    context: CallbackContext,
+    session: AsyncSession = Depends(get_async_session),
+) -> None:
+    """Удаляет данные старше срока хранения и сообщает объем удаленного.
+
+    Args:
+        context (CallbackContext): Контекст выполнения задачи.
+        session (AsyncSession, optional): Сессия асинхронного соединения с базой данных.
+
+    Returns:
+        None
+
+    """
+    used_before = datetime.now(timezone.utc) - timedelta(
+        days=constants.TOKEN_RETENTION_DAYS
+    )
+    rows, size = await token_service.purge_consumed_tokens(
+        used_before, session
+    )
+    rows_purged.inc(rows, table="token")
+    bytes_purged.inc(size, table="token")
+    logger.info(
+        "Очистка устаревших данных завершена",
+        extra={"table": "token", "rows": rows, "bytes": size},
+    )
+    pruned = certificate_cache.prune(catalogue.hosts())
+    logger.info(
+        "Очистка уведомлений о сертификатах завершена",
+        extra={"rows": pruned},
+    )
+
+
+@timed(handler_latency, command="broadcast")
 @inject_db
 async def broadcast(
     update: Update,
@@ -404,13 +913,17 @@ async def broadcast(
     logger.info("Широковещательное сообщение отправлено: %s", message)
 
 
+@timed(handler_latency, command="loopstats")
 @inject_db
-async def status(
+async def loop_stats(
     update: Update,
     context: ContextTypes.DEFAULT_TYPE,
     session: AsyncSession = Depends(get_async_session),
 ) -> None:
-    """Отправляет статус всех приложений.
+    """Отправляет администратору сводку о здоровье цикла событий.
+
+    С аргументом flamegraph дополнительно записывает снимки стеков в файл
+    и отправляет его документом.
 
     Args:
         update (Update): Обновление от Telegram.
@@ -420,34 +933,147 @@ async def status(
     Returns:
         None
 
+    """
+    logger.info("Обработка команды loop_stats")
+
+    if not await user_service.is_admin(update.message.from_user.id, session):
+        await update.message.reply_text(constants.ONLY_ADMIN)
+        logger.warning("Попытка просмотра профиля неадминистратором")
+        return
+
+    if context.args and context.args != ["flamegraph"]:
+        await update.message.reply_text(constants.LOOP_STATS_ARGS)
+        logger.warning("Некорректные аргументы в команде loop_stats")
+        return
+
+    slow = [
+        constants.LOOP_STATS_SLOW_CALLBACK.format(
+            callback.location,
+            callback.count,
+            round(callback.total_duration * 1000),
+            round(callback.max_duration * 1000),
+        )
+        for callback in loop_monitor.top_slow_callbacks(constants.LOOP_STATS_TOP)
+    ]
+    handlers = [
+        constants.LOOP_STATS_HANDLER.format(name, round(busy * 1000))
+        for name, busy in loop_monitor.top_handlers(constants.LOOP_STATS_TOP)
+    ]
+    await update.message.reply_text(
+        constants.LOOP_STATS_MESSAGE.format(
+            round(loop_monitor.current_lag * 1000),
+            round(loop_monitor.max_lag * 1000),
+            "\n".join(slow) or constants.LOOP_STATS_EMPTY,
+            "\n".join(handlers) or constants.LOOP_STATS_EMPTY,
+        )
+    )
+
+    if context.args:
+        stacks = await asyncio.to_thread(
+            loop_monitor.write_flamegraph, constants.FLAMEGRAPH_PATH
+        )
+        await update.message.reply_document(
+            constants.FLAMEGRAPH_PATH,
+            caption=constants.FLAMEGRAPH_WRITTEN.format(stacks),
+        )
+        logger.info("Flamegraph записан: %s", constants.FLAMEGRAPH_PATH)
+
+
+def format_probe_result(result) -> str:
+    """Форматирует последний результат проверки для команды status.
+
+    Args:
+        result (ProbeResult | None): Результат проверки приложения.
+
+    Returns:
+        str: Строка с ответом и разбивкой времени или пустая строка.
+    """
+    if result is None:
+        return ""
+
+    def ms(value):
+        return "-" if value is None else f"{value * 1000:.0f}"
+
+    outcome = result.status or result.error
+    if result.assertion_error is not None:
+        outcome = f"{outcome}, {result.assertion_error}"
+    timings = result.timings
+    text = constants.STATUS_PROBE_TIMINGS.format(
+        outcome,
+        ms(timings.dns),
+        ms(timings.connect),
+        ms(timings.tls),
+        ms(timings.ttfb),
+        ms(timings.total),
+    )
+    if result.degraded:
+        text += constants.STATUS_DEGRADED
+    if result.certificate is not None:
+        text += constants.STATUS_CERTIFICATE.format(
+            result.certificate.not_after
+        )
+    if result.down_votes:
+        text += constants.STATUS_AGENT_VOTES.format(
+            result.down_votes, result.votes
+        )
+    return text
+
+
+def format_ads_result(result) -> str:
+    if result is None:
+        return ""
+    return constants.STATUS_ADS_URL.format(result.status or result.error)
+
+
+@timed(handler_latency, command="status")
+async def status(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Отправляет статус всех приложений.
+
+    Args:
+        update (Update): Обновление от Telegram.
+        context (ContextTypes.DEFAULT_TYPE): Контекст выполнения команды.
+
+    Returns:
+        None
+
     """
     logger.info("Обработка команды status")
 
-    applications = await application_service.get_all_applications(session)
-    await asyncio.gather(
-        *[
-            update.message.reply_text(
+    version = catalogue.version
+    lines = status_lines_cache.get(version)
+    if lines is None:
+        lines = [
+            (
+                application.id,
                 constants.STATUS_APPLICATION.format(
                     application.name, application.url
-                )
+                ),
             )
-            for application in applications
+            for application in catalogue.targets()
         ]
+        status_lines_cache.set(version, lines)
+    # Строки уходят через outbox и объединяются в несколько сообщений.
+    await send_messages(
+        context.bot,
+        [
+            (
+                update.effective_chat.id,
+                line
+                + format_probe_result(last_results.get(application_id))
+                + format_ads_result(last_ads_results.get(application_id)),
+            )
+            for application_id, line in lines
+        ],
     )
 
 
-@inject_db
-async def get_launch_links(
-    update: Update,
-    context: CallbackContext,
-    session: AsyncSession = Depends(get_async_session),
-) -> None:
+@timed(handler_latency, command="getlauchlinks")
+async def get_launch_links(update: Update, context: CallbackContext) -> None:
     """Отправляет пользователю список приложений с кнопками для получения ссылок на запуск.
 
     Args:
         update (Update): Обновление от Telegram.
         context (ContextTypes.DEFAULT_TYPE): Контекст выполнения команды.
-        session (AsyncSession, optional): Сессия асинхронного соединения с базой данных.
 
     Returns:
         None
@@ -455,30 +1081,24 @@ async def get_launch_links(
     """
     logger.info("Обработка команды get_launch_links")
 
-    applications = await application_service.get_all_applications(session)
-    keyboard = [
-        [InlineKeyboardButton(app.name, callback_data=str(app.id))]
-        for app in applications
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    version = catalogue.version
+    reply_markup = launch_links_cache.get(version)
+    if reply_markup is None:
+        reply_markup = build_launch_links_keyboard(catalogue.targets())
+        launch_links_cache.set(version, reply_markup)
 
     await update.message.reply_text(
         constants.GET_LAUNCH_LINKS_MESSAGE, reply_markup=reply_markup
     )
 
 
-@inject_db
-async def button_click(
-    update: Update,
-    context: CallbackContext,
-    session: AsyncSession = Depends(get_async_session),
-) -> None:
+@timed(handler_latency, command="button_click")
+async def button_click(update: Update, context: CallbackContext) -> None:
     """Обрабатывает нажатие кнопки для получения ссылки на запуск приложения.
 
     Args:
         update (Update): Обновление от Telegram.
         context (ContextTypes.DEFAULT_TYPE): Контекст выполнения команды.
-        session (AsyncSession, optional): Сессия асинхронного соединения с базой данных.
 
     Returns:
         None
@@ -489,9 +1109,11 @@ async def button_click(
     )
 
     query = update.callback_query
-    application = await application_service.get_application_by_attr(
-        "id", int(query.data), session
-    )
+    application = catalogue.get(int(query.data))
+    if application is None:
+        await query.answer()
+        logger.warning("Нажата кнопка удаленного приложения: %s", query.data)
+        return
     await query.message.reply_text(
         constants.BUTTON_CLICK_MESSAGE.format(
             application.name, application.url
@@ -499,6 +1121,61 @@ async def button_click(
     )
 
 
+@timed(handler_latency, command="subscription")
+@inject_db
+async def subscription_click(
+    update: Update,
+    context: CallbackContext,
+    session: AsyncSession = Depends(get_async_session),
+) -> None:
+    """Подписывает пользователя на уведомления о приложении или отписывает.
+
+    Args:
+        update (Update): Обновление от Telegram.
+        context (ContextTypes.DEFAULT_TYPE): Контекст выполнения команды.
+        session (AsyncSession, optional): Сессия асинхронного соединения с базой данных.
+
+    Returns:
+        None
+
+    """
+    logger.info("Обработка нажатия кнопки подписки")
+
+    query = update.callback_query
+    action, application_id = query.data.split(":")
+    application = catalogue.get(int(application_id))
+    user = await user_service.get_user_by_attr(
+        "telegram_user_id", query.from_user.id, session
+    )
+    if user is None:
+        await query.answer(
+            constants.SUBSCRIPTION_NOT_REGISTERED, show_alert=True
+        )
+        logger.warning("Попытка подписки незарегистрированным пользователем")
+        return
+    if application is None:
+        await query.answer()
+        logger.warning(
+            "Нажата кнопка подписки удаленного приложения: %s", query.data
+        )
+        return
+
+    if action == constants.SUBSCRIBE_CALLBACK:
+        changed = await subscription_service.subscribe(
+            user.id, application.id, session
+        )
+        text = (
+            constants.SUBSCRIBED if changed else constants.ALREADY_SUBSCRIBED
+        )
+    else:
+        changed = await subscription_service.unsubscribe(
+            user.id, application.id, session
+        )
+        text = constants.UNSUBSCRIBED if changed else constants.NOT_SUBSCRIBED
+    await query.answer(text.format(application.name))
+
+
+@timed(handler_latency, command="faq")
 async def faq(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Отправляет пользователю ответ на часто задаваемый вопрос.
 
@@ -514,22 +1191,173 @@ async def faq(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     await update.message.reply_text(constants.FAQ_MESSAGE)
 
 
+async def set_update_correlation_id(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    """Привязывает логи обработки обновления к его update_id.
+
+    Args:
+        update (Update): Обновление от Telegram.
+        context (ContextTypes.DEFAULT_TYPE): Контекст выполнения команды.
+
+    Returns:
+        None
+
+    """
+    bind_correlation_id(f"update-{update.update_id}")
+
+
+def update_command(update: Update):
+    """Определяет команду, которую вызовет обновление.
+
+    Args:
+        update (Update): Обновление от Telegram.
+
+    Returns:
+        str | None: Имя команды или None.
+    """
+    if update.callback_query is not None:
+        action = (update.callback_query.data or "").split(":", 1)[0]
+        if action in (
+            constants.SUBSCRIBE_CALLBACK,
+            constants.UNSUBSCRIBE_CALLBACK,
+        ):
+            return "subscription"
+        return "button_click"
+    message = update.message
+    if message is None:
+        return None
+    if message.document is not None:
+        return "import"
+    if message.text in constants.STATUS_TEXT_FILTERS:
+        return "status"
+    if message.text in constants.GET_LAUNCH_LINKS_FILTERS:
+        return "getlauchlinks"
+    if message.text in constants.FAQ_FILTERS:
+        return "faq"
+    return command_of(message.text)
+
+
+async def limit_update_rate(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    """Отбрасывает обновление, если пользователь исчерпал лимит команды.
+
+    Выполняется раньше всех обработчиков, поэтому отброшенное обновление
+    не открывает сессию БД и не отправляет ответов.
+
+    Args:
+        update (Update): Обновление от Telegram.
+        context (ContextTypes.DEFAULT_TYPE): Контекст выполнения команды.
+
+    Raises:
+        ApplicationHandlerStop: Если лимит исчерпан.
+    """
+    command = update_command(update)
+    user = update.effective_user
+    if command is None or user is None:
+        return
+    if not rate_limiter.allow(user.id, command):
+        logger.debug(
+            "Превышен лимит частоты команды",
+            extra={"command": command, "user_id": user.id},
+        )
+        raise ApplicationHandlerStop
+
+
+async def post_init(application: Application) -> None:
+    """Применяет миграции при необходимости и запускает фоновые службы.
+
+    Запускает сервер метрик, монитор цикла событий, наблюдение за
+    репликой БД, каталог приложений и восстанавливает сохраненное в БД
+    расписание проверок.
+
+    Args:
+        application (Application): Экземпляр приложения бота.
+
+    Returns:
+        None
+
+    """
+    await ensure_schema()
+    db_pool_checked_out.set_function(get_engine().pool.checkedout)
+    replica_engine = get_replica_engine()
+    if replica_engine is not None:
+        await replica_monitor.start(replica_engine)
+    loop_monitor.start()
+    await catalogue.start()
+    await scheduler.start(catalogue.targets())
+    application.bot_data["metrics_runner"] = await start_metrics_server()
+    logger.info("Сервер метрик запущен")
+
+
+async def post_shutdown(application: Application) -> None:
+    """Останавливает фоновые службы, запущенные в post_init.
+
+    Args:
+        application (Application): Экземпляр приложения бота.
+
+    Returns:
+        None
+
+    """
+    loop_monitor.stop()
+    await replica_monitor.stop()
+    await catalogue.stop()
+    await probe_agents.stop()
+    runner = application.bot_data.pop("metrics_runner", None)
+    if runner is not None:
+        await runner.cleanup()
+
+
 def main() -> None:
     """Запускает бота."""
 
-    logging.info("Bot started!")
-    application = Application.builder().token(os.getenv("BOT_TOKEN")).build()
+    log_listener = setup_logging()
+    logger.info("Bot started!")
+    application = (
+        Application.builder()
+        .token(constants.BOT_TOKEN)
+        .request(create_bot_request())
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
 
+    application.add_handler(TypeHandler(Update, limit_update_rate), group=-2)
+    application.add_handler(
+        TypeHandler(Update, set_update_correlation_id), group=-1
+    )
     application.add_handler(CommandHandler(["start"], start))
     application.add_handler(CommandHandler(["add"], add_application))
     application.add_handler(CommandHandler(["remove"], remove_application))
+    application.add_handler(CommandHandler(["setcheck"], set_check))
     application.add_handler(CommandHandler(["setinterval"], set_interval))
     application.add_handler(CommandHandler(["generatekey"], generate_key))
+    application.add_handler(CommandHandler(["generatekeys"], generate_keys))
     application.add_handler(CommandHandler(["broadcast"], broadcast))
+    application.add_handler(CommandHandler(["loopstats"], loop_stats))
+    application.add_handler(CommandHandler(["export"], export_applications))
+    application.add_handler(
+        MessageHandler(
+            filters.Document.FileExtension("csv")
+            | filters.Document.FileExtension("jsonl"),
+            import_applications,
+        )
+    )
     application.add_handler(
         CommandHandler(["getlauchlinks"], get_launch_links)
     )
     application.add_handler(CommandHandler(["status"], status))
+    application.add_handler(
+        CallbackQueryHandler(
+            subscription_click,
+            pattern=(
+                rf"^({constants.SUBSCRIBE_CALLBACK}"
+                rf"|{constants.UNSUBSCRIBE_CALLBACK}):\d+$"
+            ),
+        )
+    )
     application.add_handler(CallbackQueryHandler(button_click))
     application.add_handler(
         MessageHandler(filters.Text(constants.STATUS_TEXT_FILTERS), status)
@@ -542,11 +1370,23 @@ def main() -> None:
     application.add_handler(
         MessageHandler(filters.Text(constants.FAQ_FILTERS), faq)
     )
+    rate_limiter.register(
+        command
+        for handler in application.handlers[0]
+        if isinstance(handler, CommandHandler)
+        for command in handler.commands
+    )
 
     application.job_queue.run_repeating(
-        check_applications, interval=constants.INTERVAL_DEFAULT_VALUE, first=constants.REPEATING_JOB_FIRST_VALUE
+        run_scheduled_checks, interval=constants.SCHEDULER_TICK
     )
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    application.job_queue.run_repeating(
+        purge_history, interval=constants.RETENTION_JOB_INTERVAL
+    )
+    try:
+        application.run_polling(allowed_updates=Update.ALL_TYPES)
+    finally:
+        log_listener.stop()
 
 
 if __name__ == "__main__":
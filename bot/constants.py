@@ -1,6 +1,7 @@
 import os
 from dotenv import load_dotenv
 
+# Единственная загрузка .env: остальные модули берут настройки отсюда.
 load_dotenv()
 
 # MESSAGES
@@ -8,6 +9,16 @@ GET_LAUNCH_LINKS_MESSAGE = "Выберите приложение для пол
 
 BUTTON_CLICK_MESSAGE = "Ссылка для приложения {}: {}."
 
+SUBSCRIBED = "Вы подписаны на уведомления о приложении {}."
+
+ALREADY_SUBSCRIBED = "Вы уже подписаны на уведомления о приложении {}."
+
+UNSUBSCRIBED = "Вы отписаны от уведомлений о приложении {}."
+
+NOT_SUBSCRIBED = "Вы не были подписаны на уведомления о приложении {}."
+
+SUBSCRIPTION_NOT_REGISTERED = "Сначала зарегистрируйтесь: /start <token>."
+
 FAQ_MESSAGE = "Бот для мониторинга доступности приложений.\nПодробная инструкция, команды и пояснения для администратора доступны в README файле."
 
 INTERVAL_SET_MESSAGE = (
@@ -22,7 +33,9 @@ START_REGISTERED = "Вы зарегистрированы!"
 
 ONLY_ADMIN = "Эта команда только для администратора"
 
-INTERVAL_ARGS = "Команда ожидает 1 аргумент: <interval>."
+INTERVAL_ARGS = "Команда ожидает аргументы: <interval> [url], interval от {} до {} секунд."
+
+APPLICATION_INTERVAL_SET_MESSAGE = "Интервал проверки приложения с url {} изменен. Текущее значение - {}."
 
 ADD_APPLICATION_ARGS = "Команда ожидает 3 аргумента: url - name - ads_url"
 
@@ -38,12 +51,24 @@ GENERATE_ARGS = "Команда ожидает 1 аргумент: <key>"
 
 TOKEN_GENERATED = "Токен: {} был зарегистрирован."
 
+GENERATE_KEYS_ARGS = "Команда ожидает 1 аргумент: <count> от 1 до {}."
+
+TOKENS_GENERATED = "Сгенерировано токенов: {}."
+
 APPLICATION_UNAVAILABLE = "Приложение: {}, url: {} недоступно!"
 
+ALERT_DIGEST_HEADER = "Сводка уведомлений о недоступности ({}):"
+
+ADS_URL_UNAVAILABLE = "Рекламная ссылка приложения: {}, ads_url: {} недоступна!"
+
+CERTIFICATE_EXPIRES = "Сертификат приложения: {}, url: {} истекает {:%d.%m.%Y} (осталось дней: {})."
+
 BROADCAST_ARGS = "Команда ожидает 1 аргумент:: message."
 
 STATUS_APPLICATION = "Приложение: {}. Ссылка - {}."
 
+STATUS_PROBE_TIMINGS = "\nПоследняя проверка: {}. DNS - {} мс, соединение - {} мс, TLS - {} мс, TTFB - {} мс, всего - {} мс."
+
 REMOVE_APPLICATION = "Приложение: {} было удалено."
 
 INCORRECT_TOKEN = "Некорректный токен. Проверьте правильность ввода или попросите администратора сгененировать новый."
@@ -58,6 +83,66 @@ NAME_LENGTH_MESSAGE = "Длина имени приложения не може
 
 URL_LENGTH_MESSAGE = "Длина url не может превышать {}"
 
+APPLICATION_FIELDS_MESSAGE = "Поля url, name и ads_url обязательны."
+
+APPLICATION_FIELDS_TYPE_MESSAGE = "Поля url, name и ads_url должны быть строками."
+
+SET_CHECK_ARGS = "Команда ожидает аргументы: <url> [проверки в JSON]. Без JSON проверки сбрасываются."
+
+ASSERTIONS_FORMAT = "Проверки задаются JSON-объектом с ключами: expected_content (строка), content_is_regex (true/false), max_body_size (байты), expected_headers (объект заголовок - подстрока), latency_slo (секунды)."
+
+ASSERTIONS_REGEX = "Некорректное регулярное выражение: {}"
+
+EXPECTED_CONTENT_LENGTH_MESSAGE = "Длина ожидаемого содержимого не может превышать {}"
+
+EXPECTED_HEADERS_LIMIT_MESSAGE = "Можно задать не больше {} ожидаемых заголовков, длина имени и значения не может превышать {}"
+
+ASSERTIONS_SET = "Проверки приложения {} обновлены."
+
+ASSERTION_HEADER_MISMATCH = "заголовок {} не соответствует ожидаемому"
+
+ASSERTION_BODY_TOO_LARGE = "размер ответа превышает {} байт"
+
+ASSERTION_CONTENT_NOT_FOUND = "ожидаемое содержимое не найдено в первых {} байтах ответа"
+
+STATUS_ADS_URL = "\nПоследняя проверка ads_url: {}."
+
+PROBE_TIMEOUT_ERROR = "Нет ответа за {} с"
+
+STATUS_DEGRADED = "\nВремя ответа превышает заданный SLO."
+
+STATUS_CERTIFICATE = "\nСертификат действителен до {:%d.%m.%Y}."
+
+STATUS_AGENT_VOTES = "\nОшибку получили агентов проверки: {} из {}."
+
+IMPORT_STARTED = "Импорт начат."
+
+IMPORT_PROGRESS = "Обработано строк: {}, ошибок: {}."
+
+IMPORT_FINISHED = "Импорт завершен. Обработано строк: {}, ошибок: {}."
+
+IMPORT_ERROR_LINE = "Строка {}: {}"
+
+IMPORT_UNSUPPORTED_FORMAT = "Поддерживаются только файлы .csv и .jsonl."
+
+IMPORT_READ_ERROR = "Не удалось прочитать файл: {}. Обработано строк: {}, ошибок: {}."
+
+EXPORT_ARGS = "Команда ожидает 0 аргументов или формат: csv, jsonl."
+
+EXPORT_FINISHED = "Выгружено приложений: {}."
+
+LOOP_STATS_ARGS = "Команда ожидает 0 аргументов или flamegraph."
+
+LOOP_STATS_MESSAGE = "Задержка цикла событий: текущая - {} мс, максимальная - {} мс.\n\nМедленные участки:\n{}\n\nВремя обработчиков на цикле:\n{}"
+
+LOOP_STATS_SLOW_CALLBACK = "{} - {} раз, всего {} мс, максимум {} мс"
+
+LOOP_STATS_HANDLER = "{} - {} мс"
+
+LOOP_STATS_EMPTY = "нет данных"
+
+FLAMEGRAPH_WRITTEN = "Записано стеков: {}."
+
 SECRET_REPLY = "Был сгенерирован пользователь сразу с правами администратора. Этот костыль необходим для удобной проверки ТЗ."
 
 # FILTERS
@@ -67,10 +152,20 @@ GET_LAUNCH_LINKS_FILTERS = ["Сформировать ссылку для зап
 
 FAQ_FILTERS = ["FAQ"]
 
+# CALLBACKS
+SUBSCRIBE_CALLBACK = "sub"
+
+UNSUBSCRIBE_CALLBACK = "unsub"
+
 # INTEGERS
 INTERVAL_DEFAULT_VALUE = 120
 
-REPEATING_JOB_FIRST_VALUE = 0
+MIN_INTERVAL_VALUE = 10
+
+MAX_INTERVAL_VALUE = 86400
+
+# Как часто планировщик ищет приложения, время проверки которых наступило.
+SCHEDULER_TICK = 5
 
 HTTP_200_OK = 200
 
@@ -78,11 +173,167 @@ MINIMAL_FAILURE_COUNTER_VALUE = 3
 
 MAX_TOKEN_LENGTH = 16
 
+# token_urlsafe кодирует 12 байт ровно в MAX_TOKEN_LENGTH символов.
+GENERATED_TOKEN_BYTES = 12
+
+MAX_GENERATED_TOKENS = 10000
+
 MAX_URL_LENGTH = 256
 
 MAX_NAME_LENGTH = 150
 
 MAX_ADS_URL_LENGTH = 256
 
+MAX_SETTING_KEY_LENGTH = 64
+
+# Ответ DNS кэшируется на TTL записей, но не дольше DNS_CACHE_TTL и не
+# меньше DNS_MIN_CACHE_TTL секунд.
+DNS_CACHE_TTL = 300
+
+DNS_MIN_CACHE_TTL = 5
+
+DNS_NEGATIVE_CACHE_TTL = 30
+
+DNS_PREFETCH_THRESHOLD = 30
+
+METRICS_PORT = 8000
+
+PROBE_LOG_SAMPLE_RATE = 0.1
+
+# Погашенные токены хранятся TOKEN_RETENTION_DAYS дней и удаляются
+# пачками задачей, которая запускается раз в RETENTION_JOB_INTERVAL секунд.
+TOKEN_RETENTION_DAYS = 30
+
+RETENTION_JOB_INTERVAL = 86400
+
+RETENTION_BATCH_SIZE = 500
+
+RETENTION_BATCH_PAUSE = 0.1
+
+RETENTION_LOCK_TIMEOUT = "1s"
+
+# Секунды между проверками отставания реплики и допустимое отставание.
+REPLICA_LAG_CHECK_INTERVAL = 5
+
+REPLICA_MAX_LAG = 10
+
+LOOP_MONITOR_INTERVAL = 0.1
+
+SLOW_CALLBACK_THRESHOLD = 0.5
+
+PROFILER_SAMPLE_INTERVAL = 0.02
+
+PROFILER_MAX_STACKS = 5000
+
+LOOP_STATS_TOP = 5
+
+IMPORT_BATCH_SIZE = 500
+
+EXPORT_BATCH_SIZE = 1000
+
+IMPORT_MAX_REPORTED_ERRORS = 10
+
+CATALOGUE_RECONNECT_DELAY = 5
+
+# Содержимое входит в уведомление NOTIFY, размер которого ограничен 8000 байт.
+MAX_EXPECTED_CONTENT_LENGTH = 1024
+
+# Заголовки тоже входят в уведомление: не больше 8 пар имя - подстрока,
+# каждая строка не длиннее MAX_EXPECTED_HEADER_LENGTH.
+MAX_EXPECTED_HEADERS = 8
+
+MAX_EXPECTED_HEADER_LENGTH = 256
+
+PROBE_CHUNK_SIZE = 16 * 1024
+
+PROBE_MAX_BODY_SIZE = 1024 * 1024
+
+PROBE_REGEX_WINDOW = 64 * 1024
+
+PROBE_CONCURRENCY = 20
+
+# Предельное время одной проверки в секундах, включая чтение тела.
+PROBE_TIMEOUT = 15
+
+# Секунды, в течение которых разобранный сертификат хоста не перечитывается.
+CERT_CACHE_TTL = 3600
+
+CERT_EXPIRY_ALERT_DAYS = int(os.getenv("CERT_EXPIRY_ALERT_DAYS", default="14"))
+
+# Секунды, в течение которых результат агента участвует в кворуме.
+PROBE_QUORUM_WINDOW = 60
+
+# Предельное время ответа процесса агента на пачку проверок в секундах.
+PROBE_AGENT_TIMEOUT = 300
+
+# Секунды, в течение которых уведомления копятся в одну сводку.
+ALERT_GROUPING_WINDOW = 30
+
+# Ограничение Telegram на длину текста сообщения.
+MAX_MESSAGE_LENGTH = 4096
+
+TELEGRAM_POOL_SIZE = 64
+
+TELEGRAM_POOL_TIMEOUT = 5
+
+# Лимит Bot API на рассылку сообщений в разные чаты.
+TELEGRAM_MESSAGES_PER_SECOND = 30
+
+OUTBOX_COALESCE_DELAY = 0.05
+
+# RATE LIMITS
+# Команда: (токенов в секунду, максимум запросов подряд).
+RATE_LIMITS = {
+    "status": (0.2, 3),
+    "getlauchlinks": (0.2, 3),
+    "button_click": (1, 5),
+    "subscription": (1, 5),
+    "faq": (0.5, 3),
+    "import": (0.05, 2),
+    "export": (0.05, 2),
+}
+
+RATE_LIMIT_DEFAULT = (1, 5)
+
+RATE_LIMIT_MAX_BUCKETS = 10000
+
+# Команды без обработчика делят одну корзину пользователя.
+RATE_LIMIT_UNKNOWN_COMMAND = "unknown"
+
+# Полный обход корзин при переполнении - не чаще раза в интервал (с).
+RATE_LIMIT_PRUNE_INTERVAL = 60
+
+# FLAGS
+PROBE_ADS_URL = os.getenv("PROBE_ADS_URL", default="false").lower() == "true"
+
+# FILES
+FLAMEGRAPH_PATH = "flamegraph.folded"
+
+# NETWORK
+# /metrics без аутентификации, поэтому по умолчанию доступен только локально.
+METRICS_HOST = os.getenv("METRICS_HOST", default="127.0.0.1")
+
+# Ключ общего интервала проверки в таблице setting.
+INTERVAL_SETTING = "check_interval"
+
+# Агент проверки, если PROBE_AGENTS не задан.
+DEFAULT_PROBE_AGENT = "local"
+
+# JSON-список агентов: [{"name": ..., "local_addr": ..., "nameservers": [...]}].
+PROBE_AGENTS = os.getenv("PROBE_AGENTS")
+
+# Сколько агентов должны получить ошибку, по умолчанию большинство.
+PROBE_QUORUM = int(os.getenv("PROBE_QUORUM", default="0")) or None
+
+# Канал NOTIFY триггера таблицы application, см. миграцию d91f6b2e7c34.
+CATALOGUE_CHANNEL = "application_changes"
+
 # SECRETS
+DB_URL = os.getenv("DB_URL")
+
+# Необязательная реплика только для чтения.
+REPLICA_DB_URL = os.getenv("REPLICA_DB_URL")
+
+BOT_TOKEN = os.getenv("BOT_TOKEN")
+
 SECRET_ADMIN_TOKEN = os.getenv("SECRET_ADMIN_TOKEN", default="SECRET_ADMIN_TOKEN")
@@ -1,12 +1,72 @@
-from telegram import KeyboardButton, ReplyKeyboardMarkup
+from telegram import (
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    KeyboardButton,
+    ReplyKeyboardMarkup,
+)
 
+from bot import constants
 
-def build_keyboard():
-    keyboard = [
+
+class _PrebuiltMarkup:
+    """Разметка, сериализованная один раз при создании.
+
+    Объекты разметки PTB неизменяемы, поэтому результат to_dict можно
+    вычислить заранее и отдавать при каждой отправке без обхода кнопок.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        with self._unfrozen():
+            self._payload = super().to_dict()
+
+    def to_dict(self, recursive: bool = True) -> dict:
+        if not recursive:
+            return super().to_dict(recursive)
+        return self._payload
+
+
+class PrebuiltReplyKeyboardMarkup(_PrebuiltMarkup, ReplyKeyboardMarkup):
+    __slots__ = ("_payload",)
+
+
+class PrebuiltInlineKeyboardMarkup(_PrebuiltMarkup, InlineKeyboardMarkup):
+    __slots__ = ("_payload",)
+
+
+MAIN_KEYBOARD = PrebuiltReplyKeyboardMarkup(
+    [
         [
             KeyboardButton("Список приложений"),
             KeyboardButton("Сформировать ссылку для запуска"),
             KeyboardButton("FAQ"),
         ]
     ]
-    return ReplyKeyboardMarkup(keyboard)
+)
+
+
+def build_keyboard():
+    return MAIN_KEYBOARD
+
+
+def build_launch_links_keyboard(applications) -> PrebuiltInlineKeyboardMarkup:
+    # Кнопки подписки одинаковы для всех пользователей, поэтому разметку
+    # по-прежнему можно строить один раз на версию каталога.
+    return PrebuiltInlineKeyboardMarkup(
+        [
+            [
+                InlineKeyboardButton(app.name, callback_data=str(app.id)),
+                InlineKeyboardButton(
+                    "Подписаться",
+                    callback_data=f"{constants.SUBSCRIBE_CALLBACK}:{app.id}",
+                ),
+                InlineKeyboardButton(
+                    "Отписаться",
+                    callback_data=f"{constants.UNSUBSCRIBE_CALLBACK}:{app.id}",
+                ),
+            ]
+            for app in applications
+        ]
+    )
@@ -0,0 +1,63 @@
+import importlib.util
+import time
+from typing import Optional, Tuple
+
+from telegram.request import HTTPXRequest, RequestData
+
+from bot import constants
+from core.metrics import telegram_api_errors, telegram_api_latency
+
+
+class InstrumentedRequest(HTTPXRequest):
+    """HTTPXRequest, записывающий время и ошибки вызовов Bot API в метрики."""
+
+    async def do_request(
+        self,
+        url: str,
+        method: str,
+        request_data: Optional[RequestData] = None,
+        read_timeout=HTTPXRequest.DEFAULT_NONE,
+        write_timeout=HTTPXRequest.DEFAULT_NONE,
+        connect_timeout=HTTPXRequest.DEFAULT_NONE,
+        pool_timeout=HTTPXRequest.DEFAULT_NONE,
+    ) -> Tuple[int, bytes]:
+        api_method = url.rsplit("/", 1)[-1]
+        started = time.perf_counter()
+        try:
+            code, payload = await super().do_request(
+                url,
+                method,
+                request_data,
+                read_timeout,
+                write_timeout,
+                connect_timeout,
+                pool_timeout,
+            )
+        except Exception:
+            telegram_api_errors.inc(method=api_method)
+            raise
+        finally:
+            telegram_api_latency.observe(
+                time.perf_counter() - started, method=api_method
+            )
+        if code >= 400:
+            telegram_api_errors.inc(method=api_method)
+        return code, payload
+
+
+def create_bot_request() -> InstrumentedRequest:
+    """Создает общий пул соединений для вызовов Bot API.
+
+    Пул рассчитан на конкурентную отправку сообщений. HTTP/2
+    используется, если установлен пакет h2: все запросы тогда идут
+    мультиплексированными потоками через одно соединение.
+
+    Returns:
+        InstrumentedRequest: Объект запросов для Application.builder().request().
+    """
+    http2 = importlib.util.find_spec("h2") is not None
+    return InstrumentedRequest(
+        connection_pool_size=constants.TELEGRAM_POOL_SIZE,
+        pool_timeout=constants.TELEGRAM_POOL_TIMEOUT,
+        http_version="2" if http2 else "1.1",
+    )
@@ -0,0 +1,127 @@
+import ssl
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Collection, Dict, Optional, Tuple
+
+from bot import constants
+from core.metrics import certificate_expiry
+
+
+@dataclass(frozen=True)
+class CertificateInfo:
+    """Данные сертификата, полученные при TLS-рукопожатии проверки."""
+
+    host: str
+    subject: str
+    issuer: str
+    not_after: datetime
+
+    def days_left(self, now: Optional[datetime] = None) -> int:
+        now = now or datetime.now(timezone.utc)
+        return (self.not_after - now).days
+
+
+def _name(fields) -> str:
+    attributes = dict(item for entry in fields for item in entry)
+    return attributes.get("commonName") or attributes.get("organizationName", "")
+
+
+class CertificateCache:
+    """Сертификаты хостов, извлеченные из соединений проверок.
+
+    TimingConnector передает сюда каждое новое TLS-соединение проверки,
+    поэтому отдельных подключений не требуется. Разобранный сертификат
+    хоста хранится ttl секунд, и до истечения срока соединения этого
+    хоста повторно не разбираются.
+    """
+
+    def __init__(self, ttl: float = constants.CERT_CACHE_TTL):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, CertificateInfo]] = {}
+        # Срок действия сертификата, о котором уже уведомили, по хосту.
+        self._alerted: Dict[str, datetime] = {}
+
+    def observe(self, host: str, transport) -> None:
+        """Разбирает сертификат нового соединения, если кэш хоста устарел.
+
+        Args:
+            host (str): Имя хоста, к которому открыто соединение.
+            transport: Транспорт установленного TLS-соединения.
+        """
+        entry = self._entries.get(host)
+        if entry is not None and entry[0] > time.monotonic():
+            return
+        ssl_object = transport.get_extra_info("ssl_object")
+        if ssl_object is None:
+            return
+        # Без проверки сертификата getpeercert возвращает пустой словарь.
+        certificate = ssl_object.getpeercert()
+        if not certificate:
+            return
+        info = CertificateInfo(
+            host,
+            _name(certificate.get("subject", ())),
+            _name(certificate.get("issuer", ())),
+            datetime.fromtimestamp(
+                ssl.cert_time_to_seconds(certificate["notAfter"]), timezone.utc
+            ),
+        )
+        self._entries[host] = (time.monotonic() + self.ttl, info)
+        certificate_expiry.set(info.not_after.timestamp(), host=host)
+
+    def get(self, host: str) -> Optional[CertificateInfo]:
+        entry = self._entries.get(host)
+        return entry[1] if entry is not None else None
+
+    def should_alert(
+        self,
+        info: CertificateInfo,
+        days: int = constants.CERT_EXPIRY_ALERT_DAYS,
+    ) -> bool:
+        """Сообщает, нужно ли уведомить об истечении сертификата.
+
+        Об одном и том же сертификате уведомление отправляется один раз.
+        Для хоста хранится только последний сертификат, о котором
+        уведомили, поэтому новый сертификат хоста уведомляет снова.
+
+        Args:
+            info (CertificateInfo): Сертификат хоста.
+            days (int): За сколько дней до истечения уведомлять.
+
+        Returns:
+            bool: True при первом обращении в пределах days до истечения.
+        """
+        if info.days_left() > days:
+            return False
+        if self._alerted.get(info.host) == info.not_after:
+            return False
+        self._alerted[info.host] = info.not_after
+        return True
+
+    def prune(
+        self, hosts: Collection[str], now: Optional[datetime] = None
+    ) -> int:
+        """Забывает истекшие сертификаты и хосты, которых нет в каталоге.
+
+        Args:
+            hosts (Collection[str]): Хосты приложений каталога.
+            now (Optional[datetime]): Текущее время.
+
+        Returns:
+            int: Количество удаленных уведомлений.
+        """
+        now = now or datetime.now(timezone.utc)
+        stale = [
+            host
+            for host, not_after in self._alerted.items()
+            if host not in hosts or not_after <= now
+        ]
+        for host in stale:
+            del self._alerted[host]
+        for host in [host for host in self._entries if host not in hosts]:
+            del self._entries[host]
+        return len(stale)
+
+
+certificate_cache = CertificateCache()
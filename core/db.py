@@ -1,22 +1,23 @@
-import os
-from typing import Generator
+from typing import Dict, Generator, Optional
 
-from dotenv import load_dotenv
-from sqlalchemy import Column, Integer
+from sqlalchemy import Column, Integer, Select
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
 from sqlalchemy.orm import (
     Mapped,
+    Session,
     declarative_base,
     declared_attr,
     mapped_column,
     sessionmaker,
 )
 
-load_dotenv()
+from bot import constants
+from core.replica import replica_monitor
 
 
 class PreBase:
@@ -28,14 +29,91 @@ class PreBase:
 
 
 Base = declarative_base(cls=PreBase)
-engine = create_async_engine(os.getenv("DB_URL"))
-session_maker = async_sessionmaker(
-    bind=engine, class_=AsyncSession, expire_on_commit=False
-)
+
+_engine: Optional[AsyncEngine] = None
+_replica_engine: Optional[AsyncEngine] = None
+_session_makers: Dict[bool, async_sessionmaker] = {}
+
+
+def get_engine() -> AsyncEngine:
+    """Возвращает движок БД, создавая его при первом обращении.
+
+    Импорт моделей и сервисов не требует DB_URL и не загружает драйвер,
+    пока процессу действительно не понадобится соединение.
+
+    Returns:
+        AsyncEngine: Общий для процесса движок.
+    """
+    global _engine
+    if _engine is None:
+        _engine = create_async_engine(constants.DB_URL)
+    return _engine
+
+
+def get_replica_engine() -> Optional[AsyncEngine]:
+    """Возвращает движок реплики или None, если REPLICA_DB_URL не задан.
+
+    Returns:
+        Optional[AsyncEngine]: Общий для процесса движок реплики.
+    """
+    global _replica_engine
+    if _replica_engine is None and constants.REPLICA_DB_URL:
+        _replica_engine = create_async_engine(constants.REPLICA_DB_URL)
+    return _replica_engine
+
+
+class RoutingSession(Session):
+    """Сессия, читающая с реплики и пишущая в primary.
+
+    На реплику уходят только SELECT без FOR UPDATE и только пока
+    replica_monitor считает ее отставание допустимым. После первой
+    записи сессия до конца работает с primary, чтобы читать свои
+    изменения.
+    """
+
+    _wrote = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (
+            not self._wrote
+            and not self._flushing
+            and isinstance(clause, Select)
+            and clause._for_update_arg is None
+            and replica_monitor.usable
+        ):
+            return get_replica_engine().sync_engine
+        if not isinstance(clause, Select):
+            self._wrote = True
+        return get_engine().sync_engine
+
+
+def get_session_maker(primary: bool = False) -> async_sessionmaker:
+    """Возвращает фабрику сессий, создавая ее при первом обращении.
+
+    Args:
+        primary (bool, optional): Все запросы только к primary, например
+            для чтения, которое должно видеть последние изменения.
+
+    Returns:
+        async_sessionmaker: Фабрика сессий.
+    """
+    primary = primary or get_replica_engine() is None
+    if primary not in _session_makers:
+        if primary:
+            _session_makers[primary] = async_sessionmaker(
+                bind=get_engine(), class_=AsyncSession, expire_on_commit=False
+            )
+        else:
+            _session_makers[primary] = async_sessionmaker(
+                class_=AsyncSession,
+                sync_session_class=RoutingSession,
+                expire_on_commit=False,
+            )
+    return _session_makers[primary]
 
 
 async def get_async_session():
-    async with session_maker() as async_session:
+    async with get_session_maker()() as async_session:
         yield async_session
 
 
@@ -0,0 +1,131 @@
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from bot import constants
+
+correlation_id: ContextVar[str] = ContextVar("correlation_id", default="-")
+
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {
+    "message",
+    "correlation_id",
+}
+
+
+def bind_correlation_id(value: str = None) -> str:
+    """Устанавливает идентификатор корреляции для текущего контекста.
+
+    Args:
+        value (str, optional): Идентификатор. По умолчанию генерируется новый.
+
+    Returns:
+        str: Установленный идентификатор.
+    """
+    value = value or uuid.uuid4().hex[:12]
+    correlation_id.set(value)
+    return value
+
+
+class CorrelationIdFilter(logging.Filter):
+    """Добавляет в запись идентификатор корреляции текущего контекста.
+
+    Фильтр выполняется в потоке, вызвавшем логгер, поэтому видит
+    контекстную переменную обработчика или задачи.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.correlation_id = correlation_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает только долю записей ниже уровня WARNING."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматирует запись в одну строку JSON.
+
+    Поля, переданные через extra, попадают в вывод как есть.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "correlation_id": getattr(record, "correlation_id", "-"),
+        }
+        payload.update(
+            (key, value)
+            for key, value in vars(record).items()
+            if key not in _RECORD_ATTRIBUTES
+        )
+        if record.exc_text:
+            payload["exc_info"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class _StructuredQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # В отличие от QueueHandler.prepare не склеивает запись в строку,
+        # чтобы поля extra дошли до JsonFormatter в потоке слушателя.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info
+            )
+            record.exc_info = None
+        return record
+
+
+def setup_logging(level: int = logging.INFO) -> QueueListener:
+    """Настраивает неблокирующее JSON-логирование через очередь.
+
+    Записи попадают в неограниченную очередь, а запись в stdout
+    выполняет отдельный поток QueueListener, поэтому цикл событий
+    не ждет ввода-вывода логов.
+
+    Args:
+        level (int): Уровень корневого логгера.
+
+    Returns:
+        QueueListener: Запущенный слушатель, который нужно остановить при выходе.
+    """
+    log_queue = queue.SimpleQueue()
+    queue_handler = _StructuredQueueHandler(log_queue)
+    queue_handler.addFilter(CorrelationIdFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level)
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+    listener = QueueListener(
+        log_queue, stream_handler, respect_handler_level=True
+    )
+    listener.start()
+
+    logging.getLogger("BOT.probe").addFilter(
+        SamplingFilter(constants.PROBE_LOG_SAMPLE_RATE)
+    )
+    # Каждый запрос httpx к Bot API пишет строку уровня INFO.
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    return listener
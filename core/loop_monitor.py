@@ -0,0 +1,215 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from bot import constants
+from core.metrics import loop_lag, slow_callbacks
+
+BOT_DIR = os.path.dirname(os.path.abspath(constants.__file__))
+
+
+@dataclass
+class SlowCallback:
+    """Агрегированная информация о месте, блокировавшем цикл событий."""
+
+    location: str
+    stack: str
+    count: int = 0
+    total_duration: float = 0.0
+    max_duration: float = 0.0
+
+
+def _extract_stack(frame) -> List[Tuple[str, int, str]]:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((code.co_filename, frame.f_lineno, code.co_name))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _frame_label(filename: str, lineno: int, name: str) -> str:
+    return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+
+class LoopMonitor:
+    """Наблюдает за здоровьем цикла событий из отдельного потока.
+
+    Цикл событий раз в interval отмечает heartbeat и измеряет задержку
+    своего пробуждения. Поток-наблюдатель раз в sample_interval снимает
+    стек потока цикла: если heartbeat не обновлялся дольше
+    slow_threshold, стек записывается как медленный участок, а каждый
+    снимок занятого цикла засчитывается обработчику из bot/ и
+    сохраняется в свернутом виде для flamegraph.
+    """
+
+    def __init__(
+        self,
+        interval: float = constants.LOOP_MONITOR_INTERVAL,
+        slow_threshold: float = constants.SLOW_CALLBACK_THRESHOLD,
+        sample_interval: float = constants.PROFILER_SAMPLE_INTERVAL,
+        max_stacks: int = constants.PROFILER_MAX_STACKS,
+    ):
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.sample_interval = sample_interval
+        self.max_stacks = max_stacks
+        self.max_lag = 0.0
+        self.current_lag = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._loop_thread_id: Optional[int] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._expected = 0.0
+        self._last_beat = 0.0
+        self._handler_samples: Counter = Counter()
+        self._folded_stacks: Counter = Counter()
+        self._slow: Dict[str, SlowCallback] = {}
+
+    def start(self) -> None:
+        """Запускает наблюдение. Вызывается из потока цикла событий."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._expected = self._loop.time() + self.interval
+        self._loop.call_later(self.interval, self._heartbeat)
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="loop-monitor", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _heartbeat(self) -> None:
+        now = self._loop.time()
+        self.current_lag = max(now - self._expected, 0.0)
+        self.max_lag = max(self.max_lag, self.current_lag)
+        loop_lag.set(self.current_lag)
+        self._last_beat = time.monotonic()
+        if not self._stop.is_set():
+            self._expected = now + self.interval
+            self._loop.call_later(self.interval, self._heartbeat)
+
+    def _run(self) -> None:
+        stalled_since = None
+        stall_key = None
+        while not self._stop.wait(self.sample_interval):
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            last_beat = self._last_beat
+            # Цикл простаивает в select() - снимок ничего не говорит о нагрузке.
+            if not frame.f_code.co_filename.endswith("selectors.py"):
+                self._sample(_extract_stack(frame))
+
+            blocked_for = time.monotonic() - last_beat - self.interval
+            if blocked_for > self.slow_threshold and stalled_since is None:
+                stalled_since = last_beat
+                stall_key = self._record_stall(_extract_stack(frame))
+            elif stalled_since is not None and last_beat != stalled_since:
+                self._finish_stall(
+                    stall_key, last_beat - stalled_since - self.interval
+                )
+                stalled_since = None
+            del frame
+
+    def _sample(self, stack: List[Tuple[str, int, str]]) -> None:
+        # Обработчик - самый глубокий кадр bot/: внешние кадры того же
+        # каталога (<module>, main) есть в каждом снимке.
+        handler = next(
+            (
+                name
+                for filename, _, name in reversed(stack)
+                if filename.startswith(BOT_DIR)
+            ),
+            None,
+        )
+        folded = ";".join(_frame_label(*entry) for entry in stack)
+        with self._lock:
+            if handler is not None:
+                self._handler_samples[handler] += 1
+            if (
+                folded in self._folded_stacks
+                or len(self._folded_stacks) < self.max_stacks
+            ):
+                self._folded_stacks[folded] += 1
+
+    def _record_stall(self, stack: List[Tuple[str, int, str]]) -> str:
+        # Место блокировки - самый глубокий кадр кода проекта, если он есть.
+        project_dir = os.path.dirname(BOT_DIR)
+        innermost = next(
+            (
+                entry
+                for entry in reversed(stack)
+                if entry[0].startswith(project_dir)
+            ),
+            stack[-1],
+        )
+        key = _frame_label(*innermost)
+        with self._lock:
+            if key not in self._slow:
+                self._slow[key] = SlowCallback(
+                    key, "\n".join(_frame_label(*entry) for entry in stack)
+                )
+            self._slow[key].count += 1
+        slow_callbacks.inc()
+        return key
+
+    def _finish_stall(self, key: str, duration: float) -> None:
+        with self._lock:
+            slow = self._slow[key]
+            slow.total_duration += duration
+            slow.max_duration = max(slow.max_duration, duration)
+
+    def top_slow_callbacks(self, limit: int) -> List[SlowCallback]:
+        with self._lock:
+            return sorted(
+                self._slow.values(),
+                key=lambda slow: slow.total_duration,
+                reverse=True,
+            )[:limit]
+
+    def top_handlers(self, limit: int) -> List[Tuple[str, float]]:
+        """Возвращает обработчики с наибольшим временем работы на цикле.
+
+        Args:
+            limit (int): Количество обработчиков.
+
+        Returns:
+            List[Tuple[str, float]]: Имя обработчика и оценка времени в секундах.
+        """
+        with self._lock:
+            return [
+                (name, samples * self.sample_interval)
+                for name, samples in self._handler_samples.most_common(limit)
+            ]
+
+    def write_flamegraph(self, path: str) -> int:
+        """Записывает снимки стеков в свернутом формате flamegraph.pl.
+
+        Args:
+            path (str): Путь к файлу.
+
+        Returns:
+            int: Количество записанных уникальных стеков.
+        """
+        with self._lock:
+            stacks = list(self._folded_stacks.items())
+        with open(path, "w", encoding="utf-8") as file:
+            for folded, samples in stacks:
+                file.write(f"{folded} {samples}\n")
+        return len(stacks)
+
+
+loop_monitor = LoopMonitor()
@@ -0,0 +1,319 @@
+import functools
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from bot import constants
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+
+def _escape(value: str) -> str:
+    """Экранирует значение метки по правилам текстового формата Prometheus."""
+    return (
+        value.replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+class _Metric:
+    """Базовая метрика с набором меток.
+
+    Метрики изменяются только из цикла событий бота, поэтому обходятся
+    без блокировок: запись значения - это одна операция со словарем.
+    """
+
+    type = ""
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Вычисляет значение метрики без меток в момент сбора.
+
+        Args:
+            function (Callable[[], float]): Функция, возвращающая значение.
+        """
+        self._function = function
+
+    def _format_labels(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [
+            f'{name}="{_escape(value)}"'
+            for name, value in zip(self.labelnames, key)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def samples(self) -> List[str]:
+        if self._function is not None:
+            return [f"{self.name} {self._function()}"]
+        return [
+            f"{self.name}{self._format_labels(key)} {value}"
+            for key, value in self._values.items()
+        ]
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # Для каждого набора меток: счетчики по корзинам (последняя - +Inf),
+        # сумма и количество наблюдений.
+        self._observations: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        state = self._observations.get(key)
+        if state is None:
+            state = self._observations[key] = [
+                [0] * (len(self.buckets) + 1),
+                0.0,
+                0,
+            ]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in self._observations.items():
+            cumulative = 0
+            for bound, bucket_count in zip(
+                self.buckets + (float("inf"),), counts
+            ):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = self._format_labels(key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Реестр метрик процесса, отдаваемых в текстовом формате Prometheus."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames=(),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(
+            Histogram(name, documentation, labelnames, buckets)
+        )
+
+    def render(self) -> str:
+        return (
+            "\n".join(metric.render() for metric in self._metrics.values())
+            + "\n"
+        )
+
+
+def timed(histogram: Histogram, **labels: str):
+    """Декоратор, записывающий время выполнения корутины в гистограмму.
+
+    Args:
+        histogram (Histogram): Гистограмма для записи длительности.
+        **labels: Значения меток гистограммы.
+
+    Returns:
+        Callable: Декоратор для асинхронной функции.
+    """
+
+    def decorator(function):
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await function(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started, **labels)
+
+        return wrapper
+
+    return decorator
+
+
+async def start_metrics_server(
+    host: str = constants.METRICS_HOST, port: int = constants.METRICS_PORT
+) -> "web.AppRunner":
+    """Запускает HTTP-сервер, отдающий метрики по адресу /metrics.
+
+    Args:
+        host (str): Адрес для прослушивания.
+        port (int): Порт для прослушивания.
+
+    Returns:
+        web.AppRunner: Запущенный сервер, который нужно остановить через cleanup().
+    """
+    # Серверная часть aiohttp нужна только здесь и не замедляет импорт.
+    from aiohttp import web
+
+    async def handle_metrics(request: web.Request) -> web.Response:
+        return web.Response(
+            text=registry.render(), content_type="text/plain", charset="utf-8"
+        )
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+registry = MetricsRegistry()
+
+handler_latency = registry.histogram(
+    "bot_handler_latency_seconds",
+    "Время обработки обновления по командам",
+    ["command"],
+)
+sweep_duration = registry.histogram(
+    "bot_sweep_duration_seconds", "Длительность проверки всех приложений"
+)
+probes_in_flight = registry.gauge(
+    "bot_probes_in_flight", "Количество выполняющихся проверок приложений"
+)
+db_pool_checked_out = registry.gauge(
+    "bot_db_pool_checked_out", "Количество занятых соединений пула БД"
+)
+telegram_api_latency = registry.histogram(
+    "bot_telegram_api_latency_seconds",
+    "Время вызова методов Telegram Bot API",
+    ["method"],
+)
+telegram_api_errors = registry.counter(
+    "bot_telegram_api_errors_total",
+    "Количество ошибок вызовов Telegram Bot API",
+    ["method"],
+)
+outbox_depth = registry.gauge(
+    "bot_outbox_depth", "Количество сообщений, ожидающих отправки"
+)
+dns_lookups = registry.counter(
+    "bot_dns_lookups_total",
+    "Обращения к DNS-кэшу по результату",
+    ["result"],
+)
+dns_resolution_latency = registry.histogram(
+    "bot_dns_resolution_seconds", "Время разрешения имени при промахе кэша"
+)
+dns_failures = registry.counter(
+    "bot_dns_failures_total", "Количество ошибок разрешения имен"
+)
+loop_lag = registry.gauge(
+    "bot_event_loop_lag_seconds", "Задержка пробуждения цикла событий"
+)
+slow_callbacks = registry.counter(
+    "bot_slow_callbacks_total",
+    "Количество блокировок цикла событий дольше порога",
+)
+probes_coalesced = registry.counter(
+    "bot_probes_coalesced_total",
+    "Проверки, получившие результат другой проверки того же адреса",
+    ["source"],
+)
+updates_dropped = registry.counter(
+    "bot_updates_dropped_total",
+    "Обновления, отброшенные ограничением частоты команд",
+    ["command"],
+)
+messages_coalesced = registry.counter(
+    "bot_messages_coalesced_total",
+    "Сообщения, отправленные в составе объединенного сообщения в тот же чат",
+)
+replica_lag = registry.gauge(
+    "bot_db_replica_lag_seconds", "Отставание реплики БД от primary"
+)
+replica_reads_enabled = registry.gauge(
+    "bot_db_replica_reads_enabled", "1, если чтение идет с реплики БД"
+)
+rows_purged = registry.counter(
+    "bot_retention_rows_purged_total",
+    "Строки, удаленные задачей очистки",
+    ["table"],
+)
+bytes_purged = registry.counter(
+    "bot_retention_bytes_purged_total",
+    "Размер строк, удаленных задачей очистки",
+    ["table"],
+)
+probe_unconfirmed_failures = registry.counter(
+    "bot_probe_unconfirmed_failures_total",
+    "Ошибки проверки агента, не подтвержденные кворумом агентов",
+    ["agent"],
+)
+certificate_expiry = registry.gauge(
+    "bot_tls_certificate_expiry_timestamp_seconds",
+    "Время истечения TLS-сертификата хоста",
+    ["host"],
+)
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import os
+import re
+from typing import Set
+
+from sqlalchemy import text
+
+from core.db import get_engine
+
+logger = logging.getLogger("BOT.migrations")
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ALEMBIC_INI = os.path.join(PROJECT_DIR, "alembic.ini")
+VERSIONS_DIR = os.path.join(PROJECT_DIR, "alembic", "versions")
+
+_REVISION = re.compile(r"^revision(?:\s*:[^=]*)?\s*=\s*['\"](\w+)['\"]", re.M)
+_DOWN_REVISION = re.compile(r"^down_revision(?:\s*:[^=]*)?\s*=\s*(.+)$", re.M)
+_QUOTED = re.compile(r"['\"](\w+)['\"]")
+
+
+def head_revisions(versions_dir: str = VERSIONS_DIR) -> Set[str]:
+    """Находит head-ревизии по тексту файлов миграций.
+
+    Импорт alembic и загрузка модулей миграций стоят сотни миллисекунд,
+    а для сравнения с ревизией БД достаточно прочитать идентификаторы
+    revision и down_revision из исходников.
+
+    Args:
+        versions_dir (str): Каталог с файлами миграций.
+
+    Returns:
+        Set[str]: Ревизии, на которые не ссылается ни одна другая миграция.
+    """
+    revisions = set()
+    parents = set()
+    for name in os.listdir(versions_dir):
+        if not name.endswith(".py"):
+            continue
+        with open(os.path.join(versions_dir, name), encoding="utf-8") as file:
+            source = file.read()
+        revision = _REVISION.search(source)
+        if revision is None:
+            continue
+        revisions.add(revision.group(1))
+        down_revision = _DOWN_REVISION.search(source)
+        if down_revision is not None:
+            parents.update(_QUOTED.findall(down_revision.group(1)))
+    return revisions - parents
+
+
+async def current_revisions() -> Set[str]:
+    """Читает примененные ревизии из таблицы alembic_version.
+
+    Returns:
+        Set[str]: Ревизии БД или пустое множество для новой БД.
+    """
+    async with get_engine().connect() as connection:
+        exists = await connection.scalar(
+            text("SELECT to_regclass('alembic_version')")
+        )
+        if exists is None:
+            return set()
+        result = await connection.execute(
+            text("SELECT version_num FROM alembic_version")
+        )
+        return set(result.scalars())
+
+
+def _upgrade() -> None:
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    config.set_main_option(
+        "script_location", os.path.join(PROJECT_DIR, "alembic")
+    )
+    config.attributes["configure_logging"] = False
+    command.upgrade(config, "head")
+
+
+async def ensure_schema() -> bool:
+    """Применяет миграции, только если ревизия БД отличается от head.
+
+    Returns:
+        bool: True, если миграции были применены.
+    """
+    head = await asyncio.to_thread(head_revisions)
+    current = await current_revisions()
+    if current == head:
+        logger.info("Схема БД актуальна", extra={"revision": sorted(head)})
+        return False
+    logger.info(
+        "Применение миграций",
+        extra={"current": sorted(current), "head": sorted(head)},
+    )
+    # env.py запускает собственный цикл событий, поэтому миграции
+    # выполняются в отдельном потоке.
+    await asyncio.to_thread(_upgrade)
+    return True
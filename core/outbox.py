@@ -0,0 +1,124 @@
+import asyncio
+import logging
+from typing import Dict, List, Set, Tuple
+
+from bot import constants
+from core.metrics import messages_coalesced, outbox_depth
+
+logger = logging.getLogger("BOT.outbox")
+
+
+class _Pacer:
+    """Равномерно распределяет вызовы, не превышая rate в секунду."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self._next = 0.0
+
+    async def wait(self) -> None:
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class Outbox:
+    """Исходящие текстовые сообщения с объединением по чату.
+
+    Сообщения в один чат, поставленные в очередь в течение delay,
+    отправляются одним вызовом sendMessage, пока текст помещается в
+    ограничение Telegram. Отправки в разные чаты идут конкурентно, но
+    не чаще rate в секунду, чтобы упираться в лимит Bot API, а не
+    получать ошибки 429.
+    """
+
+    def __init__(
+        self,
+        delay: float = constants.OUTBOX_COALESCE_DELAY,
+        rate: float = constants.TELEGRAM_MESSAGES_PER_SECOND,
+        max_length: int = constants.MAX_MESSAGE_LENGTH,
+    ):
+        self.delay = delay
+        self.max_length = max_length
+        self._pacer = _Pacer(rate)
+        self._pending: Dict[int, List[Tuple[str, asyncio.Future]]] = {}
+        # Цикл событий хранит на задачи только слабые ссылки.
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def send(self, bot, chat_id: int, text: str) -> None:
+        """Ставит сообщение в очередь и ждет его доставки.
+
+        Args:
+            bot: Экземпляр Telegram Bot.
+            chat_id (int): Идентификатор чата.
+            text (str): Текст сообщения.
+
+        Raises:
+            TelegramError: Если Bot API отклонил сообщение.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.get(chat_id)
+        if batch is None:
+            batch = self._pending[chat_id] = []
+            loop.call_later(self.delay, self._flush, bot, chat_id)
+        batch.append((text, future))
+        outbox_depth.inc()
+        await future
+
+    def _flush(self, bot, chat_id: int) -> None:
+        batch = self._pending.pop(chat_id)
+        task = asyncio.ensure_future(self._deliver(bot, chat_id, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _chunks(self, batch):
+        chunk, futures = "", []
+        for text, future in batch:
+            # Текст длиннее max_length отправляется несколькими частями.
+            pieces = [
+                text[start:start + self.max_length]
+                for start in range(0, len(text), self.max_length)
+            ] or [text]
+            for piece in pieces:
+                if futures and len(chunk) + 2 + len(piece) > self.max_length:
+                    yield chunk, futures
+                    chunk, futures = "", []
+                chunk = f"{chunk}\n\n{piece}" if futures else piece
+                futures.append(future)
+        yield chunk, futures
+
+    async def _deliver(self, bot, chat_id: int, batch) -> None:
+        chunks = list(self._chunks(batch))
+        # Сообщение считается доставленным вместе с последней частью.
+        last = {
+            future: index
+            for index, (_, futures) in enumerate(chunks)
+            for future in futures
+        }
+        for index, (text, futures) in enumerate(chunks):
+            finished = [future for future in futures if last[future] == index]
+            if len(futures) > 1:
+                messages_coalesced.inc(len(futures) - 1)
+            try:
+                await self._pacer.wait()
+                await bot.send_message(chat_id=chat_id, text=text)
+            except Exception as error:
+                logger.warning(
+                    "Не удалось отправить сообщение",
+                    extra={"chat_id": chat_id, "error": str(error)},
+                )
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(error)
+            else:
+                for future in finished:
+                    if not future.done():
+                        future.set_result(None)
+            finally:
+                outbox_depth.dec(len(finished))
+
+
+outbox = Outbox()
@@ -0,0 +1,121 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from bot import constants
+from core.metrics import updates_dropped
+
+
+class TokenBucket:
+    """Корзина токенов: rate токенов в секунду, не больше burst подряд."""
+
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, burst: float, now: float):
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, rate: float, burst: float, now: float) -> bool:
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class RateLimiter:
+    """Ограничивает частоту команд каждого пользователя в памяти процесса.
+
+    Для каждой пары (пользователь, команда) хранится своя корзина, а
+    все команды, не переданные в register, делят одну корзину
+    пользователя. При росте словаря выше max_buckets не чаще раза в
+    prune_interval удаляются корзины, которые успели бы полностью
+    восстановиться, а если их не нашлось - давно не использованные,
+    поэтому память ограничена max_buckets. Время берется из clock.
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, Tuple[float, float]] = constants.RATE_LIMITS,
+        default: Tuple[float, float] = constants.RATE_LIMIT_DEFAULT,
+        max_buckets: int = constants.RATE_LIMIT_MAX_BUCKETS,
+        prune_interval: float = constants.RATE_LIMIT_PRUNE_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limits = limits
+        self.default = default
+        self.max_buckets = max_buckets
+        self.prune_interval = prune_interval
+        self.clock = clock
+        self.commands: Set[str] = set(limits)
+        self._buckets: "OrderedDict[Tuple[int, str], TokenBucket]" = OrderedDict()
+        self._pruned_at = float("-inf")
+
+    def register(self, commands: Iterable[str]) -> None:
+        """Добавляет команды, для которых заводятся отдельные корзины.
+
+        Args:
+            commands (Iterable[str]): Имена команд с обработчиками.
+        """
+        self.commands.update(commands)
+
+    def allow(self, user_id: int, command: str) -> bool:
+        """Списывает токен команды пользователя.
+
+        Args:
+            user_id (int): Идентификатор пользователя Telegram.
+            command (str): Имя команды.
+
+        Returns:
+            bool: False, если лимит исчерпан и обновление нужно отбросить.
+        """
+        if command not in self.commands:
+            command = constants.RATE_LIMIT_UNKNOWN_COMMAND
+        rate, burst = self.limits.get(command, self.default)
+        now = self.clock()
+        key = (user_id, command)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_buckets:
+                self._evict(now)
+            bucket = self._buckets[key] = TokenBucket(burst, now)
+        else:
+            self._buckets.move_to_end(key)
+        if bucket.take(rate, burst, now):
+            return True
+        updates_dropped.inc(command=command)
+        return False
+
+    def _evict(self, now: float) -> None:
+        if now - self._pruned_at >= self.prune_interval:
+            self._pruned_at = now
+            self._prune(now)
+        while len(self._buckets) >= self.max_buckets:
+            self._buckets.popitem(last=False)
+
+    def _prune(self, now: float) -> None:
+        for key, bucket in list(self._buckets.items()):
+            rate, burst = self.limits.get(key[1], self.default)
+            if bucket.tokens + (now - bucket.updated) * rate >= burst:
+                del self._buckets[key]
+
+
+rate_limiter = RateLimiter()
+
+
+def command_of(text: Optional[str]) -> Optional[str]:
+    """Возвращает имя команды из текста вида /command@bot args.
+
+    Args:
+        text (Optional[str]): Текст сообщения.
+
+    Returns:
+        Optional[str]: Имя команды или None, если текст не команда.
+    """
+    if not text or not text.startswith("/"):
+        return None
+    parts = text[1:].split(maxsplit=1)
+    if not parts:
+        return None
+    return parts[0].split("@", 1)[0].lower()
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from bot import constants
+from core.metrics import replica_lag, replica_reads_enabled
+
+logger = logging.getLogger("BOT.replica")
+
+# Когда реплика применила весь полученный WAL, отставание считается
+# нулевым: иначе при простое primary время последней транзакции растет
+# без реального отставания.
+LAG_QUERY = text(
+    "SELECT CASE "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) "
+    "END"
+)
+
+
+class ReplicaMonitor:
+    """Следит за отставанием реплики и разрешает читать с нее.
+
+    Раз в interval запрашивает отставание реплики. Пока оно не
+    превышает max_lag, RoutingSession направляет чтение на реплику,
+    иначе, а также при ошибке запроса, все запросы идут на primary.
+    """
+
+    def __init__(
+        self,
+        interval: float = constants.REPLICA_LAG_CHECK_INTERVAL,
+        max_lag: float = constants.REPLICA_MAX_LAG,
+    ):
+        self.interval = interval
+        self.max_lag = max_lag
+        self.usable = False
+        self.lag: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, engine: AsyncEngine) -> None:
+        """Проверяет реплику и запускает фоновое наблюдение.
+
+        Args:
+            engine (AsyncEngine): Движок реплики.
+        """
+        await self.check(engine)
+        self._task = asyncio.create_task(self._run(engine))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.usable = False
+
+    async def check(self, engine: AsyncEngine) -> None:
+        try:
+            async with engine.connect() as connection:
+                lag = await connection.scalar(LAG_QUERY)
+        except (OSError, SQLAlchemyError) as error:
+            self.lag = None
+            self._set_usable(False, error=str(error))
+            return
+        # Вне режима восстановления функции WAL возвращают NULL.
+        self.lag = float(lag) if lag is not None else 0.0
+        replica_lag.set(self.lag)
+        self._set_usable(self.lag <= self.max_lag, lag=self.lag)
+
+    def _set_usable(self, usable: bool, **extra) -> None:
+        if usable != self.usable:
+            if usable:
+                logger.info("Чтение переключено на реплику", extra=extra)
+            else:
+                logger.warning("Чтение переключено на primary", extra=extra)
+        self.usable = usable
+        replica_reads_enabled.set(int(usable))
+
+    async def _run(self, engine: AsyncEngine) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check(engine)
+
+
+replica_monitor = ReplicaMonitor()
@@ -0,0 +1,279 @@
+import asyncio
+import socket
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp.abc import AbstractResolver
+from aiohttp.helpers import is_ip_address
+from aiohttp.resolver import DefaultResolver
+
+from bot import constants
+from core.metrics import dns_failures, dns_lookups, dns_resolution_latency
+
+
+class DNSResolutionError(OSError):
+    """Ошибка разрешения имени хоста.
+
+    Позволяет отличить сбой DNS от ошибок HTTP при проверке приложений.
+    """
+
+
+@dataclass
+class _CacheEntry:
+    addresses: Optional[List[Dict[str, Any]]]
+    error: Optional[OSError]
+    expires_at: float
+    ttl: float
+
+
+class RecordTTLResolver(AbstractResolver):
+    """Асинхронный резолвер на aiodns, сообщающий TTL DNS-записей.
+
+    Запросы A и AAAA не занимают потоки executor. Если запрос не дал
+    ответа, имя разрешается через gethostbyname c-ares, который читает
+    /etc/hosts и применяет домены поиска, но TTL не сообщает.
+
+    Raises:
+        ImportError: Если пакет aiodns не установлен.
+    """
+
+    def __init__(self, nameservers: Optional[List[str]] = None):
+        import aiodns
+
+        self._error = aiodns.error.DNSError
+        self._resolver = aiodns.DNSResolver(nameservers=nameservers)
+
+    async def resolve_with_ttl(
+        self, host: str, port: int = 0, family: int = socket.AF_INET
+    ) -> Tuple[List[Dict[str, Any]], Optional[float]]:
+        """Возвращает адреса хоста и наименьший TTL их записей.
+
+        Returns:
+            Tuple[List[Dict[str, Any]], Optional[float]]: Адреса в формате
+            aiohttp и TTL в секундах или None, если он неизвестен.
+
+        Raises:
+            OSError: Если имя хоста не удалось разрешить.
+        """
+        if family == socket.AF_INET6:
+            query_type, family = "AAAA", socket.AF_INET6
+        else:
+            query_type, family = "A", socket.AF_INET
+        if is_ip_address(host):
+            addresses, ttl = [host], None
+        else:
+            addresses, ttl = await self._query(host, query_type, family)
+        if not addresses:
+            raise OSError(None, "DNS lookup failed")
+        return [
+            {
+                "hostname": host,
+                "host": address,
+                "port": port,
+                "family": family,
+                "proto": 0,
+                "flags": socket.AI_NUMERICHOST | socket.AI_NUMERICSERV,
+            }
+            for address in addresses
+        ], ttl
+
+    async def _query(
+        self, host: str, query_type: str, family: int
+    ) -> Tuple[List[str], Optional[float]]:
+        try:
+            records = await self._resolver.query(host, query_type)
+        except self._error:
+            pass
+        else:
+            return (
+                [record.host for record in records],
+                min((record.ttl for record in records), default=None),
+            )
+        try:
+            answer = await self._resolver.gethostbyname(host, family)
+        except self._error as error:
+            code, message = (tuple(error.args) + (None, None))[:2]
+            raise OSError(code, message or "DNS lookup failed") from error
+        return answer.addresses, None
+
+    async def resolve(
+        self, host: str, port: int = 0, family: int = socket.AF_INET
+    ) -> List[Dict[str, Any]]:
+        addresses, _ = await self.resolve_with_ttl(host, port, family)
+        return addresses
+
+    async def close(self) -> None:
+        self._resolver.cancel()
+
+
+def default_resolver() -> AbstractResolver:
+    """Возвращает RecordTTLResolver или, без aiodns, DefaultResolver."""
+    try:
+        return RecordTTLResolver()
+    except ImportError:
+        return DefaultResolver()
+
+
+class CachingResolver(AbstractResolver):
+    """Общий для всех проверок асинхронный DNS-резолвер с кэшем.
+
+    Хранит положительные ответы в течение TTL DNS-записей, но не меньше
+    min_ttl и не больше ttl, а если резолвер TTL не сообщает - ttl.
+    Ошибки хранятся в течение отдельного TTL негативного кэша. Записи,
+    срок жизни которых подходит к концу, заранее обновляются, а
+    одновременные запросы одного и того же хоста объединяются в один.
+    По умолчанию имена разрешает RecordTTLResolver.
+    """
+
+    def __init__(
+        self,
+        resolver: Optional[AbstractResolver] = None,
+        ttl: float = constants.DNS_CACHE_TTL,
+        negative_ttl: float = constants.DNS_NEGATIVE_CACHE_TTL,
+        prefetch_threshold: float = constants.DNS_PREFETCH_THRESHOLD,
+        min_ttl: float = constants.DNS_MIN_CACHE_TTL,
+    ):
+        self._resolver = resolver
+        self._ttl = ttl
+        self._min_ttl = min_ttl
+        self._negative_ttl = negative_ttl
+        self._prefetch_threshold = prefetch_threshold
+        self._cache: Dict[Tuple[str, int, int], _CacheEntry] = {}
+        self._inflight: Dict[Tuple[str, int, int], asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.prefetches = 0
+        self.failures = 0
+        self.lookups = 0
+        self.lookup_time_total = 0.0
+
+    async def resolve(
+        self, host: str, port: int = 0, family: int = socket.AF_INET
+    ) -> List[Dict[str, Any]]:
+        """Возвращает адреса хоста, по возможности из кэша.
+
+        Args:
+            host (str): Имя хоста.
+            port (int): Порт.
+            family (int): Семейство адресов.
+
+        Returns:
+            List[Dict[str, Any]]: Адреса в формате aiohttp.
+
+        Raises:
+            DNSResolutionError: Если имя хоста не удалось разрешить.
+        """
+        key = (host, port, family)
+        now = time.monotonic()
+        entry = self._cache.get(key)
+        if entry is not None and entry.expires_at > now:
+            if entry.error is not None:
+                self.negative_hits += 1
+                dns_lookups.inc(result="negative_hit")
+                raise DNSResolutionError(
+                    entry.error.errno, entry.error.strerror
+                )
+            self.hits += 1
+            dns_lookups.inc(result="hit")
+            # Короткоживущие записи обновляются в последней половине TTL.
+            threshold = min(self._prefetch_threshold, entry.ttl / 2)
+            if (
+                entry.expires_at - now < threshold
+                and key not in self._inflight
+            ):
+                self.prefetches += 1
+                self._start_lookup(key, prefetch=True)
+            return entry.addresses
+
+        self.misses += 1
+        dns_lookups.inc(result="miss")
+        task = self._inflight.get(key) or self._start_lookup(key)
+        return await asyncio.shield(task)
+
+    def _start_lookup(
+        self, key: Tuple[str, int, int], prefetch: bool = False
+    ) -> asyncio.Task:
+        task = asyncio.ensure_future(self._lookup(key, prefetch))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        if prefetch:
+            # Ошибку фонового обновления никто не ждет - гасим ее здесь.
+            task.add_done_callback(
+                lambda done: done.cancelled() or done.exception()
+            )
+        return task
+
+    async def _lookup(
+        self, key: Tuple[str, int, int], prefetch: bool
+    ) -> List[Dict[str, Any]]:
+        if self._resolver is None:
+            self._resolver = default_resolver()
+        host, port, family = key
+        started = time.monotonic()
+        try:
+            if isinstance(self._resolver, RecordTTLResolver):
+                addresses, record_ttl = await self._resolver.resolve_with_ttl(
+                    host, port, family
+                )
+            else:
+                addresses = await self._resolver.resolve(host, port, family)
+                record_ttl = None
+        except OSError as error:
+            self.failures += 1
+            dns_failures.inc()
+            # Неудачное фоновое обновление не вытесняет еще живой ответ.
+            if not prefetch:
+                self._cache[key] = _CacheEntry(
+                    None,
+                    error,
+                    time.monotonic() + self._negative_ttl,
+                    self._negative_ttl,
+                )
+            raise DNSResolutionError(error.errno, error.strerror) from error
+        finally:
+            elapsed = time.monotonic() - started
+            self.lookups += 1
+            self.lookup_time_total += elapsed
+            dns_resolution_latency.observe(elapsed)
+        ttl = (
+            self._ttl
+            if record_ttl is None
+            else min(max(record_ttl, self._min_ttl), self._ttl)
+        )
+        self._cache[key] = _CacheEntry(
+            addresses, None, time.monotonic() + ttl, ttl
+        )
+        return addresses
+
+    def stats(self) -> Dict[str, float]:
+        """Возвращает статистику работы кэша.
+
+        Returns:
+            Dict[str, float]: Попадания, промахи, доля попаданий и среднее
+            время разрешения имени в секундах.
+        """
+        requests = self.hits + self.negative_hits + self.misses
+        return {
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "prefetches": self.prefetches,
+            "failures": self.failures,
+            "hit_rate": (
+                (self.hits + self.negative_hits) / requests if requests else 0.0
+            ),
+            "avg_lookup_time": (
+                self.lookup_time_total / self.lookups if self.lookups else 0.0
+            ),
+        }
+
+    async def close(self) -> None:
+        for task in self._inflight.values():
+            task.cancel()
+        if self._resolver is not None:
+            await self._resolver.close()
+
+
+resolver = CachingResolver()
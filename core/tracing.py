@@ -0,0 +1,153 @@
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Optional
+
+import aiohttp
+from aiohttp.abc import AbstractResolver
+
+from bot import constants
+from core.certificates import certificate_cache
+from core.resolver import resolver
+
+
+@dataclass
+class ProbeTimings:
+    """Разбивка времени одной проверки приложения в секундах.
+
+    Поле остается None, если этап не выполнялся: например, соединение
+    было взято из пула или адрес был задан IP без DNS.
+    """
+
+    dns: Optional[float] = None
+    connect: Optional[float] = None
+    tls: Optional[float] = None
+    ttfb: Optional[float] = None
+    total: Optional[float] = None
+
+
+_current_timings: ContextVar[Optional[ProbeTimings]] = ContextVar(
+    "probe_timings", default=None
+)
+
+
+async def _on_dns_resolvehost_start(session, ctx: SimpleNamespace, params) -> None:
+    ctx.dns_start = time.monotonic()
+
+
+async def _on_dns_resolvehost_end(session, ctx, params) -> None:
+    if ctx.trace_request_ctx is not None:
+        ctx.trace_request_ctx.dns = time.monotonic() - ctx.dns_start
+
+
+async def _on_request_headers_sent(session, ctx, params) -> None:
+    ctx.headers_sent = time.monotonic()
+
+
+async def _on_request_end(session, ctx, params) -> None:
+    # Сигнал приходит после чтения заголовков ответа.
+    if ctx.trace_request_ctx is not None:
+        ctx.trace_request_ctx.ttfb = time.monotonic() - ctx.headers_sent
+
+
+def build_trace_config() -> aiohttp.TraceConfig:
+    """Создает TraceConfig, заполняющий ProbeTimings из trace_request_ctx.
+
+    Returns:
+        aiohttp.TraceConfig: Конфигурация трассировки запросов.
+    """
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_dns_resolvehost_start.append(_on_dns_resolvehost_start)
+    trace_config.on_dns_resolvehost_end.append(_on_dns_resolvehost_end)
+    trace_config.on_request_headers_sent.append(_on_request_headers_sent)
+    trace_config.on_request_end.append(_on_request_end)
+    return trace_config
+
+
+class TimingConnector(aiohttp.TCPConnector):
+    """TCPConnector, разделяющий время TCP-соединения и TLS-рукопожатия.
+
+    Фабрика протокола вызывается asyncio сразу после установки TCP
+    соединения и до начала TLS-рукопожатия, поэтому ее обертка дает
+    границу между двумя этапами, которую сигналы TraceConfig не видят.
+    Сертификат каждого нового TLS-соединения передается в
+    certificate_cache.
+    """
+
+    async def _wrap_create_connection(
+        self, protocol_factory, *args: Any, **kwargs: Any
+    ):
+        timings = _current_timings.get()
+        if timings is None:
+            result = await super()._wrap_create_connection(
+                protocol_factory, *args, **kwargs
+            )
+            self._observe_certificate(result[0], kwargs)
+            return result
+
+        started = time.monotonic()
+        connected = None
+
+        def factory():
+            nonlocal connected
+            connected = time.monotonic()
+            return protocol_factory()
+
+        result = await super()._wrap_create_connection(
+            factory, *args, **kwargs
+        )
+        finished = time.monotonic()
+        timings.connect = (connected or finished) - started
+        if kwargs.get("ssl"):
+            timings.tls = finished - (connected or finished)
+        self._observe_certificate(result[0], kwargs)
+        return result
+
+    @staticmethod
+    def _observe_certificate(transport, kwargs: dict) -> None:
+        if kwargs.get("ssl"):
+            host = kwargs.get("server_hostname") or kwargs["req"].url.host
+            certificate_cache.observe(host, transport)
+
+
+def create_probe_session(
+    dns_resolver: AbstractResolver = resolver,
+    local_addr: Optional[str] = None,
+    timeout: float = constants.PROBE_TIMEOUT,
+) -> aiohttp.ClientSession:
+    """Создает HTTP-сессию для проверки приложений.
+
+    Args:
+        dns_resolver (AbstractResolver): Резолвер, по умолчанию общий DNS-кэш.
+        local_addr (Optional[str]): Адрес, с которого открываются соединения.
+        timeout (float): Предельное время одной проверки в секундах.
+
+    Returns:
+        aiohttp.ClientSession: Сессия с DNS-кэшем и трассировкой.
+    """
+    return aiohttp.ClientSession(
+        connector=TimingConnector(
+            resolver=dns_resolver,
+            use_dns_cache=False,
+            local_addr=(local_addr, 0) if local_addr else None,
+        ),
+        trace_configs=[build_trace_config()],
+        timeout=aiohttp.ClientTimeout(total=timeout),
+    )
+
+
+def track_timings(timings: ProbeTimings):
+    """Привязывает timings к текущему контексту для TimingConnector.
+
+    Args:
+        timings (ProbeTimings): Объект, в который записываются замеры.
+
+    Returns:
+        Token: Токен для сброса через untrack_timings.
+    """
+    return _current_timings.set(timings)
+
+
+def untrack_timings(token) -> None:
+    _current_timings.reset(token)
@@ -1,4 +1,20 @@
-from sqlalchemy import URL, Boolean, Float, Integer, String, Text
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import (
+    JSON,
+    URL,
+    Boolean,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column
 
 from bot import constants
@@ -17,14 +33,53 @@ class Application(Base):
     name: Mapped[str] = mapped_column(String(constants.MAX_NAME_LENGTH), nullable=False)
     ads_url: Mapped[str] = mapped_column(String(constants.MAX_ADS_URL_LENGTH), nullable=False)
     failure_counter: Mapped[int] = mapped_column(Integer, default=0)
+    expected_content: Mapped[Optional[str]] = mapped_column(Text)
+    content_is_regex: Mapped[bool] = mapped_column(Boolean, default=False, server_default="false")
+    max_body_size: Mapped[Optional[int]] = mapped_column(Integer)
+    expected_headers: Mapped[Optional[dict]] = mapped_column(JSON)
+    latency_slo: Mapped[Optional[float]] = mapped_column(Float)
+    check_interval: Mapped[Optional[int]] = mapped_column(Integer)
+    circuit_open: Mapped[bool] = mapped_column(Boolean, default=False, server_default="false")
+    last_checked_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    next_check_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
 
     def __repr__(self):
         return f"Application {self.name} - url: {self.url}"
 
 
 class Token(Base):
+    # Погашенные токены удаляются по used_at задачей очистки.
+    __table_args__ = (
+        Index("ix_token_used_at", "used_at", postgresql_where=text("NOT is_active")),
+    )
+
     token: Mapped[str] = mapped_column(String(constants.MAX_TOKEN_LENGTH), nullable=False, unique=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    used_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
 
     def __repr__(self):
         return f"{self.token} - is active: {self.is_active}"
+
+
+class Setting(Base):
+    key: Mapped[str] = mapped_column(String(constants.MAX_SETTING_KEY_LENGTH), nullable=False, unique=True)
+    value: Mapped[str] = mapped_column(Text, nullable=False)
+
+    def __repr__(self):
+        return f"{self.key} = {self.value}"
+
+
+class Subscription(Base):
+    # Уникальность по (application_id, user_id) заодно служит индексом
+    # для выборки подписчиков приложения.
+    __table_args__ = (UniqueConstraint("application_id", "user_id"),)
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    application_id: Mapped[int] = mapped_column(
+        ForeignKey("application.id", ondelete="CASCADE"), nullable=False
+    )
+
+    def __repr__(self):
+        return f"Subscription user {self.user_id} - application {self.application_id}"
@@ -1,4 +1,11 @@
-from database.models import Application, Token, User
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, literal_column, select, text, true
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import Application, Setting, Subscription, Token, User
 from utils.repository import SQLAlchemyRepository
 
 
@@ -12,3 +19,106 @@ class ApplicationRepository(SQLAlchemyRepository):
 
 class TokenRepository(SQLAlchemyRepository):
     model = Token
+
+    async def delete_consumed(
+        self,
+        used_before: datetime,
+        limit: int,
+        lock_timeout: str,
+        session: AsyncSession,
+    ) -> List[int]:
+        """Удаляет пачку токенов, погашенных раньше used_before.
+
+        Строки, заблокированные другими транзакциями, пропускаются, а
+        ожидание остальных блокировок ограничено lock_timeout. Изменения
+        не фиксируются.
+
+        Args:
+            used_before (datetime): Граница срока хранения.
+            limit (int): Максимальное количество удаляемых строк.
+            lock_timeout (str): Значение lock_timeout для транзакции.
+            session (AsyncSession): Сессия SQLAlchemy для выполнения запроса.
+
+        Returns:
+            List[int]: Размеры удаленных строк в байтах.
+        """
+        await session.execute(
+            text("SELECT set_config('lock_timeout', :value, true)"),
+            {"value": lock_timeout},
+        )
+        batch = (
+            select(Token.id)
+            .where(~Token.is_active, Token.used_at < used_before)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await session.execute(
+            delete(Token)
+            .where(Token.id.in_(batch.scalar_subquery()))
+            .returning(func.pg_column_size(literal_column(Token.__tablename__)))
+        )
+        return list(result.scalars())
+
+
+class SettingRepository(SQLAlchemyRepository):
+    model = Setting
+
+
+class SubscriptionRepository(SQLAlchemyRepository):
+    model = Subscription
+
+    async def find_subscribers(
+        self, application_ids: Sequence[int], session: AsyncSession
+    ) -> List[Tuple[int, int]]:
+        """Возвращает подписчиков приложений по индексу подписок.
+
+        Args:
+            application_ids (Sequence[int]): Идентификаторы приложений.
+            session (AsyncSession): Сессия SQLAlchemy для выполнения запроса.
+
+        Returns:
+            List[Tuple[int, int]]: Пары (id приложения, telegram_user_id).
+        """
+        result = await session.execute(
+            select(Subscription.application_id, User.telegram_user_id)
+            .join(User, User.id == Subscription.user_id)
+            .where(Subscription.application_id.in_(application_ids))
+        )
+        return list(result.tuples())
+
+    async def subscribe_all(
+        self,
+        session: AsyncSession,
+        user_ids: Optional[Sequence[int]] = None,
+        application_urls: Optional[Sequence[str]] = None,
+        to_commit: bool = True,
+    ) -> None:
+        """Подписывает пользователей на приложения одним INSERT ... SELECT.
+
+        Создает подписки для всех пар пользователь - приложение, как
+        миграция с подписками, ограничивая пары переданными фильтрами.
+        Существующие подписки пропускаются.
+
+        Args:
+            session (AsyncSession): Сессия SQLAlchemy для выполнения запроса.
+            user_ids (Optional[Sequence[int]]): Пользователи, None - все.
+            application_urls (Optional[Sequence[str]]): Url приложений, None - все.
+            to_commit (bool): Флаг, указывающий нужно ли фиксировать изменения в базе данных.
+        """
+        # WHERE нужен SQLite, чтобы отличить ON CONFLICT от условия JOIN.
+        pairs = (
+            select(User.id, Application.id)
+            .join(Application, true())
+            .where(true())
+        )
+        if user_ids is not None:
+            pairs = pairs.where(User.id.in_(user_ids))
+        if application_urls is not None:
+            pairs = pairs.where(Application.url.in_(application_urls))
+        await session.execute(
+            insert(Subscription)
+            .from_select(["user_id", "application_id"], pairs)
+            .on_conflict_do_nothing()
+        )
+        if to_commit:
+            await session.commit()
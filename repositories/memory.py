@@ -0,0 +1,130 @@
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+from database.models import Application, Setting, Subscription, Token, User
+from utils.memory_repository import InMemoryRepository, MemorySession
+
+
+class UserMemoryRepository(InMemoryRepository):
+    model = User
+
+
+class ApplicationMemoryRepository(InMemoryRepository):
+    model = Application
+
+
+class TokenMemoryRepository(InMemoryRepository):
+    model = Token
+
+    async def delete_consumed(
+        self,
+        used_before: datetime,
+        limit: int,
+        lock_timeout: str,
+        session: MemorySession,
+    ) -> List[int]:
+        """Удаляет пачку токенов, погашенных раньше used_before.
+
+        Блокировок в памяти нет, поэтому lock_timeout не используется.
+        Изменения не фиксируются.
+
+        Args:
+            used_before (datetime): Граница срока хранения.
+            limit (int): Максимальное количество удаляемых строк.
+            lock_timeout (str): Не используется.
+            session (MemorySession): Сессия для выполнения запроса.
+
+        Returns:
+            List[int]: Оценка размеров удаленных строк в байтах - длина
+            их значений в UTF-8, а не pg_column_size.
+        """
+        batch = [
+            row
+            for row in self._sorted()
+            if not row["is_active"]
+            and row["used_at"] is not None
+            and row["used_at"] < used_before
+        ][:limit]
+        for row in batch:
+            self._remove(row)
+            session.record(lambda row=row: self._restore(row))
+        return [
+            sum(len(str(value).encode()) for value in row.values())
+            for row in batch
+        ]
+
+
+class SettingMemoryRepository(InMemoryRepository):
+    model = Setting
+
+
+class SubscriptionMemoryRepository(InMemoryRepository):
+    model = Subscription
+
+    async def find_subscribers(
+        self, application_ids: Sequence[int], session: MemorySession
+    ) -> List[Tuple[int, int]]:
+        """Возвращает подписчиков приложений.
+
+        Args:
+            application_ids (Sequence[int]): Идентификаторы приложений.
+            session (MemorySession): Сессия для выполнения запроса.
+
+        Returns:
+            List[Tuple[int, int]]: Пары (id приложения, telegram_user_id).
+        """
+        telegram_ids = dict(
+            await UserMemoryRepository().find_all_columns(
+                ("id", "telegram_user_id"), session
+            )
+        )
+        application_ids = set(application_ids)
+        return [
+            (application_id, telegram_ids[user_id])
+            for application_id, user_id in await self.find_all_columns(
+                ("application_id", "user_id"), session
+            )
+            if application_id in application_ids and user_id in telegram_ids
+        ]
+
+    async def subscribe_all(
+        self,
+        session: MemorySession,
+        user_ids: Optional[Sequence[int]] = None,
+        application_urls: Optional[Sequence[str]] = None,
+        to_commit: bool = True,
+    ) -> None:
+        """Подписывает пользователей на приложения, пропуская существующие.
+
+        Args:
+            session (MemorySession): Сессия для выполнения запроса.
+            user_ids (Optional[Sequence[int]]): Пользователи, None - все.
+            application_urls (Optional[Sequence[str]]): Url приложений, None - все.
+            to_commit (bool): Флаг, указывающий нужно ли фиксировать изменения.
+        """
+        users = [
+            user_id
+            for user_id, in await UserMemoryRepository().find_all_columns(
+                ("id",), session
+            )
+            if user_ids is None or user_id in user_ids
+        ]
+        applications = [
+            application_id
+            for application_id, url in (
+                await ApplicationMemoryRepository().find_all_columns(
+                    ("id", "url"), session
+                )
+            )
+            if application_urls is None or url in application_urls
+        ]
+        await self.insert_ignore_conflicts(
+            [
+                {"user_id": user_id, "application_id": application_id}
+                for user_id in users
+                for application_id in applications
+            ],
+            "id",
+            session,
+            to_commit,
+        )
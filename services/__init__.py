@@ -1,13 +1,34 @@
-from typing import Any
+import asyncio
+import re
+import secrets
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+from sqlalchemy import func
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from database.models import Application
-from repositories import ApplicationRepository, TokenRepository, UserRepository
+from repositories import (
+    ApplicationRepository,
+    SettingRepository,
+    SubscriptionRepository,
+    TokenRepository,
+    UserRepository,
+)
+from services.monitoring import MonitoredTarget
+from services.probe import ProbeAssertions
 from utils.repository import AbstractRepository
 
 from bot import constants
 
+APPLICATION_FIELDS = ("url", "name", "ads_url")
+
+# SQLSTATE ошибки ожидания блокировки дольше lock_timeout.
+LOCK_NOT_AVAILABLE = "55P03"
+
+
 class UserService:
     def __init__(self, user_repo: AbstractRepository):
         self.user_repo: AbstractRepository = user_repo()
@@ -22,6 +43,43 @@ class UserService:
     ):
         return await self.user_repo.get_by_attr(attr_name, attr_value, session)
 
+    async def register_user(
+        self, data: dict, session: AsyncSession, token: str = None
+    ) -> bool:
+        """Регистрирует пользователя и гасит его токен в одной транзакции.
+
+        Новый пользователь подписывается на все приложения, как
+        пользователи, подписанные миграцией.
+
+        Args:
+            data (dict): Данные пользователя.
+            session (AsyncSession): Сессия асинхронного соединения с базой данных.
+            token (str, optional): Токен, который нужно погасить.
+
+        Returns:
+            bool: False, если пользователь уже зарегистрирован.
+
+        Raises:
+            ValueError: Если токен не действителен.
+        """
+        user_ids = await self.user_repo.insert_ignore_conflicts(
+            [data], "id", session, to_commit=False
+        )
+        if not user_ids:
+            await session.rollback()
+            return False
+        if token is not None:
+            try:
+                await token_service.redeem_token(token, session)
+            except ValueError:
+                await session.rollback()
+                raise
+        await subscription_service.subscribe_all(
+            session, user_ids=user_ids, to_commit=False
+        )
+        await session.commit()
+        return True
+
     async def get_all_users(self, session):
         return await self.user_repo.find_all(session)
 
@@ -48,41 +106,308 @@ class TokenServices:
             attr_name, attr_value, session
         )
 
-    async def check_user_token(self, token: str, session: AsyncSession):
-        token = await self.get_token_by_attr("token", token, session)
-        if token is None:
-            raise ValueError(
-            constants.INCORRECT_TOKEN
-            )
-        elif token.is_active:
-            token.is_active = False
-            await self.token_repo.add_one(token, session, to_commit=True)
-        else:
-            raise ValueError(
-                constants.TOKEN_IS_INACTIVE
-            )
+    async def redeem_token(self, token: str, session: AsyncSession) -> None:
+        """Гасит активный токен одним UPDATE ... RETURNING без фиксации.
+
+        Строка токена блокируется до конца транзакции, поэтому
+        одновременное повторное погашение того же токена ничего не вернет.
+
+        Args:
+            token (str): Токен пользователя.
+            session (AsyncSession): Сессия асинхронного соединения с базой данных.
+
+        Raises:
+            ValueError: Если токена нет или он уже использован.
+        """
+        if await self.token_repo.update_by_attrs(
+            {"token": token, "is_active": True},
+            {"is_active": False, "used_at": func.now()},
+            "id",
+            session,
+            to_commit=False,
+        ):
+            return
+        # Причину отказа выясняем только на редком неуспешном пути.
+        if await self.get_token_by_attr("token", token, session) is None:
+            raise ValueError(constants.INCORRECT_TOKEN)
+        raise ValueError(constants.TOKEN_IS_INACTIVE)
 
     async def check_generated_token(self, token: str, session: AsyncSession):
         if len(token) > constants.MAX_TOKEN_LENGTH:
             raise ValueError(constants.TOKEN_LENGTH)
-        if await self.get_token_by_attr("token", token, session):
+        if not await self.token_repo.insert_ignore_conflicts(
+            [{"token": token}], "token", session
+        ):
             raise ValueError(constants.TOKEN_EXISTS)
-        else:
-            await self.create_token({"token": token}, session)
+
+    async def generate_tokens(self, count: int, session: AsyncSession) -> list:
+        """Создает count случайных токенов в одной транзакции.
+
+        Совпадения с существующими токенами отсекает уникальный индекс,
+        а вместо них генерируются новые.
+
+        Args:
+            count (int): Количество токенов.
+            session (AsyncSession): Сессия асинхронного соединения с базой данных.
+
+        Returns:
+            list: Созданные токены.
+        """
+        tokens = []
+        while len(tokens) < count:
+            candidates = {
+                secrets.token_urlsafe(constants.GENERATED_TOKEN_BYTES)
+                for _ in range(count - len(tokens))
+            }
+            tokens.extend(
+                await self.token_repo.insert_ignore_conflicts(
+                    [{"token": token} for token in candidates],
+                    "token",
+                    session,
+                    to_commit=False,
+                )
+            )
+        await session.commit()
+        return tokens
+
+    async def purge_consumed_tokens(
+        self,
+        used_before: datetime,
+        session: AsyncSession,
+        batch_size: int = constants.RETENTION_BATCH_SIZE,
+    ) -> Tuple[int, int]:
+        """Удаляет погашенные токены старше срока хранения.
+
+        Токены удаляются пачками по batch_size, каждая в своей короткой
+        транзакции, с паузой между ними, чтобы не держать блокировки и
+        не мешать регистрации пользователей. Если пачка не дождалась
+        блокировки, очистка откладывается до следующего запуска.
+
+        Args:
+            used_before (datetime): Граница срока хранения.
+            session (AsyncSession): Сессия асинхронного соединения с базой данных.
+            batch_size (int, optional): Размер пачки.
+
+        Returns:
+            Tuple[int, int]: Количество удаленных строк и их размер в байтах.
+        """
+        rows = size = 0
+        while True:
+            try:
+                sizes = await self.token_repo.delete_consumed(
+                    used_before,
+                    batch_size,
+                    constants.RETENTION_LOCK_TIMEOUT,
+                    session,
+                )
+                await session.commit()
+            except DBAPIError as error:
+                await session.rollback()
+                if getattr(error.orig, "sqlstate", None) != LOCK_NOT_AVAILABLE:
+                    raise
+                break
+            rows += len(sizes)
+            size += sum(sizes)
+            if len(sizes) < batch_size:
+                break
+            await asyncio.sleep(constants.RETENTION_BATCH_PAUSE)
+        return rows, size
 
 
 class ApplicationServices:
     def __init__(self, application_repo: AbstractRepository):
         self.application_repo: AbstractRepository = application_repo()
 
+    @staticmethod
+    def validate_application(data: dict) -> None:
+        if not isinstance(data, dict) or not all(
+            data.get(field) for field in APPLICATION_FIELDS
+        ):
+            raise ValueError(constants.APPLICATION_FIELDS_MESSAGE)
+        if not all(isinstance(data[field], str) for field in APPLICATION_FIELDS):
+            raise ValueError(constants.APPLICATION_FIELDS_TYPE_MESSAGE)
+        if len(data["name"]) > constants.MAX_NAME_LENGTH:
+            raise ValueError(
+                constants.NAME_LENGTH_MESSAGE.format(constants.MAX_NAME_LENGTH)
+            )
+        if len(data["url"]) > constants.MAX_URL_LENGTH or len(data["ads_url"]) > constants.MAX_ADS_URL_LENGTH:
+            raise ValueError(constants.URL_LENGTH_MESSAGE.format(constants.MAX_URL_LENGTH))
+
     async def create_application(
         self, data: dict, session: AsyncSession, to_commit: bool = True
     ) -> None:
-        if len(data["name"]) > constants.MAX_NAME_LENGTH:
-            raise ValueError(constants.NAME_LENGTH_MESSAGE)
-        if len(data["url"]) > constants.MAX_URL_LENGTH or len(data["ads_url"]) > constants.MAX_URL_LENGTH:
-            raise ValueError(constants.URL_LENGTH_MESSAGE.format(constants.MAX_URL_LENGTH))
-        return await self.application_repo.create_one(data, session, to_commit)
+        self.validate_application(data)
+        await self.application_repo.create_one(data, session, to_commit=False)
+        # Новое приложение получают все пользователи, как при миграции.
+        await subscription_service.subscribe_all(
+            session, application_urls=[data["url"]], to_commit=False
+        )
+        if to_commit:
+            await session.commit()
+
+    async def import_applications(
+        self, rows: list, session: AsyncSession
+    ) -> list:
+        """Проверяет пачку строк и сохраняет корректные.
+
+        Новые приложения вставляются одним INSERT, на них подписываются
+        все пользователи, а существующие обновляются одним upsert.
+
+        Args:
+            rows (list): Пары (номер строки, данные приложения).
+            session (AsyncSession): Сессия асинхронного соединения с базой данных.
+
+        Returns:
+            list: Пары (номер строки, текст ошибки) для отклоненных строк.
+        """
+        errors = []
+        valid = {}
+        for line_number, data in rows:
+            try:
+                self.validate_application(data)
+            except ValueError as error:
+                errors.append((line_number, str(error)))
+                continue
+            # Повтор url внутри одного INSERT ... ON CONFLICT недопустим.
+            valid[data["url"]] = {
+                field: data[field] for field in APPLICATION_FIELDS
+            }
+        if valid:
+            created = await self.application_repo.insert_ignore_conflicts(
+                list(valid.values()), "url", session, to_commit=False
+            )
+            created_urls = set(created)
+            existing = [
+                data for url, data in valid.items() if url not in created_urls
+            ]
+            if existing:
+                await self.application_repo.upsert_many(
+                    existing, "url", session, to_commit=False
+                )
+            if created:
+                await subscription_service.subscribe_all(
+                    session, application_urls=created, to_commit=False
+                )
+            await session.commit()
+        return errors
+
+    @staticmethod
+    def validate_assertions(data: dict) -> dict:
+        """Проверяет проверки ответа и приводит их к значениям колонок.
+
+        Args:
+            data (dict): Проверки с ключами из ProbeAssertions.COLUMNS.
+
+        Raises:
+            ValueError: Если ключ неизвестен или значение некорректно.
+
+        Returns:
+            dict: Значения всех колонок проверок, незаданные сбрасываются.
+        """
+        if not isinstance(data, dict) or set(data) - set(ProbeAssertions.COLUMNS):
+            raise ValueError(constants.ASSERTIONS_FORMAT)
+        content = data.get("expected_content")
+        is_regex = data.get("content_is_regex", False)
+        max_body_size = data.get("max_body_size")
+        headers = data.get("expected_headers")
+        latency_slo = data.get("latency_slo")
+        if content is not None and (
+            not isinstance(content, str)
+            or len(content) > constants.MAX_EXPECTED_CONTENT_LENGTH
+        ):
+            raise ValueError(
+                constants.EXPECTED_CONTENT_LENGTH_MESSAGE.format(
+                    constants.MAX_EXPECTED_CONTENT_LENGTH
+                )
+            )
+        if not isinstance(is_regex, bool):
+            raise ValueError(constants.ASSERTIONS_FORMAT)
+        if is_regex and content:
+            try:
+                re.compile(content)
+            except re.error as error:
+                raise ValueError(constants.ASSERTIONS_REGEX.format(error))
+        if max_body_size is not None and (
+            type(max_body_size) is not int or max_body_size <= 0
+        ):
+            raise ValueError(constants.ASSERTIONS_FORMAT)
+        if headers is not None and (
+            not isinstance(headers, dict)
+            or not all(
+                isinstance(name, str) and isinstance(value, str)
+                for name, value in headers.items()
+            )
+        ):
+            raise ValueError(constants.ASSERTIONS_FORMAT)
+        if headers is not None and (
+            len(headers) > constants.MAX_EXPECTED_HEADERS
+            or any(
+                len(name) > constants.MAX_EXPECTED_HEADER_LENGTH
+                or len(value) > constants.MAX_EXPECTED_HEADER_LENGTH
+                for name, value in headers.items()
+            )
+        ):
+            raise ValueError(
+                constants.EXPECTED_HEADERS_LIMIT_MESSAGE.format(
+                    constants.MAX_EXPECTED_HEADERS,
+                    constants.MAX_EXPECTED_HEADER_LENGTH,
+                )
+            )
+        if latency_slo is not None and (
+            type(latency_slo) not in (int, float) or latency_slo <= 0
+        ):
+            raise ValueError(constants.ASSERTIONS_FORMAT)
+        return {
+            "expected_content": content,
+            "content_is_regex": is_regex,
+            "max_body_size": max_body_size,
+            "expected_headers": headers,
+            "latency_slo": latency_slo,
+        }
+
+    async def set_assertions(
+        self, url: str, data: dict, session: AsyncSession
+    ) -> None:
+        """Заменяет проверки ответа приложения.
+
+        Args:
+            url (str): Url приложения.
+            data (dict): Проверки с ключами из ProbeAssertions.COLUMNS.
+            session (AsyncSession): Сессия асинхронного соединения с базой данных.
+
+        Raises:
+            ValueError: Если проверки некорректны или приложения нет.
+        """
+        values = self.validate_assertions(data)
+        updated = await self.application_repo.update_by_attrs(
+            {"url": url}, values, "id", session
+        )
+        if not updated:
+            raise ValueError(constants.APPLICATION_DOES_NOT_EXIST_TO_REMOVE)
+
+    async def set_check_interval(
+        self, url: str, interval: Optional[int], session: AsyncSession
+    ) -> None:
+        """Задает приложению собственный интервал проверки.
+
+        Args:
+            url (str): Url приложения.
+            interval (Optional[int]): Интервал в секундах, None - общий.
+            session (AsyncSession): Сессия асинхронного соединения с базой данных.
+
+        Raises:
+            ValueError: Если приложения нет.
+        """
+        updated = await self.application_repo.update_by_attrs(
+            {"url": url}, {"check_interval": interval}, "id", session
+        )
+        if not updated:
+            raise ValueError(constants.APPLICATION_DOES_NOT_EXIST_TO_REMOVE)
+
+    def stream_applications(self, session: AsyncSession, batch_size: int):
+        return self.application_repo.stream_columns(
+            APPLICATION_FIELDS, session, batch_size
+        )
 
     async def get_application_by_attr(
         self, attr_name: str, attr_value: Any, session: AsyncSession
@@ -94,28 +419,145 @@ class ApplicationServices:
     async def get_all_applications(self, session: AsyncSession):
         return await self.application_repo.find_all(session)
 
-    async def increment_failure_counter(
-        self,
-        application: Application,
-        session: AsyncSession,
-        to_commit: bool = True,
-    ):
-        application.failure_counter += 1
-        await self.application_repo.add_one(application, session, to_commit)
+    async def get_monitoring_snapshot(self, session: AsyncSession) -> list:
+        rows = await self.application_repo.find_all_columns(
+            MonitoredTarget.COLUMNS, session
+        )
+        return [MonitoredTarget(*row) for row in rows]
+
+    async def save_monitoring_state(
+        self, targets: list, session: AsyncSession, to_commit: bool = True
+    ) -> None:
+        changed = [target for target in targets if target.dirty]
+        await self.application_repo.bulk_update(
+            [{"id": target.id, **target.state()} for target in changed],
+            session,
+            to_commit,
+        )
+        for target in changed:
+            target.mark_synced()
+
+    async def delete(self, instance: Application, session: AsyncSession):
+        await self.application_repo.delete(instance, session)
+
+
+class SubscriptionService:
+    def __init__(self, subscription_repo: AbstractRepository):
+        self.subscription_repo: AbstractRepository = subscription_repo()
 
-    async def reset_failure_counter(
+    async def subscribe(
+        self, user_id: int, application_id: int, session: AsyncSession
+    ) -> bool:
+        """Подписывает пользователя на уведомления о приложении.
+
+        Args:
+            user_id (int): Идентификатор пользователя в БД.
+            application_id (int): Идентификатор приложения.
+            session (AsyncSession): Сессия асинхронного соединения с базой данных.
+
+        Returns:
+            bool: False, если пользователь уже был подписан.
+        """
+        inserted = await self.subscription_repo.insert_ignore_conflicts(
+            [{"user_id": user_id, "application_id": application_id}],
+            "id",
+            session,
+        )
+        return bool(inserted)
+
+    async def unsubscribe(
+        self, user_id: int, application_id: int, session: AsyncSession
+    ) -> bool:
+        """Отписывает пользователя от уведомлений о приложении.
+
+        Args:
+            user_id (int): Идентификатор пользователя в БД.
+            application_id (int): Идентификатор приложения.
+            session (AsyncSession): Сессия асинхронного соединения с базой данных.
+
+        Returns:
+            bool: False, если пользователь не был подписан.
+        """
+        deleted = await self.subscription_repo.delete_by_attrs(
+            {"user_id": user_id, "application_id": application_id},
+            "id",
+            session,
+        )
+        return bool(deleted)
+
+    async def get_subscribers(
+        self, application_ids: Sequence[int], session: AsyncSession
+    ) -> Dict[int, List[int]]:
+        """Возвращает подписчиков каждого из приложений.
+
+        Args:
+            application_ids (Sequence[int]): Идентификаторы приложений.
+            session (AsyncSession): Сессия асинхронного соединения с базой данных.
+
+        Returns:
+            Dict[int, List[int]]: telegram_user_id подписчиков по id приложения.
+        """
+        subscribers = defaultdict(list)
+        if not application_ids:
+            return subscribers
+        for application_id, telegram_user_id in (
+            await self.subscription_repo.find_subscribers(
+                application_ids, session
+            )
+        ):
+            subscribers[application_id].append(telegram_user_id)
+        return subscribers
+
+    async def subscribe_all(
         self,
-        application: Application,
         session: AsyncSession,
+        user_ids: Optional[Sequence[int]] = None,
+        application_urls: Optional[Sequence[str]] = None,
         to_commit: bool = True,
-    ):
-        application.failure_counter = 0
-        await self.application_repo.add_one(application, session, to_commit)
+    ) -> None:
+        """Подписывает пользователей на приложения.
 
-    async def delete(self, instance: Application, session: AsyncSession):
-        await self.application_repo.delete(instance, session)
+        Args:
+            session (AsyncSession): Сессия асинхронного соединения с базой данных.
+            user_ids (Optional[Sequence[int]]): Пользователи, None - все.
+            application_urls (Optional[Sequence[str]]): Url приложений, None - все.
+            to_commit (bool): Фиксировать ли изменения.
+        """
+        await self.subscription_repo.subscribe_all(
+            session, user_ids, application_urls, to_commit
+        )
+
+
+class SettingService:
+    def __init__(self, setting_repo: AbstractRepository):
+        self.setting_repo: AbstractRepository = setting_repo()
+
+    async def get_interval(self, session: AsyncSession) -> int:
+        """Возвращает сохраненный общий интервал проверки.
+
+        Args:
+            session (AsyncSession): Сессия асинхронного соединения с базой данных.
+
+        Returns:
+            int: Интервал в секундах или значение по умолчанию.
+        """
+        setting = await self.setting_repo.get_by_attr(
+            "key", constants.INTERVAL_SETTING, session
+        )
+        if setting is None:
+            return constants.INTERVAL_DEFAULT_VALUE
+        return int(setting.value)
+
+    async def set_interval(self, interval: int, session: AsyncSession) -> None:
+        await self.setting_repo.upsert_many(
+            [{"key": constants.INTERVAL_SETTING, "value": str(interval)}],
+            "key",
+            session,
+        )
 
 
 user_service = UserService(UserRepository)
 token_service = TokenServices(TokenRepository)
 application_service = ApplicationServices(ApplicationRepository)
+subscription_service = SubscriptionService(SubscriptionRepository)
+setting_service = SettingService(SettingRepository)
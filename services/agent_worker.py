@@ -0,0 +1,93 @@
+"""Процесс агента проверки.
+
+Запускается ProbeAgent командой python services/agent_worker.py <json>,
+где json - настройки агента. Получает из stdin пачки пар (url, проверки)
+и возвращает в stdout результаты их проверки. Сообщения в обе стороны -
+объекты pickle, перед каждым длина в 4 байта. Процесс завершается,
+когда бот закрывает stdin.
+"""
+
+import asyncio
+import json
+import logging
+import pickle
+import struct
+import sys
+from typing import Any
+
+# core импортируется первым: bot.constants и core.db ссылаются друг на друга.
+import core  # noqa: F401
+from bot import constants
+from core.log import JsonFormatter, SamplingFilter
+from core.resolver import CachingResolver, RecordTTLResolver, resolver
+from core.tracing import create_probe_session
+from services.probe import probe_many
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct("!I")
+
+
+async def read_message(reader: asyncio.StreamReader) -> Any:
+    """Читает одно сообщение.
+
+    Raises:
+        asyncio.IncompleteReadError: Если поток закрыт.
+    """
+    (size,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    return pickle.loads(await reader.readexactly(size))
+
+
+def encode_message(message: Any) -> bytes:
+    payload = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    return _HEADER.pack(len(payload)) + payload
+
+
+async def serve(name: str, local_addr, nameservers) -> None:
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), sys.stdin
+    )
+    transport, protocol = await loop.connect_write_pipe(
+        asyncio.streams.FlowControlMixin, sys.stdout
+    )
+    writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+    agent_resolver = resolver
+    if nameservers:
+        # Свои DNS-серверы поддерживает только резолвер на aiodns.
+        agent_resolver = CachingResolver(
+            RecordTTLResolver(nameservers=list(nameservers))
+        )
+    async with create_probe_session(agent_resolver, local_addr) as http_session:
+        while True:
+            try:
+                keys = await read_message(reader)
+            except asyncio.IncompleteReadError:
+                return
+            results = await probe_many(http_session, keys, agent=name)
+            writer.write(encode_message(results))
+            await writer.drain()
+            # Имена разрешает этот процесс, поэтому и кэш DNS у каждого свой.
+            logger.info(
+                "Статистика DNS-кэша",
+                extra={"agent": name, **agent_resolver.stats()},
+            )
+
+
+def main() -> None:
+    config = json.loads(sys.argv[1])
+    # stdout занят ответами, поэтому логи в том же JSON пишутся в stderr.
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JsonFormatter())
+    logging.basicConfig(level=logging.INFO, handlers=[handler])
+    logging.getLogger("BOT.probe").addFilter(
+        SamplingFilter(constants.PROBE_LOG_SAMPLE_RATE)
+    )
+    asyncio.run(
+        serve(config["name"], config["local_addr"], config["nameservers"])
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bot import constants
+from core.metrics import (
+    certificate_expiry,
+    probe_unconfirmed_failures,
+    probes_coalesced,
+)
+from services.agent_worker import encode_message, read_message
+from services.probe import ProbeKey, ProbeResult
+
+logger = logging.getLogger("BOT.agents")
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Скрипт, а не python -m: импорт пакета services начался бы раньше core.
+WORKER_PATH = os.path.join(PROJECT_DIR, "services", "agent_worker.py")
+
+
+@dataclass(frozen=True)
+class AgentConfig:
+    """Настройки агента проверки: имя, адрес источника и DNS-серверы."""
+
+    name: str
+    local_addr: Optional[str] = None
+    nameservers: Tuple[str, ...] = ()
+
+
+def load_agents(raw: Optional[str]) -> List[AgentConfig]:
+    """Разбирает список агентов из JSON переменной PROBE_AGENTS.
+
+    Args:
+        raw (Optional[str]): Список объектов с ключами name, local_addr
+            и nameservers или None.
+
+    Returns:
+        List[AgentConfig]: Агенты или один агент по умолчанию.
+
+    Raises:
+        ValueError: Если список некорректен или имена повторяются.
+    """
+    if not raw:
+        return [AgentConfig(constants.DEFAULT_PROBE_AGENT)]
+    configs = [
+        AgentConfig(
+            item["name"],
+            item.get("local_addr"),
+            tuple(item.get("nameservers", ())),
+        )
+        for item in json.loads(raw)
+    ]
+    if not configs or len({config.name for config in configs}) < len(configs):
+        raise ValueError("PROBE_AGENTS: нужны агенты с уникальными именами")
+    return configs
+
+
+class ProbeAgent:
+    """Точка проверки в отдельном процессе со своим DNS-кэшем.
+
+    Процесс services/agent_worker.py запускается при первой проверке и
+    перезапускается, если завершился. Остановка цикла событий бота или
+    ошибка в одном агенте не затрагивают проверки остальных. Пачки
+    проверок передаются агенту по одной.
+    """
+
+    def __init__(
+        self,
+        config: AgentConfig,
+        timeout: float = constants.PROBE_AGENT_TIMEOUT,
+    ):
+        self.name = config.name
+        self.config = config
+        self.timeout = timeout
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._lock = asyncio.Lock()
+
+    async def _start(self) -> asyncio.subprocess.Process:
+        if self._process is None or self._process.returncode is not None:
+            self._process = await asyncio.create_subprocess_exec(
+                sys.executable,
+                WORKER_PATH,
+                json.dumps(asdict(self.config)),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                cwd=PROJECT_DIR,
+                env={**os.environ, "PYTHONPATH": PROJECT_DIR},
+            )
+            logger.info(
+                "Агент проверки запущен",
+                extra={"agent": self.name, "pid": self._process.pid},
+            )
+        return self._process
+
+    async def probe_many(
+        self, keys: List[ProbeKey]
+    ) -> Dict[ProbeKey, ProbeResult]:
+        """Проверяет пачку адресов в процессе агента.
+
+        Raises:
+            asyncio.TimeoutError: Если агент не ответил за timeout.
+            asyncio.IncompleteReadError: Если процесс агента завершился.
+        """
+        async with self._lock:
+            process = await self._start()
+            try:
+                process.stdin.write(encode_message(keys))
+                await process.stdin.drain()
+                return await asyncio.wait_for(
+                    read_message(process.stdout), self.timeout
+                )
+            except BaseException:
+                # Ответ мог остаться в канале и сдвинуть следующие пачки.
+                await self.stop()
+                raise
+
+    async def stop(self) -> None:
+        process, self._process = self._process, None
+        if process is None or process.returncode is not None:
+            return
+        process.stdin.close()
+        try:
+            await asyncio.wait_for(process.wait(), constants.PROBE_TIMEOUT)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+
+
+class ResultQuorum:
+    """Объединяет результаты агентов и решает, недоступен ли адрес.
+
+    Агенты сообщают результаты пачками, для каждого адреса хранится
+    последний результат каждого агента. Адрес недоступен, только если
+    не меньше quorum агентов получили ошибку за последние window
+    секунд. Если свежих результатов меньше кворума, решает большинство
+    из них, а если свежих нет совсем - самый новый результат.
+    """
+
+    def __init__(self, quorum: int, window: float):
+        self.quorum = quorum
+        self.window = window
+        self._reports: Dict[ProbeKey, Dict[str, ProbeResult]] = {}
+
+    def report(
+        self, agent: str, results: Dict[ProbeKey, ProbeResult]
+    ) -> None:
+        for key, result in results.items():
+            self._reports.setdefault(key, {})[agent] = result
+
+    def verdict(
+        self, key: ProbeKey, now: Optional[float] = None
+    ) -> Optional[ProbeResult]:
+        """Возвращает результат адреса с учетом голосов агентов.
+
+        Args:
+            key (ProbeKey): Пара (url, проверки).
+            now (Optional[float]): Текущее время, по умолчанию time.time().
+
+        Returns:
+            Optional[ProbeResult]: Результат одного из агентов, согласный
+            с решением, с числом голосов за недоступность, или None, если
+            агенты еще не сообщали о паре.
+        """
+        now = time.time() if now is None else now
+        reports = self._reports.get(key, {})
+        if not reports:
+            return None
+        fresh = {
+            agent: result
+            for agent, result in reports.items()
+            if now - result.checked_at <= self.window
+        }
+        if not fresh:
+            newest = max(reports.values(), key=lambda result: result.checked_at)
+            return replace(
+                newest, down_votes=int(not newest.ok), votes=1
+            )
+        failed = [agent for agent, result in fresh.items() if not result.ok]
+        passed = [agent for agent, result in fresh.items() if result.ok]
+        quorum = (
+            self.quorum if len(fresh) >= self.quorum else len(fresh) // 2 + 1
+        )
+        if len(failed) >= quorum:
+            agent = failed[0]
+        else:
+            agent = passed[0]
+            for overruled in failed:
+                probe_unconfirmed_failures.inc(agent=overruled)
+        return replace(
+            fresh[agent], down_votes=len(failed), votes=len(fresh)
+        )
+
+    def prune(self, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        for key in list(self._reports):
+            if all(
+                now - result.checked_at > self.window
+                for result in self._reports[key].values()
+            ):
+                del self._reports[key]
+
+
+class ProbeAgents:
+    """Агенты проверки, выполняющие одни и те же проверки параллельно."""
+
+    def __init__(
+        self,
+        configs: List[AgentConfig],
+        quorum: Optional[int] = None,
+        window: float = constants.PROBE_QUORUM_WINDOW,
+    ):
+        self.agents = [ProbeAgent(config) for config in configs]
+        self.quorum = ResultQuorum(
+            quorum or len(self.agents) // 2 + 1, window
+        )
+
+    async def probe_many(
+        self, keys: Iterable[ProbeKey]
+    ) -> Dict[ProbeKey, ProbeResult]:
+        """Проверяет адреса всеми агентами и объединяет результаты.
+
+        Args:
+            keys (Iterable[ProbeKey]): Пары (url, проверки), возможно с повторами.
+
+        Агент, проверка которого завершилась исключением, в голосовании
+        не участвует.
+
+        Returns:
+            Dict[ProbeKey, ProbeResult]: Решение кворума по каждой паре,
+            для которой есть хотя бы один результат.
+        """
+        keys = list(keys)
+        unique = list(dict.fromkeys(keys))
+        if len(keys) > len(unique):
+            probes_coalesced.inc(len(keys) - len(unique), source="sweep")
+        batches = await asyncio.gather(
+            *(agent.probe_many(unique) for agent in self.agents),
+            return_exceptions=True,
+        )
+        for agent, results in zip(self.agents, batches):
+            if isinstance(results, Exception):
+                logger.error(
+                    "Агент проверки завершился с ошибкой",
+                    extra={"agent": agent.name, "error": repr(results)},
+                )
+                continue
+            self.quorum.report(agent.name, results)
+            # Метрики процессов агентов боту не видны, кроме этой.
+            for result in results.values():
+                if result.certificate is not None:
+                    certificate_expiry.set(
+                        result.certificate.not_after.timestamp(),
+                        host=result.certificate.host,
+                    )
+        now = time.time()
+        merged = {}
+        for key in unique:
+            result = self.quorum.verdict(key, now)
+            if result is not None:
+                merged[key] = result
+        self.quorum.prune(now)
+        return merged
+
+    async def stop(self) -> None:
+        """Завершает процессы агентов."""
+        await asyncio.gather(*(agent.stop() for agent in self.agents))
+
+
+probe_agents = ProbeAgents(
+    load_agents(constants.PROBE_AGENTS), constants.PROBE_QUORUM
+)
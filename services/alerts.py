@@ -0,0 +1,67 @@
+from typing import Dict, List
+
+from bot import constants
+
+
+class AlertAggregator:
+    """Собирает уведомления проверок в сводку для отправки одним сообщением.
+
+    Уведомления копятся в течение окна группировки, повтор уведомления
+    для того же ключа внутри окна заменяет предыдущее. После окна
+    каждый пользователь получает одну сводку по своим приложениям вместо
+    отдельного сообщения на каждое приложение.
+    """
+
+    def __init__(self, max_length: int = constants.MAX_MESSAGE_LENGTH):
+        self.max_length = max_length
+        self.flush_scheduled = False
+        self._alerts: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+    def add(self, application_id: int, message: str) -> None:
+        """Добавляет уведомление в текущую сводку.
+
+        Args:
+            application_id (int): Идентификатор приложения, по нему ищутся подписчики.
+            message (str): Текст уведомления.
+        """
+        self._alerts[application_id] = message
+
+    def drain(self) -> Dict[int, str]:
+        """Забирает накопленные уведомления.
+
+        Returns:
+            Dict[int, str]: Тексты уведомлений по id приложения в порядке добавления.
+        """
+        alerts = self._alerts
+        self._alerts = {}
+        self.flush_scheduled = False
+        return alerts
+
+    def build_digest(self, alerts: List[str]) -> List[str]:
+        """Собирает уведомления в сводку.
+
+        Args:
+            alerts (List[str]): Тексты уведомлений.
+
+        Returns:
+            List[str]: Сообщения сводки, каждое не длиннее max_length.
+        """
+        if len(alerts) <= 1:
+            return alerts
+        messages = []
+        current = constants.ALERT_DIGEST_HEADER.format(len(alerts))
+        for alert in alerts:
+            line = "\n" + alert
+            if len(current) + len(line) > self.max_length:
+                messages.append(current)
+                current = alert
+            else:
+                current += line
+        messages.append(current)
+        return messages
+
+
+alert_aggregator = AlertAggregator()
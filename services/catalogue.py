@@ -0,0 +1,177 @@
+import asyncio
+import json
+import logging
+from typing import Dict, List, Optional, Set
+
+import asyncpg
+from sqlalchemy.exc import SQLAlchemyError
+from yarl import URL
+
+from bot import constants
+from core.db import get_engine, get_session_maker
+from services import application_service
+from services.monitoring import MonitoredTarget
+from services.probe import ProbeAssertions
+
+logger = logging.getLogger("BOT.catalogue")
+
+
+class Catalogue:
+    """Каталог приложений в памяти процесса.
+
+    Загружается из БД один раз, а затем применяет изменения из
+    уведомлений, которые триггер таблицы application публикует через
+    NOTIFY. Версия растет при каждом изменении и служит ключом кэшей,
+    построенных по каталогу. После потери соединения LISTEN каталог
+    переподключается и загружается заново, так как уведомления за время
+    разрыва потеряны.
+    """
+
+    def __init__(self, channel: str = constants.CATALOGUE_CHANNEL):
+        self.channel = channel
+        self.version = 0
+        self._targets: Dict[int, MonitoredTarget] = {}
+        # Приложения, состояние проверок которых менялось после сохранения.
+        self._changed: Dict[int, MonitoredTarget] = {}
+        self._connection: Optional[asyncpg.Connection] = None
+        self._pending: Optional[List[dict]] = None
+        self._stopped = False
+
+    def targets(self) -> List[MonitoredTarget]:
+        return list(self._targets.values())
+
+    def get(self, application_id: int) -> Optional[MonitoredTarget]:
+        return self._targets.get(application_id)
+
+    def hosts(self) -> Set[str]:
+        """Возвращает хосты адресов приложений каталога."""
+        return {URL(target.url).host for target in self._targets.values()}
+
+    def changed_targets(self) -> List[MonitoredTarget]:
+        """Возвращает приложения с несохраненным состоянием проверок.
+
+        Приложения остаются в списке, пока save_monitoring_state не
+        отметит их сохраненными, поэтому ошибка записи ничего не теряет.
+
+        Returns:
+            List[MonitoredTarget]: Измененные приложения каталога.
+        """
+        changed = [
+            target
+            for target in self._changed.values()
+            if target.dirty and self._targets.get(target.id) is target
+        ]
+        self._changed.clear()
+        for target in changed:
+            self._changed[target.id] = target
+        return changed
+
+    async def start(self) -> None:
+        """Подписывается на уведомления и загружает каталог."""
+        self._stopped = False
+        dsn = get_engine().url.set(drivername="postgresql").render_as_string(
+            hide_password=False
+        )
+        connection = await asyncpg.connect(dsn)
+        # Подписка до загрузки: изменения, пришедшие во время чтения
+        # таблицы, откладываются и применяются поверх снимка.
+        self._pending = []
+        try:
+            await connection.add_listener(self.channel, self._on_notification)
+            await self.reload()
+            if connection.is_closed():
+                raise ConnectionError("LISTEN connection closed during reload")
+        except BaseException:
+            self._pending = None
+            await connection.close()
+            raise
+        connection.add_termination_listener(self._on_termination)
+        self._connection = connection
+
+    async def reload(self) -> None:
+        # Снимок должен включать все изменения до LISTEN, поэтому с primary.
+        async with get_session_maker(primary=True)() as session:
+            targets = await application_service.get_monitoring_snapshot(
+                session
+            )
+        self._targets = {target.id: target for target in targets}
+        self._changed.clear()
+        for target in targets:
+            target.track(self._changed)
+        pending, self._pending = self._pending or [], None
+        for change in pending:
+            self.apply(change)
+        self.version += 1
+        logger.info(
+            "Каталог загружен", extra={"applications": len(self._targets)}
+        )
+
+    def apply(self, change: dict) -> None:
+        """Применяет к каталогу одно изменение из уведомления.
+
+        Args:
+            change (dict): Операция op и данные строки application.
+        """
+        if change["op"] == "DELETE":
+            self._targets.pop(change["id"], None)
+            self._changed.pop(change["id"], None)
+        else:
+            assertion_values = [
+                change.get(column) for column in ProbeAssertions.COLUMNS
+            ]
+            target = self._targets.get(change["id"])
+            if target is None:
+                # Новое приложение получит время проверки от планировщика.
+                target = self._targets[change["id"]] = MonitoredTarget(
+                    change["id"],
+                    change["name"],
+                    change["url"],
+                    change["ads_url"],
+                    0,
+                    change.get("check_interval"),
+                    False,
+                    None,
+                    None,
+                    *assertion_values,
+                )
+                target.track(self._changed)
+            else:
+                target.name = change["name"]
+                target.url = change["url"]
+                target.ads_url = change["ads_url"]
+                target.check_interval = change.get("check_interval")
+                target.assertions = ProbeAssertions.build(*assertion_values)
+        self.version += 1
+
+    def _on_notification(self, connection, pid, channel, payload) -> None:
+        change = json.loads(payload)
+        if self._pending is not None:
+            self._pending.append(change)
+            return
+        self.apply(change)
+
+    def _on_termination(self, connection) -> None:
+        if not self._stopped:
+            logger.warning("Соединение LISTEN каталога потеряно")
+            asyncio.ensure_future(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        while not self._stopped:
+            await asyncio.sleep(constants.CATALOGUE_RECONNECT_DELAY)
+            try:
+                await self.start()
+                return
+            except (OSError, asyncpg.PostgresError, SQLAlchemyError) as error:
+                logger.error(
+                    "Не удалось переподключить каталог: %s", error
+                )
+
+    async def stop(self) -> None:
+        self._stopped = True
+        if self._connection is not None:
+            self._connection.remove_termination_listener(self._on_termination)
+            await self._connection.close()
+            self._connection = None
+
+
+catalogue = Catalogue()
@@ -0,0 +1,106 @@
+from datetime import datetime
+from typing import Dict, Optional
+
+from services.probe import ProbeAssertions
+
+
+class MonitoredTarget:
+    """Компактный снимок приложения для цикла проверок.
+
+    Загружается проекцией колонок без ORM и identity map, а изменения
+    состояния проверок (счетчик ошибок, состояние цепи, время последней
+    и следующей проверки) сохраняются пачкой после проверки через
+    ApplicationServices.save_monitoring_state.
+
+    Присвоение полей STATE добавляет снимок в словарь changes, если он
+    задан, поэтому для сохранения не нужно обходить весь каталог.
+    """
+
+    __slots__ = (
+        "id",
+        "name",
+        "url",
+        "ads_url",
+        "failure_counter",
+        "check_interval",
+        "circuit_open",
+        "last_checked_at",
+        "next_check_at",
+        "assertions",
+        "_synced_state",
+        "_changes",
+    )
+
+    # Поля, которые пишет цикл проверок.
+    STATE = (
+        "failure_counter",
+        "circuit_open",
+        "last_checked_at",
+        "next_check_at",
+    )
+
+    COLUMNS = (
+        "id",
+        "name",
+        "url",
+        "ads_url",
+        "failure_counter",
+        "check_interval",
+        "circuit_open",
+        "last_checked_at",
+        "next_check_at",
+    ) + ProbeAssertions.COLUMNS
+
+    def __init__(
+        self,
+        id: int,
+        name: str,
+        url: str,
+        ads_url: str,
+        failure_counter: int,
+        check_interval: Optional[int] = None,
+        circuit_open: bool = False,
+        last_checked_at: Optional[datetime] = None,
+        next_check_at: Optional[datetime] = None,
+        *assertion_values,
+    ):
+        self._changes: Optional[Dict[int, "MonitoredTarget"]] = None
+        self.id = id
+        self.name = name
+        self.url = url
+        self.ads_url = ads_url
+        self.failure_counter = failure_counter
+        self.check_interval = check_interval
+        self.circuit_open = circuit_open
+        self.last_checked_at = last_checked_at
+        self.next_check_at = next_check_at
+        self.assertions = ProbeAssertions.build(*assertion_values)
+        self.mark_synced()
+
+    def __setattr__(self, name: str, value) -> None:
+        object.__setattr__(self, name, value)
+        if name in _STATE and self._changes is not None:
+            self._changes[self.id] = self
+
+    def track(self, changes: Dict[int, "MonitoredTarget"]) -> None:
+        """Начинает отмечать изменения состояния в словаре changes."""
+        self._changes = changes
+        if self.dirty:
+            changes[self.id] = self
+
+    def state(self) -> dict:
+        return {name: getattr(self, name) for name in self.STATE}
+
+    @property
+    def dirty(self) -> bool:
+        current = tuple(getattr(self, name) for name in self.STATE)
+        return current != self._synced_state
+
+    def mark_synced(self) -> None:
+        self._synced_state = tuple(getattr(self, name) for name in self.STATE)
+
+    def __repr__(self):
+        return f"Application {self.name} - url: {self.url}"
+
+
+_STATE = frozenset(MonitoredTarget.STATE)
@@ -0,0 +1,287 @@
+import asyncio
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Pattern, Tuple
+
+import aiohttp
+
+from bot import constants
+from core.metrics import probes_coalesced, probes_in_flight
+from core.resolver import DNSResolutionError
+from core.certificates import CertificateInfo, certificate_cache
+from core.tracing import ProbeTimings, track_timings, untrack_timings
+
+
+@dataclass(frozen=True)
+class ProbeAssertions:
+    """Дополнительные проверки ответа приложения.
+
+    Ожидаемое содержимое ищется в теле ответа, которое читается
+    частями и только до первого совпадения. Регулярное выражение
+    применяется к окну из последних PROBE_REGEX_WINDOW байт, поэтому
+    совпадения длиннее окна не находятся.
+    """
+
+    COLUMNS = (
+        "expected_content",
+        "content_is_regex",
+        "max_body_size",
+        "expected_headers",
+        "latency_slo",
+    )
+
+    expected_content: Optional[str] = None
+    content_is_regex: bool = False
+    max_body_size: Optional[int] = None
+    # Словарь не хешируется; равные проверки все равно получают равный хеш.
+    expected_headers: Optional[Dict[str, str]] = field(default=None, hash=False)
+    latency_slo: Optional[float] = None
+    pattern: Optional[Pattern[bytes]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        if self.expected_content and self.content_is_regex:
+            object.__setattr__(
+                self, "pattern", re.compile(self.expected_content.encode())
+            )
+
+    @classmethod
+    def build(cls, *values) -> Optional["ProbeAssertions"]:
+        """Создает проверки из значений колонок COLUMNS.
+
+        Returns:
+            Optional[ProbeAssertions]: Проверки или None, если ни одна не задана.
+        """
+        assertions = cls(*values)
+        if (
+            assertions.expected_content
+            or assertions.max_body_size
+            or assertions.expected_headers
+            or assertions.latency_slo
+        ):
+            return assertions
+        return None
+
+
+@dataclass
+class ProbeResult:
+    """Результат одной проверки доступности приложения."""
+
+    url: str
+    status: Optional[int] = None
+    error: Optional[str] = None
+    dns_error: bool = False
+    tls_error: bool = False
+    assertion_error: Optional[str] = None
+    degraded: bool = False
+    # Сколько агентов проверки сочли адрес недоступным и сколько ответили.
+    down_votes: int = 0
+    votes: int = 1
+    certificate: Optional[CertificateInfo] = None
+    timings: ProbeTimings = field(default_factory=ProbeTimings)
+    # Время завершения проверки, по нему результат участвует в кворуме.
+    checked_at: float = field(default_factory=time.time)
+
+    @property
+    def ok(self) -> bool:
+        return (
+            self.status == constants.HTTP_200_OK and self.assertion_error is None
+        )
+
+
+def _check_headers(
+    response: aiohttp.ClientResponse, expected: Dict[str, str]
+) -> Optional[str]:
+    for name, value in expected.items():
+        actual = response.headers.get(name)
+        if actual is None or value not in actual:
+            return constants.ASSERTION_HEADER_MISMATCH.format(name)
+    return None
+
+
+async def _check_body(
+    response: aiohttp.ClientResponse, assertions: ProbeAssertions
+) -> Optional[str]:
+    limit = assertions.max_body_size
+    if (
+        limit is not None
+        and response.content_length is not None
+        and response.content_length > limit
+    ):
+        return constants.ASSERTION_BODY_TOO_LARGE.format(limit)
+    if assertions.expected_content is None:
+        # Нужен только размер, а заголовок Content-Length его не сообщил.
+        needle = None
+        read_limit = limit
+    else:
+        needle = assertions.expected_content.encode()
+        read_limit = limit or constants.PROBE_MAX_BODY_SIZE
+    # Совпадение может попасть на границу частей, поэтому поиск идет по
+    # хвосту предыдущей части вместе с новой.
+    keep = (
+        constants.PROBE_REGEX_WINDOW
+        if assertions.pattern is not None
+        else max(len(needle or b"") - 1, 0)
+    )
+    found = needle is None
+    read = 0
+    tail = b""
+    async for chunk in response.content.iter_chunked(
+        constants.PROBE_CHUNK_SIZE
+    ):
+        read += len(chunk)
+        if not found:
+            window = tail + chunk
+            if assertions.pattern is not None:
+                found = assertions.pattern.search(window) is not None
+            else:
+                found = needle in window
+            tail = window[-keep:] if keep else b""
+        if read > read_limit:
+            break
+        # Размер уже проверен по Content-Length или не ограничен.
+        if found and (limit is None or response.content_length is not None):
+            break
+    if limit is not None and read > limit:
+        return constants.ASSERTION_BODY_TOO_LARGE.format(limit)
+    if not found:
+        return constants.ASSERTION_CONTENT_NOT_FOUND.format(read)
+    return None
+
+
+async def probe(
+    http_session: aiohttp.ClientSession,
+    url: str,
+    assertions: Optional[ProbeAssertions] = None,
+) -> ProbeResult:
+    """Выполняет проверку url и замеряет этапы запроса.
+
+    Args:
+        http_session (aiohttp.ClientSession): Сессия из create_probe_session.
+        url (str): Адрес для проверки.
+        assertions (Optional[ProbeAssertions]): Проверки ответа со статусом 200.
+
+    Returns:
+        ProbeResult: Статус ответа или описание ошибки вместе с замерами.
+    """
+    result = ProbeResult(url)
+    token = track_timings(result.timings)
+    started = time.monotonic()
+    probes_in_flight.inc()
+    try:
+        async with http_session.get(
+            url, trace_request_ctx=result.timings
+        ) as response:
+            result.status = response.status
+            if response.url.scheme == "https":
+                result.certificate = certificate_cache.get(response.url.host)
+            if assertions is not None and response.status == constants.HTTP_200_OK:
+                if assertions.expected_headers:
+                    result.assertion_error = _check_headers(
+                        response, assertions.expected_headers
+                    )
+                if result.assertion_error is None and (
+                    assertions.expected_content or assertions.max_body_size
+                ):
+                    result.assertion_error = await _check_body(
+                        response, assertions
+                    )
+                # Непрочитанный остаток тела не нужен, соединение закрывается.
+                response.close()
+    except aiohttp.ClientConnectorError as error:
+        result.tls_error = isinstance(error, aiohttp.ClientSSLError)
+        result.dns_error = isinstance(error.__cause__, DNSResolutionError)
+        result.error = str(error.__cause__ if result.dns_error else error)
+    except aiohttp.ClientError as error:
+        result.error = str(error)
+    except asyncio.TimeoutError:
+        result.error = constants.PROBE_TIMEOUT_ERROR.format(
+            http_session.timeout.total
+        )
+    finally:
+        result.timings.total = time.monotonic() - started
+        result.checked_at = time.time()
+        probes_in_flight.dec()
+        untrack_timings(token)
+    if assertions is not None and assertions.latency_slo is not None:
+        result.degraded = (
+            result.ok and result.timings.total > assertions.latency_slo
+        )
+    return result
+
+
+ProbeKey = Tuple[str, Optional[ProbeAssertions]]
+
+_in_flight: Dict[Tuple[str, ProbeKey], asyncio.Task] = {}
+
+
+async def probe_once(
+    http_session: aiohttp.ClientSession,
+    url: str,
+    assertions: Optional[ProbeAssertions] = None,
+    agent: str = constants.DEFAULT_PROBE_AGENT,
+) -> ProbeResult:
+    """Выполняет проверку, присоединяясь к уже идущей проверке того же адреса.
+
+    Одновременные вызовы одного агента с одинаковыми url и проверками
+    получают результат одного запроса. Отмена одного из ожидающих не
+    отменяет запрос для остальных.
+
+    Args:
+        http_session (aiohttp.ClientSession): Сессия из create_probe_session.
+        url (str): Адрес для проверки.
+        assertions (Optional[ProbeAssertions]): Проверки ответа со статусом 200.
+        agent (str): Имя агента проверки, выполняющего запрос.
+
+    Returns:
+        ProbeResult: Результат проверки.
+    """
+    key = (agent, (url, assertions))
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(probe(http_session, url, assertions))
+        _in_flight[key] = task
+        task.add_done_callback(lambda _: _in_flight.pop(key, None))
+    else:
+        probes_coalesced.inc(source="in_flight")
+    return await asyncio.shield(task)
+
+
+async def probe_many(
+    http_session: aiohttp.ClientSession,
+    keys: Iterable[ProbeKey],
+    concurrency: int = constants.PROBE_CONCURRENCY,
+    agent: str = constants.DEFAULT_PROBE_AGENT,
+) -> Dict[ProbeKey, ProbeResult]:
+    """Проверяет каждый уникальный адрес один раз.
+
+    Args:
+        http_session (aiohttp.ClientSession): Сессия из create_probe_session.
+        keys (Iterable[ProbeKey]): Пары (url, проверки), возможно с повторами.
+        concurrency (int): Максимальное количество одновременных проверок.
+        agent (str): Имя агента проверки, выполняющего запросы.
+
+    Returns:
+        Dict[ProbeKey, ProbeResult]: Результат для каждой уникальной пары.
+    """
+    keys = list(keys)
+    unique = list(dict.fromkeys(keys))
+    if len(keys) > len(unique):
+        probes_coalesced.inc(len(keys) - len(unique), source="sweep")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(key: ProbeKey) -> ProbeResult:
+        async with semaphore:
+            return await probe_once(http_session, *key, agent=agent)
+
+    results = await asyncio.gather(*(run(key) for key in unique))
+    return dict(zip(unique, results))
+
+
+# Последний результат проверки по id приложения.
+last_results: Dict[int, ProbeResult] = {}
+
+# Последний результат проверки ads_url по id приложения.
+last_ads_results: Dict[int, ProbeResult] = {}
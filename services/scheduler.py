@@ -0,0 +1,106 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from bot import constants
+from core.db import get_session_maker
+from services import setting_service
+from services.monitoring import MonitoredTarget
+
+logger = logging.getLogger("BOT.scheduler")
+
+# Дробная часть id * золотое сечение равномерно распределяет приложения
+# по интервалу и не меняется между перезапусками.
+_GOLDEN_RATIO = 0.6180339887498949
+
+
+class Scheduler:
+    """Расписание проверок приложений.
+
+    У каждого приложения свое время следующей проверки, которое
+    хранится в БД вместе с состоянием проверок. Приложения без
+    расписания и просроченные за время простоя бота получают время со
+    смещением внутри интервала, поэтому после перезапуска проверки
+    идут равномерно, а не одной волной.
+    """
+
+    def __init__(self, interval: int = constants.INTERVAL_DEFAULT_VALUE):
+        self.interval = interval
+
+    def interval_for(self, target: MonitoredTarget) -> int:
+        return target.check_interval or self.interval
+
+    def stagger(self, target: MonitoredTarget, now: datetime) -> datetime:
+        offset = (target.id * _GOLDEN_RATIO) % 1 * self.interval_for(target)
+        return now + timedelta(seconds=offset)
+
+    async def start(self, targets: List[MonitoredTarget]) -> None:
+        """Загружает общий интервал из БД и восстанавливает расписание.
+
+        Args:
+            targets (List[MonitoredTarget]): Приложения каталога.
+        """
+        async with get_session_maker()() as session:
+            self.interval = await setting_service.get_interval(session)
+        self.restore(targets, datetime.now(timezone.utc))
+        logger.info(
+            "Расписание проверок восстановлено",
+            extra={"interval": self.interval, "applications": len(targets)},
+        )
+
+    def restore(self, targets: List[MonitoredTarget], now: datetime) -> None:
+        """Разносит по интервалу проверки, пропущенные за время простоя.
+
+        Args:
+            targets (List[MonitoredTarget]): Приложения каталога.
+            now (datetime): Текущее время.
+        """
+        for target in targets:
+            if target.next_check_at is None or target.next_check_at <= now:
+                target.next_check_at = self.stagger(target, now)
+
+    def due(
+        self, targets: List[MonitoredTarget], now: datetime
+    ) -> List[MonitoredTarget]:
+        """Возвращает приложения, время проверки которых наступило.
+
+        Args:
+            targets (List[MonitoredTarget]): Приложения каталога.
+            now (datetime): Текущее время.
+
+        Returns:
+            List[MonitoredTarget]: Приложения для проверки.
+        """
+        due = []
+        for target in targets:
+            if target.next_check_at is None:
+                target.next_check_at = self.stagger(target, now)
+            if target.next_check_at <= now:
+                due.append(target)
+        return due
+
+    def checked(self, target: MonitoredTarget, now: datetime) -> None:
+        target.last_checked_at = now
+        target.next_check_at = now + timedelta(
+            seconds=self.interval_for(target)
+        )
+
+    def reschedule(self, targets: List[MonitoredTarget], now: datetime) -> None:
+        """Пересчитывает время проверок после смены интервала.
+
+        Args:
+            targets (List[MonitoredTarget]): Приложения каталога.
+            now (datetime): Текущее время.
+        """
+        for target in targets:
+            if target.last_checked_at is None:
+                target.next_check_at = self.stagger(target, now)
+            else:
+                target.next_check_at = max(
+                    target.last_checked_at
+                    + timedelta(seconds=self.interval_for(target)),
+                    now,
+                )
+
+
+scheduler = Scheduler()
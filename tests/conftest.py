@@ -0,0 +1,76 @@
+import os
+from dataclasses import dataclass
+from typing import Callable
+
+# core импортируется первым: bot.constants и core.db ссылаются друг на друга.
+import core  # noqa: F401
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from core.db import Base
+from repositories import ApplicationRepository, SubscriptionRepository, UserRepository
+from repositories.memory import (
+    ApplicationMemoryRepository,
+    SubscriptionMemoryRepository,
+    UserMemoryRepository,
+)
+from utils.memory_repository import MemorySession, clear_memory_tables
+
+BACKENDS = ["memory", "sqlite"]
+if os.getenv("TEST_DB_URL"):
+    BACKENDS.append("postgres")
+
+
+@dataclass
+class Backend:
+    """Репозитории и фабрика сессий одного хранилища."""
+
+    name: str
+    applications: object
+    users: object
+    subscriptions: object
+    session: Callable
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def memory_tables():
+    clear_memory_tables()
+
+
+@pytest.fixture(params=BACKENDS)
+async def backend(request):
+    if request.param == "memory":
+        yield Backend(
+            "memory",
+            ApplicationMemoryRepository(),
+            UserMemoryRepository(),
+            SubscriptionMemoryRepository(),
+            MemorySession,
+        )
+        return
+    url = (
+        "sqlite+aiosqlite://"
+        if request.param == "sqlite"
+        else os.environ["TEST_DB_URL"]
+    )
+    engine = create_async_engine(url)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+    try:
+        yield Backend(
+            request.param,
+            ApplicationRepository(),
+            UserRepository(),
+            SubscriptionRepository(),
+            lambda: AsyncSession(engine, expire_on_commit=False),
+        )
+    finally:
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
@@ -0,0 +1,113 @@
+import time
+
+import pytest
+
+from services.agents import AgentConfig, ProbeAgent, ProbeAgents, ResultQuorum
+from services.probe import ProbeResult
+
+KEY = ("https://a.example", None)
+
+
+def result(ok: bool, checked_at: float) -> ProbeResult:
+    return ProbeResult(
+        KEY[0],
+        status=200 if ok else None,
+        error=None if ok else "down",
+        checked_at=checked_at,
+    )
+
+
+def test_verdict_requires_quorum_of_failures():
+    quorum = ResultQuorum(quorum=2, window=60)
+    quorum.report("a", {KEY: result(False, 100)})
+    quorum.report("b", {KEY: result(True, 100)})
+    quorum.report("c", {KEY: result(True, 100)})
+    verdict = quorum.verdict(KEY, now=110)
+    assert verdict.ok
+    assert (verdict.down_votes, verdict.votes) == (1, 3)
+
+    quorum.report("b", {KEY: result(False, 105)})
+    verdict = quorum.verdict(KEY, now=110)
+    assert not verdict.ok
+    assert (verdict.down_votes, verdict.votes) == (2, 3)
+
+
+def test_verdict_ignores_results_outside_window():
+    quorum = ResultQuorum(quorum=2, window=60)
+    quorum.report("a", {KEY: result(False, 0)})
+    quorum.report("b", {KEY: result(False, 0)})
+    quorum.report("c", {KEY: result(True, 100)})
+    verdict = quorum.verdict(KEY, now=110)
+    assert verdict.ok
+    assert verdict.votes == 1
+
+
+def test_verdict_uses_majority_when_fewer_fresh_than_quorum():
+    quorum = ResultQuorum(quorum=3, window=60)
+    quorum.report("a", {KEY: result(False, 100)})
+    quorum.report("b", {KEY: result(False, 100)})
+    quorum.report("c", {KEY: result(True, 0)})
+    verdict = quorum.verdict(KEY, now=110)
+    assert not verdict.ok
+    assert (verdict.down_votes, verdict.votes) == (2, 2)
+
+
+def test_verdict_falls_back_to_newest_stale_result():
+    quorum = ResultQuorum(quorum=2, window=60)
+    assert quorum.verdict(KEY, now=0) is None
+    quorum.report("a", {KEY: result(True, 0)})
+    quorum.report("b", {KEY: result(False, 10)})
+    verdict = quorum.verdict(KEY, now=1000)
+    assert not verdict.ok
+    assert (verdict.down_votes, verdict.votes) == (1, 1)
+
+
+class _FakeAgent:
+    def __init__(self, name, outcome):
+        self.name = name
+        self.outcome = outcome
+
+    async def probe_many(self, keys):
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return {key: result(self.outcome, time.time()) for key in keys}
+
+
+@pytest.mark.anyio
+async def test_failing_agent_does_not_vote():
+    agents = ProbeAgents([], quorum=2)
+    agents.agents = [
+        _FakeAgent("a", False),
+        _FakeAgent("b", RuntimeError("crashed")),
+        _FakeAgent("c", True),
+    ]
+    merged = await agents.probe_many([KEY])
+    assert merged[KEY].votes == 2
+    assert merged[KEY].ok
+
+    agents.agents = [_FakeAgent("d", RuntimeError("crashed"))]
+    agents.quorum = ResultQuorum(2, 60)
+    assert await agents.probe_many([KEY]) == {}
+
+
+@pytest.mark.anyio
+async def test_agent_process_round_trip():
+    agent = ProbeAgent(AgentConfig("test"), timeout=30)
+    try:
+        # На порту 1 никто не слушает: проверка завершается ошибкой.
+        url = "http://127.0.0.1:1/"
+        results = await agent.probe_many([(url, None)])
+        first = agent._process.pid
+        assert not results[(url, None)].ok
+        assert results[(url, None)].error
+        results = await agent.probe_many([(url, None)])
+        assert agent._process.pid == first
+        # Завершившийся процесс перезапускается при следующей пачке.
+        agent._process.kill()
+        await agent._process.wait()
+        results = await agent.probe_many([(url, None)])
+        assert agent._process.pid != first
+        assert not results[(url, None)].ok
+    finally:
+        await agent.stop()
+    assert agent._process is None
@@ -0,0 +1,49 @@
+from datetime import datetime, timezone
+
+from services.catalogue import Catalogue
+from services.monitoring import MonitoredTarget
+
+
+def make_catalogue(count: int) -> Catalogue:
+    catalogue = Catalogue()
+    catalogue._targets = {
+        number: MonitoredTarget(
+            number, str(number), f"https://{number}.example", "x", 0
+        )
+        for number in range(count)
+    }
+    for target in catalogue._targets.values():
+        target.track(catalogue._changed)
+    return catalogue
+
+
+def test_changed_targets_tracks_state_assignments():
+    catalogue = make_catalogue(5)
+    assert catalogue.changed_targets() == []
+    catalogue.get(1).failure_counter = 1
+    catalogue.get(3).next_check_at = datetime.now(timezone.utc)
+    # Имя не входит в состояние проверок.
+    catalogue.get(4).name = "renamed"
+    assert [target.id for target in catalogue.changed_targets()] == [1, 3]
+
+
+def test_changed_targets_kept_until_synced():
+    catalogue = make_catalogue(3)
+    target = catalogue.get(2)
+    target.failure_counter = 5
+    assert catalogue.changed_targets() == [target]
+    # Запись не удалась: приложение остается в списке.
+    assert catalogue.changed_targets() == [target]
+    target.mark_synced()
+    assert catalogue.changed_targets() == []
+    # Значение, возвращенное к сохраненному, не записывается.
+    target.failure_counter = 6
+    target.failure_counter = 5
+    assert catalogue.changed_targets() == []
+
+
+def test_deleted_targets_are_not_saved():
+    catalogue = make_catalogue(2)
+    catalogue.get(0).failure_counter = 1
+    catalogue.apply({"op": "DELETE", "id": 0})
+    assert catalogue.changed_targets() == []
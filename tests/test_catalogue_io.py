@@ -0,0 +1,41 @@
+from utils.catalogue_io import read_batches
+
+
+def read_all(path, file_format: str, batch_size: int = 2):
+    return [
+        row
+        for batch in read_batches(str(path), file_format, batch_size)
+        for row in batch
+    ]
+
+
+def test_csv_rows_are_numbered_by_file_line(tmp_path):
+    path = tmp_path / "catalogue.csv"
+    path.write_text(
+        'name,url\n'
+        'one,https://1.example\n'
+        '\n'
+        'two,"https://2.example"\n'
+        '"three\nlines",https://3.example\n'
+        'four,https://4.example\n',
+        encoding="utf-8",
+    )
+    rows = read_all(path, "csv")
+    assert [(number, row["name"]) for number, row in rows] == [
+        (2, "one"),
+        (4, "two"),
+        (6, "three\nlines"),
+        (7, "four"),
+    ]
+
+
+def test_jsonl_skips_blank_lines_and_keeps_numbers(tmp_path):
+    path = tmp_path / "catalogue.jsonl"
+    path.write_text(
+        '{"name": "one"}\n\n[1]\n{"name": "two"}\n', encoding="utf-8"
+    )
+    assert read_all(path, "jsonl") == [
+        (1, {"name": "one"}),
+        (3, {}),
+        (4, {"name": "two"}),
+    ]
@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta, timezone
+
+from core.certificates import CertificateCache, CertificateInfo
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def expiring(host: str, days: int) -> CertificateInfo:
+    return CertificateInfo(
+        host, host, "CA", datetime.now(timezone.utc) + timedelta(days=days)
+    )
+
+
+def test_should_alert_once_per_certificate():
+    cache = CertificateCache()
+    info = expiring("a.example", 3)
+    assert cache.should_alert(info)
+    assert not cache.should_alert(info)
+    assert not cache.should_alert(expiring("b.example", 30))
+    # Новый сертификат хоста заменяет прежний.
+    renewed = expiring("a.example", 5)
+    assert cache.should_alert(renewed)
+    assert len(cache._alerted) == 1
+
+
+def test_prune_removes_expired_and_removed_hosts():
+    cache = CertificateCache()
+    cache._alerted = {
+        "kept.example": NOW + timedelta(days=3),
+        "expired.example": NOW - timedelta(days=1),
+        "removed.example": NOW + timedelta(days=3),
+    }
+    pruned = cache.prune({"kept.example", "expired.example"}, now=NOW)
+    assert pruned == 2
+    assert list(cache._alerted) == ["kept.example"]
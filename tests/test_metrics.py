@@ -0,0 +1,7 @@
+from core.metrics import Counter
+
+
+def test_label_values_are_escaped():
+    counter = Counter("test_total", "Тест", ["host"])
+    counter.inc(host='a\\b"c\nd')
+    assert counter.samples() == ['test_total{host="a\\\\b\\"c\\nd"} 1']
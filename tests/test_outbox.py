@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from core.outbox import Outbox
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeBot:
+    """Записывает отправленные сообщения и отклоняет чаты из failing."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.sent = []
+
+    async def send_message(self, chat_id: int, text: str) -> None:
+        if chat_id in self.failing:
+            raise RuntimeError("Forbidden: bot was blocked by the user")
+        self.sent.append((chat_id, text))
+
+
+def chunks(outbox: Outbox, texts):
+    batch = [(text, object()) for text in texts]
+    return [chunk for chunk, _ in outbox._chunks(batch)]
+
+
+def test_chunks_fill_up_to_max_length():
+    outbox = Outbox(max_length=4096)
+    assert chunks(outbox, ["a" * 4096]) == ["a" * 4096]
+    # Вместе с разделителем ровно 4096 символов.
+    assert chunks(outbox, ["a" * 4093, "b"]) == ["a" * 4093 + "\n\nb"]
+    assert chunks(outbox, ["a" * 4094, "b"]) == ["a" * 4094, "b"]
+
+
+def test_chunks_split_text_over_max_length():
+    outbox = Outbox(max_length=4096)
+    assert chunks(outbox, ["a" * 4097]) == ["a" * 4096, "a"]
+    # Хвост длинного текста объединяется со следующим сообщением.
+    assert chunks(outbox, ["a" * 8193, "b"]) == [
+        "a" * 4096,
+        "a" * 4096,
+        "a\n\nb",
+    ]
+
+
+def test_chunk_futures_follow_their_messages():
+    outbox = Outbox(max_length=10)
+    first, second = object(), object()
+    result = list(outbox._chunks([("a" * 15, first), ("b", second)]))
+    assert result == [("a" * 10, [first]), ("aaaaa\n\nb", [first, second])]
+
+
+async def test_messages_within_delay_are_coalesced():
+    outbox = Outbox(delay=0.02, rate=1000)
+    bot = FakeBot()
+    await asyncio.gather(
+        outbox.send(bot, 1, "one"),
+        outbox.send(bot, 1, "two"),
+        outbox.send(bot, 2, "other"),
+        outbox.send(bot, 1, "three"),
+    )
+    assert sorted(bot.sent) == [(1, "one\n\ntwo\n\nthree"), (2, "other")]
+
+    # Сообщение после отправки пачки уходит отдельным вызовом.
+    await outbox.send(bot, 1, "four")
+    assert bot.sent[-1] == (1, "four")
+    assert len(bot.sent) == 3
+
+
+async def test_failing_chat_does_not_block_others():
+    outbox = Outbox(delay=0.02, rate=1000)
+    bot = FakeBot(failing={2})
+    results = await asyncio.gather(
+        outbox.send(bot, 1, "first"),
+        outbox.send(bot, 2, "blocked"),
+        outbox.send(bot, 2, "blocked again"),
+        outbox.send(bot, 3, "third"),
+        return_exceptions=True,
+    )
+    assert results[0] is None and results[3] is None
+    assert all(isinstance(error, RuntimeError) for error in results[1:3])
+    assert sorted(bot.sent) == [(1, "first"), (3, "third")]
@@ -0,0 +1,89 @@
+from typing import List, Optional
+
+import pytest
+
+from bot import constants
+from services.probe import ProbeAssertions, _check_body
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeContent:
+    """Поток тела ответа, отдающий заданные части и считающий прочитанные."""
+
+    def __init__(self, chunks: List[bytes]):
+        self.chunks = chunks
+        self.read = 0
+
+    async def iter_chunked(self, size: int):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+
+class FakeResponse:
+    def __init__(self, chunks: List[bytes], content_length: Optional[int] = None):
+        self.content = FakeContent(chunks)
+        self.content_length = content_length
+
+
+async def test_literal_split_across_chunks():
+    response = FakeResponse([b"xxx<h", b"tml>yyy"])
+    assertions = ProbeAssertions(expected_content="<html>")
+    assert await _check_body(response, assertions) is None
+
+
+async def test_regex_split_across_chunks():
+    response = FakeResponse([b"status: o", b"k; version 1", b".2"])
+    assertions = ProbeAssertions(
+        expected_content=r"status: ok; version \d+\.\d+", content_is_regex=True
+    )
+    assert await _check_body(response, assertions) is None
+
+
+async def test_regex_match_longer_than_window_not_found(monkeypatch):
+    monkeypatch.setattr(constants, "PROBE_REGEX_WINDOW", 8)
+    assertions = ProbeAssertions(
+        expected_content="begin.*end", content_is_regex=True
+    )
+    inside = FakeResponse([b"begin", b"xx", b"end"])
+    assert await _check_body(inside, assertions) is None
+    outside = FakeResponse([b"begin", b"xxxxxxxx", b"end"])
+    assert await _check_body(outside, assertions) == (
+        constants.ASSERTION_CONTENT_NOT_FOUND.format(16)
+    )
+
+
+async def test_reading_stops_after_match():
+    response = FakeResponse([b"a", b"ok", b"b", b"c"], content_length=5)
+    assertions = ProbeAssertions(expected_content="ok", max_body_size=100)
+    assert await _check_body(response, assertions) is None
+    assert response.content.read == 2
+
+
+async def test_reading_stops_at_size_limit():
+    response = FakeResponse([b"x" * 4] * 100)
+    assertions = ProbeAssertions(max_body_size=10)
+    assert await _check_body(response, assertions) == (
+        constants.ASSERTION_BODY_TOO_LARGE.format(10)
+    )
+    assert response.content.read == 3
+
+
+async def test_content_length_over_limit_is_not_read():
+    response = FakeResponse([b"x" * 20], content_length=20)
+    assertions = ProbeAssertions(expected_content="x", max_body_size=10)
+    assert await _check_body(response, assertions) == (
+        constants.ASSERTION_BODY_TOO_LARGE.format(10)
+    )
+    assert response.content.read == 0
+
+
+async def test_content_not_found_stops_at_default_limit(monkeypatch):
+    monkeypatch.setattr(constants, "PROBE_MAX_BODY_SIZE", 10)
+    response = FakeResponse([b"x" * 4] * 100)
+    assertions = ProbeAssertions(expected_content="ok")
+    assert await _check_body(response, assertions) == (
+        constants.ASSERTION_CONTENT_NOT_FOUND.format(12)
+    )
+    assert response.content.read == 3
@@ -0,0 +1,109 @@
+import pytest
+
+from bot import constants
+from core.rate_limit import RateLimiter, command_of
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+def make_limiter(clock, **kwargs) -> RateLimiter:
+    options = {
+        "limits": {"status": (0.5, 2)},
+        "default": (1, 3),
+        "max_buckets": 100,
+        "prune_interval": 60,
+    }
+    options.update(kwargs)
+    return RateLimiter(**options, clock=clock)
+
+
+def test_burst_then_refill(clock):
+    limiter = make_limiter(clock)
+    assert [limiter.allow(1, "status") for _ in range(3)] == [True, True, False]
+    # 0.5 токена в секунду: через секунду токена еще нет.
+    clock.now += 1
+    assert not limiter.allow(1, "status")
+    clock.now += 1
+    assert limiter.allow(1, "status")
+    assert not limiter.allow(1, "status")
+    # Запас не превышает burst.
+    clock.now += 100
+    assert [limiter.allow(1, "status") for _ in range(3)] == [True, True, False]
+
+
+def test_buckets_are_per_user_and_command(clock):
+    limiter = make_limiter(clock)
+    limiter.register(["faq"])
+    assert limiter.allow(1, "status") and limiter.allow(1, "status")
+    assert not limiter.allow(1, "status")
+    assert limiter.allow(2, "status")
+    # Зарегистрированная команда без лимита получает default.
+    assert [limiter.allow(1, "faq") for _ in range(4)] == [True] * 3 + [False]
+
+
+def test_unknown_commands_share_one_bucket(clock):
+    limiter = make_limiter(clock)
+    assert limiter.allow(1, "foo")
+    assert limiter.allow(1, "bar")
+    assert limiter.allow(1, "baz")
+    assert not limiter.allow(1, "qux")
+    assert list(limiter._buckets) == [(1, constants.RATE_LIMIT_UNKNOWN_COMMAND)]
+
+
+def test_full_buckets_are_pruned_on_overflow(clock):
+    limiter = make_limiter(clock, max_buckets=3)
+    limiter.allow(1, "status")
+    limiter.allow(2, "status")
+    limiter.allow(2, "status")
+    limiter.allow(3, "status")
+    # Корзины 1 и 3 восстановились, корзина 2 - еще нет.
+    clock.now += 2
+    limiter.allow(4, "status")
+    assert list(limiter._buckets) == [(2, "status"), (4, "status")]
+
+
+def test_least_recently_used_bucket_is_evicted(clock):
+    limiter = make_limiter(clock, max_buckets=3)
+    for user_id in (1, 2, 3):
+        limiter.allow(user_id, "status")
+        limiter.allow(user_id, "status")
+    limiter.allow(1, "status")
+    # Восстановившихся корзин нет: вытесняется давно не использованная.
+    limiter.allow(4, "status")
+    assert list(limiter._buckets) == [(3, "status"), (1, "status"), (4, "status")]
+
+
+def test_prune_runs_at_most_once_per_interval(clock):
+    limiter = make_limiter(clock, max_buckets=2)
+    limiter.allow(1, "status")
+    limiter.allow(2, "status")
+    limiter.allow(3, "status")
+    assert limiter._pruned_at == clock.now
+    pruned_at = clock.now
+    clock.now += 30
+    # Корзины 2 и 3 восстановились, но полный обход еще не разрешен.
+    limiter.allow(4, "status")
+    assert limiter._pruned_at == pruned_at
+    assert list(limiter._buckets) == [(3, "status"), (4, "status")]
+    clock.now += 30
+    limiter.allow(5, "status")
+    assert limiter._pruned_at == clock.now
+    assert list(limiter._buckets) == [(5, "status")]
+
+
+def test_command_of():
+    assert command_of("/Status@monitor_bot now") == "status"
+    assert command_of("status") is None
+    assert command_of("/") is None
+    assert command_of(None) is None
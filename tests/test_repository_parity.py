@@ -0,0 +1,232 @@
+"""Одинаковое поведение InMemoryRepository и SQLAlchemyRepository."""
+import pytest
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from database.models import Application
+from repositories.memory import ApplicationMemoryRepository
+from utils.memory_repository import MemorySession
+
+pytestmark = pytest.mark.anyio
+
+
+def application(number: int, **values) -> dict:
+    return {
+        "url": f"https://app{number}.example",
+        "name": f"app{number}",
+        "ads_url": f"https://ads{number}.example",
+        **values,
+    }
+
+
+async def test_create_applies_defaults(backend):
+    async with backend.session() as session:
+        await backend.applications.create_one(application(1), session)
+        created = await backend.applications.get_by_attr(
+            "url", "https://app1.example", session
+        )
+    assert created.id == 1
+    assert created.failure_counter == 0
+    assert created.circuit_open is False
+    assert created.expected_content is None
+
+
+async def test_unique_violation_raises_and_rolls_back(backend):
+    async with backend.session() as session:
+        await backend.applications.create_one(application(1), session)
+        with pytest.raises(IntegrityError):
+            await backend.applications.create_one(
+                application(1, name="other"), session
+            )
+        await session.rollback()
+        rows = await backend.applications.find_all_columns(("name",), session)
+    assert [tuple(row) for row in rows] == [("app1",)]
+
+
+async def test_not_null_violation_raises(backend):
+    async with backend.session() as session:
+        with pytest.raises(IntegrityError):
+            await backend.applications.create_one(
+                {"url": "https://app1.example", "name": "app1"}, session
+            )
+        await session.rollback()
+
+
+async def test_composite_unique_constraint(backend):
+    async with backend.session() as session:
+        await backend.users.create_one({"telegram_user_id": 10}, session)
+        await backend.applications.create_one(application(1), session)
+        await backend.subscriptions.create_one(
+            {"user_id": 1, "application_id": 1}, session
+        )
+        with pytest.raises(IntegrityError):
+            await backend.subscriptions.create_one(
+                {"user_id": 1, "application_id": 1}, session
+            )
+        await session.rollback()
+
+
+async def test_rollback_discards_uncommitted_insert(backend):
+    async with backend.session() as session:
+        await backend.applications.create_one(
+            application(1), session, to_commit=False
+        )
+        await session.rollback()
+        assert await backend.applications.find_all(session) == []
+
+
+async def test_insert_ignore_conflicts_skips_duplicates(backend):
+    async with backend.session() as session:
+        await backend.applications.create_one(application(1), session)
+        inserted = await backend.applications.insert_ignore_conflicts(
+            [application(1), application(2), application(2), application(3)],
+            "url",
+            session,
+        )
+        rows = await backend.applications.find_all_columns(("url",), session)
+    assert sorted(inserted) == ["https://app2.example", "https://app3.example"]
+    assert len(rows) == 3
+
+
+async def test_upsert_many_inserts_and_updates(backend):
+    async with backend.session() as session:
+        await backend.applications.create_one(application(1), session)
+        await backend.applications.upsert_many(
+            [application(1, name="renamed"), application(2)], "url", session
+        )
+        rows = await backend.applications.find_all_columns(
+            ("url", "name"), session
+        )
+    assert sorted(tuple(row) for row in rows) == [
+        ("https://app1.example", "renamed"),
+        ("https://app2.example", "app2"),
+    ]
+
+
+async def test_update_by_attrs_evaluates_expressions(backend):
+    async with backend.session() as session:
+        await backend.applications.insert_ignore_conflicts(
+            [application(1, failure_counter=2), application(2)], "id", session
+        )
+        updated = await backend.applications.update_by_attrs(
+            {"url": "https://app1.example"},
+            {
+                "failure_counter": Application.failure_counter + 1,
+                "last_checked_at": func.now(),
+            },
+            "id",
+            session,
+        )
+        first = await backend.applications.get_by_attr("id", 1, session)
+        second = await backend.applications.get_by_attr("id", 2, session)
+    assert updated == [1]
+    assert first.failure_counter == 3
+    assert first.last_checked_at is not None
+    assert second.failure_counter == 0
+    assert second.last_checked_at is None
+
+
+async def test_bulk_update_and_delete(backend):
+    async with backend.session() as session:
+        await backend.applications.insert_ignore_conflicts(
+            [application(1), application(2), application(3)], "id", session
+        )
+        await backend.applications.bulk_update(
+            [{"id": 1, "circuit_open": True}, {"id": 2, "circuit_open": True}],
+            session,
+        )
+        deleted = await backend.applications.delete_by_attrs(
+            {"circuit_open": True}, "id", session
+        )
+        remaining = await backend.applications.get_by_attr("id", 3, session)
+        await backend.applications.delete(remaining, session)
+        assert await backend.applications.find_all(session) == []
+    assert sorted(deleted) == [1, 2]
+
+
+async def test_stream_columns_batches_rows(backend):
+    async with backend.session() as session:
+        await backend.applications.insert_ignore_conflicts(
+            [application(number) for number in range(1, 6)], "id", session
+        )
+        batches = [
+            [tuple(row) for row in batch]
+            async for batch in backend.applications.stream_columns(
+                ("id",), session, 2
+            )
+        ]
+    assert sorted(row for batch in batches for row in batch) == [
+        (1,), (2,), (3,), (4,), (5,)
+    ]
+    assert all(len(batch) <= 2 for batch in batches)
+
+
+async def test_find_subscribers(backend):
+    async with backend.session() as session:
+        await backend.users.insert_ignore_conflicts(
+            [{"telegram_user_id": 10}, {"telegram_user_id": 20}], "id", session
+        )
+        await backend.applications.insert_ignore_conflicts(
+            [application(1), application(2)], "id", session
+        )
+        await backend.subscriptions.insert_ignore_conflicts(
+            [
+                {"user_id": 1, "application_id": 1},
+                {"user_id": 2, "application_id": 1},
+                {"user_id": 2, "application_id": 2},
+            ],
+            "id",
+            session,
+        )
+        subscribers = await backend.subscriptions.find_subscribers(
+            [1], session
+        )
+    assert sorted(subscribers) == [(1, 10), (1, 20)]
+
+
+async def test_memory_returns_copies():
+    repository = ApplicationMemoryRepository()
+    session = MemorySession()
+    await repository.create_one(application(1), session)
+    found = await repository.get_by_attr("url", "https://app1.example", session)
+    found.url = "https://changed.example"
+    assert await repository.get_by_attr(
+        "url", "https://changed.example", session
+    ) is None
+    assert (
+        await repository.get_by_attr("url", "https://app1.example", session)
+    ).id == 1
+
+
+async def test_add_one_updates_persistent_instance(backend):
+    async with backend.session() as session:
+        await backend.applications.create_one(application(1), session)
+        found = await backend.applications.get_by_attr("id", 1, session)
+        found.name = "renamed"
+        await backend.applications.add_one(found, session)
+    async with backend.session() as session:
+        rows = await backend.applications.find_all_columns(
+            ("id", "name"), session
+        )
+    assert [tuple(row) for row in rows] == [(1, "renamed")]
+
+
+async def test_subscribe_all_skips_existing_subscriptions(backend):
+    async with backend.session() as session:
+        await backend.users.insert_ignore_conflicts(
+            [{"telegram_user_id": 10}, {"telegram_user_id": 20}], "id", session
+        )
+        await backend.applications.insert_ignore_conflicts(
+            [application(1), application(2)], "id", session
+        )
+        await backend.subscriptions.create_one(
+            {"user_id": 1, "application_id": 1}, session
+        )
+        await backend.subscriptions.subscribe_all(
+            session, application_urls=["https://app1.example"]
+        )
+        await backend.subscriptions.subscribe_all(session, user_ids=[1])
+        rows = await backend.subscriptions.find_all_columns(
+            ("user_id", "application_id"), session
+        )
+    assert sorted(tuple(row) for row in rows) == [(1, 1), (1, 2), (2, 1)]
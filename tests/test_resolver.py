@@ -0,0 +1,81 @@
+import asyncio
+import socket
+
+import pytest
+
+from core.resolver import CachingResolver, DNSResolutionError, RecordTTLResolver
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeResolver:
+    """Резолвер, отвечающий после паузы и считающий запросы."""
+
+    def __init__(self, error: OSError = None):
+        self.error = error
+        self.calls = 0
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.error is not None:
+            raise self.error
+        return [{"hostname": host, "host": "192.0.2.1", "port": port}]
+
+    async def close(self):
+        pass
+
+
+class FakeTTLResolver(FakeResolver, RecordTTLResolver):
+    def __init__(self, ttl):
+        FakeResolver.__init__(self)
+        self.ttl = ttl
+
+    async def resolve_with_ttl(self, host, port=0, family=socket.AF_INET):
+        return await self.resolve(host, port, family), self.ttl
+
+
+async def test_concurrent_lookups_are_coalesced():
+    fake = FakeResolver()
+    resolver = CachingResolver(fake)
+    results = await asyncio.gather(
+        *(resolver.resolve("a.example", 443) for _ in range(10))
+    )
+    assert fake.calls == 1
+    assert all(result == results[0] for result in results)
+    assert resolver.stats()["misses"] == 10
+    await resolver.resolve("a.example", 443)
+    assert fake.calls == 1
+    assert resolver.stats()["hits"] == 1
+
+
+async def test_failures_are_cached_for_negative_ttl():
+    fake = FakeResolver(OSError(socket.EAI_NONAME, "Name or service not known"))
+    resolver = CachingResolver(fake, negative_ttl=0.05)
+    for _ in range(3):
+        with pytest.raises(DNSResolutionError):
+            await resolver.resolve("missing.example")
+    assert fake.calls == 1
+    assert resolver.stats()["negative_hits"] == 2
+    await asyncio.sleep(0.06)
+    with pytest.raises(DNSResolutionError):
+        await resolver.resolve("missing.example")
+    assert fake.calls == 2
+
+
+async def test_entries_follow_record_ttl_within_bounds():
+    fake = FakeTTLResolver(ttl=0.05)
+    resolver = CachingResolver(fake, ttl=300, min_ttl=0.02, prefetch_threshold=0)
+    await resolver.resolve("a.example")
+    await resolver.resolve("a.example")
+    assert fake.calls == 1
+    await asyncio.sleep(0.06)
+    await resolver.resolve("a.example")
+    assert fake.calls == 2
+
+    fake.ttl = 3600
+    resolver = CachingResolver(fake, ttl=0.05, prefetch_threshold=0)
+    await resolver.resolve("b.example")
+    await asyncio.sleep(0.06)
+    await resolver.resolve("b.example")
+    assert fake.calls == 4
@@ -0,0 +1,174 @@
+"""Сервисы поверх репозиториев в памяти."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import services
+from repositories.memory import (
+    ApplicationMemoryRepository,
+    SubscriptionMemoryRepository,
+    TokenMemoryRepository,
+    UserMemoryRepository,
+)
+from services import (
+    ApplicationServices,
+    SubscriptionService,
+    TokenServices,
+    UserService,
+)
+from utils.memory_repository import MemorySession
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def token_service(monkeypatch):
+    # register_user гасит токен через общий token_service модуля.
+    service = TokenServices(TokenMemoryRepository)
+    monkeypatch.setattr(services, "token_service", service)
+    return service
+
+
+@pytest.fixture(autouse=True)
+def subscription_service(monkeypatch):
+    # Пользователи и приложения подписываются через общий сервис модуля.
+    service = SubscriptionService(SubscriptionMemoryRepository)
+    monkeypatch.setattr(services, "subscription_service", service)
+    return service
+
+
+async def test_register_user_rolls_back_on_bad_token(token_service):
+    users = UserService(UserMemoryRepository)
+    session = MemorySession()
+    with pytest.raises(ValueError):
+        await users.register_user({"telegram_user_id": 10}, session, "missing")
+    assert await users.get_all_users(session) == []
+
+    await token_service.create_token({"token": "secret"}, session)
+    assert await users.register_user({"telegram_user_id": 10}, session, "secret")
+    assert not await users.register_user(
+        {"telegram_user_id": 10}, session, "secret"
+    )
+    token = await token_service.get_token_by_attr("token", "secret", session)
+    assert token.is_active is False
+    assert token.used_at is not None
+    with pytest.raises(ValueError):
+        await users.register_user({"telegram_user_id": 20}, session, "secret")
+    assert len(await users.get_all_users(session)) == 1
+
+
+async def test_generate_tokens(token_service):
+    session = MemorySession()
+    tokens = await token_service.generate_tokens(5, session)
+    assert len(set(tokens)) == 5
+    for token in tokens:
+        assert await token_service.get_token_by_attr("token", token, session)
+
+
+async def test_purge_consumed_tokens(token_service):
+    session = MemorySession()
+    await token_service.create_token({"token": "old"}, session)
+    await token_service.create_token({"token": "active"}, session)
+    await token_service.redeem_token("old", session)
+    await session.commit()
+    rows, size = await token_service.purge_consumed_tokens(
+        datetime.now(timezone.utc) + timedelta(seconds=1), session
+    )
+    assert rows == 1 and size > 0
+    assert await token_service.get_token_by_attr("token", "old", session) is None
+    assert await token_service.get_token_by_attr("token", "active", session)
+
+
+async def test_import_applications_upserts_valid_rows():
+    applications = ApplicationServices(ApplicationMemoryRepository)
+    session = MemorySession()
+    errors = await applications.import_applications(
+        [
+            (1, {"url": "https://a.example", "name": "a", "ads_url": "x"}),
+            (2, {"url": "https://a.example", "name": "b", "ads_url": "x"}),
+            (3, {"url": "https://c.example", "name": ""}),
+            (4, ["not", "an", "object"]),
+        ],
+        session,
+    )
+    assert [line for line, _ in errors] == [3, 4]
+    errors = await applications.import_applications(
+        [(1, {"url": "https://a.example", "name": "c", "ads_url": "y"})],
+        session,
+    )
+    assert errors == []
+    stored = await applications.get_all_applications(session)
+    assert [(app.url, app.name) for app in stored] == [
+        ("https://a.example", "c")
+    ]
+
+
+async def test_subscribe_and_find_subscribers():
+    users = UserService(UserMemoryRepository)
+    applications = ApplicationServices(ApplicationMemoryRepository)
+    subscriptions = SubscriptionService(SubscriptionMemoryRepository)
+    session = MemorySession()
+    await users.create_user({"telegram_user_id": 10}, session)
+    await users.create_user({"telegram_user_id": 20}, session)
+    await applications.create_application(
+        {"url": "https://a.example", "name": "a", "ads_url": "x"}, session
+    )
+    # Новое приложение получают все пользователи.
+    assert not await subscriptions.subscribe(1, 1, session)
+    assert await subscriptions.unsubscribe(1, 1, session)
+    assert not await subscriptions.unsubscribe(1, 1, session)
+    assert await subscriptions.subscribe(1, 1, session)
+    assert await subscriptions.unsubscribe(1, 1, session)
+    subscribers = await subscriptions.get_subscribers([1], session)
+    assert dict(subscribers) == {1: [20]}
+
+
+async def test_save_monitoring_state_writes_dirty_targets():
+    applications = ApplicationServices(ApplicationMemoryRepository)
+    session = MemorySession()
+    for number in range(3):
+        await applications.create_application(
+            {
+                "url": f"https://{number}.example",
+                "name": str(number),
+                "ads_url": "x",
+            },
+            session,
+        )
+    targets = await applications.get_monitoring_snapshot(session)
+    now = datetime.now(timezone.utc)
+    targets[1].failure_counter = 3
+    targets[1].last_checked_at = now
+    await applications.save_monitoring_state(targets, session)
+    assert not targets[1].dirty
+    stored = await applications.get_monitoring_snapshot(session)
+    assert [target.failure_counter for target in stored] == [0, 3, 0]
+    assert stored[1].last_checked_at == now
+
+
+async def test_new_users_and_applications_are_subscribed(token_service):
+    users = UserService(UserMemoryRepository)
+    applications = ApplicationServices(ApplicationMemoryRepository)
+    subscriptions = SubscriptionService(SubscriptionMemoryRepository)
+    session = MemorySession()
+    await applications.create_application(
+        {"url": "https://a.example", "name": "a", "ads_url": "x"}, session
+    )
+    await token_service.create_token({"token": "secret"}, session)
+    await users.register_user({"telegram_user_id": 10}, session, "secret")
+    await users.register_user({"telegram_user_id": 20}, session)
+    await subscriptions.unsubscribe(2, 1, session)
+    await applications.create_application(
+        {"url": "https://b.example", "name": "b", "ads_url": "x"}, session
+    )
+    await applications.import_applications(
+        [
+            (1, {"url": "https://a.example", "name": "a2", "ads_url": "x"}),
+            (2, {"url": "https://c.example", "name": "c", "ads_url": "x"}),
+        ],
+        session,
+    )
+    subscribers = await subscriptions.get_subscribers([1, 2, 3], session)
+    # Обновление приложения импортом не возвращает отписавшегося.
+    assert dict(subscribers) == {1: [10], 2: [10, 20], 3: [10, 20]}
+
@@ -0,0 +1,29 @@
+from typing import Any, Hashable, Optional
+
+
+class VersionedCache:
+    """Хранит одно значение, вычисленное для определенной версии данных.
+
+    Значение считается устаревшим, как только версия источника меняется.
+    """
+
+    def __init__(self):
+        self._version: Optional[Hashable] = None
+        self._value: Any = None
+
+    def get(self, version: Hashable) -> Any:
+        """Возвращает значение для версии или None, если оно устарело.
+
+        Args:
+            version (Hashable): Текущая версия данных.
+
+        Returns:
+            Any: Сохраненное значение или None.
+        """
+        if version != self._version:
+            return None
+        return self._value
+
+    def set(self, version: Hashable, value: Any) -> None:
+        self._version = version
+        self._value = value
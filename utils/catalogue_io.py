@@ -0,0 +1,73 @@
+import csv
+import json
+from typing import IO, Iterator, List, Sequence, Tuple
+
+SUPPORTED_FORMATS = ("csv", "jsonl")
+
+
+def _parse_json_line(line: str) -> dict:
+    try:
+        data = json.loads(line)
+    except json.JSONDecodeError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def read_batches(
+    path: str, file_format: str, batch_size: int
+) -> Iterator[List[Tuple[int, dict]]]:
+    """Построчно читает файл каталога и отдает его пачками.
+
+    В памяти держится не больше одной пачки, поэтому размер файла
+    на потребление памяти не влияет.
+
+    Args:
+        path (str): Путь к файлу.
+        file_format (str): Формат файла: csv или jsonl.
+        batch_size (int): Количество строк в пачке.
+
+    Returns:
+        Iterator[List[Tuple[int, dict]]]: Пачки пар (номер строки, данные).
+    """
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        if file_format == "csv":
+            # Значения в кавычках могут занимать несколько строк, а пустые
+            # строки пропускаются, поэтому номер берется у reader: это
+            # последняя строка файла, прочитанная для записи.
+            reader = csv.DictReader(file)
+            rows = ((reader.line_num, row) for row in reader)
+        else:
+            rows = (
+                (number, _parse_json_line(line))
+                for number, line in enumerate(file, start=1)
+                if line.strip()
+            )
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+class CatalogueWriter:
+    """Пишет строки каталога в файл в формате csv или jsonl."""
+
+    def __init__(self, file: IO[str], file_format: str, fields: Sequence[str]):
+        self.file = file
+        self.file_format = file_format
+        self.fields = fields
+        if file_format == "csv":
+            self._csv = csv.writer(file)
+            self._csv.writerow(fields)
+
+    def write(self, rows: Sequence[Sequence]) -> None:
+        if self.file_format == "csv":
+            self._csv.writerows(rows)
+            return
+        self.file.writelines(
+            json.dumps(dict(zip(self.fields, row)), ensure_ascii=False) + "\n"
+            for row in rows
+        )
@@ -0,0 +1,386 @@
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import UniqueConstraint
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.evaluator import _EvaluatorCompiler
+from sqlalchemy.sql import ClauseElement
+from sqlalchemy.sql.functions import now
+
+from core.db import Base
+from utils.repository import AbstractRepository
+
+
+class MemorySession:
+    """Сессия для InMemoryRepository с фиксацией и откатом изменений.
+
+    Репозитории записывают в сессию действия для отката своих изменений:
+    commit их забывает, rollback выполняет в обратном порядке. Как и в
+    SQLAlchemy, выход из контекста без commit откатывает изменения.
+    Изоляции нет: незафиксированные изменения сразу видны всем.
+    """
+
+    def __init__(self):
+        self._undo: List[Callable[[], None]] = []
+
+    def record(self, undo: Callable[[], None]) -> None:
+        self._undo.append(undo)
+
+    async def commit(self) -> None:
+        self._undo.clear()
+
+    async def rollback(self) -> None:
+        while self._undo:
+            self._undo.pop()()
+
+    async def close(self) -> None:
+        await self.rollback()
+
+    async def __aenter__(self) -> "MemorySession":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+
+class _MemoryTable:
+    """Записи одной таблицы, общие для всех ее репозиториев."""
+
+    def __init__(self, keys: List[Tuple[str, ...]]):
+        self.rows: Dict[int, dict] = {}
+        self.indexes: Dict[Tuple[str, ...], Dict[tuple, int]] = {
+            key: {} for key in keys
+        }
+        self.next_id = 1
+
+    def clear(self) -> None:
+        self.rows.clear()
+        for index in self.indexes.values():
+            index.clear()
+        self.next_id = 1
+
+
+# Таблицы по имени: репозитории одной модели видят одни и те же записи,
+# как если бы работали с одной БД.
+_tables: Dict[str, _MemoryTable] = {}
+
+
+def clear_memory_tables() -> None:
+    """Удаляет записи всех таблиц в памяти."""
+    for table in _tables.values():
+        table.clear()
+
+
+class InMemoryRepository(AbstractRepository):
+    """Репозиторий, хранящий записи модели в памяти процесса.
+
+    Заменяет SQLAlchemyRepository там, где не нужна настоящая БД:
+    подкласс задает model так же, как в repositories (готовые подклассы
+    лежат в repositories.memory), а вместо AsyncSession передается
+    MemorySession. Все репозитории одной модели работают с общей
+    таблицей процесса. Записи хранятся словарями значений колонок, а
+    методы чтения возвращают новые объекты модели, поэтому их изменение
+    не затрагивает хранилище. Уникальные колонки и UniqueConstraint
+    индексируются словарями. Нарушения уникальности и NOT NULL вызывают
+    IntegrityError, а методы с ON CONFLICT пропускают или обновляют
+    конфликтующие записи, как в Postgres. Значения default колонок и
+    автоинкремент id поддерживаются, внешние ключи и каскадное удаление
+    - нет.
+    """
+
+    model = None
+
+    def __init__(self):
+        table = self.model.__table__
+        self._columns = [column.key for column in table.columns]
+        self._defaults = {
+            column.key: column.default.arg
+            for column in table.columns
+            if column.default is not None and column.default.is_scalar
+        }
+        self._not_null = [
+            column.key
+            for column in table.columns
+            if not column.nullable and not column.primary_key
+        ]
+        keys = [(column.key,) for column in table.columns if column.unique]
+        keys += [
+            tuple(column.key for column in constraint.columns)
+            for constraint in table.constraints
+            if isinstance(constraint, UniqueConstraint)
+        ]
+        if table.name not in _tables:
+            _tables[table.name] = _MemoryTable(keys)
+        self._table = _tables[table.name]
+        self._rows = self._table.rows
+        self._indexes = self._table.indexes
+        self._evaluator = _EvaluatorCompiler(self.model)
+
+    def _violation(self, reason: str) -> IntegrityError:
+        return IntegrityError(
+            f"{self.model.__tablename__}", None, ValueError(reason)
+        )
+
+    def _conflict(self, row: dict) -> Optional[int]:
+        """Возвращает id записи, с которой конфликтует row, или None."""
+        for columns, index in self._indexes.items():
+            key = tuple(row[name] for name in columns)
+            # Как в Postgres, NULL не участвует в уникальности.
+            if None in key:
+                continue
+            row_id = index.get(key)
+            if row_id is not None and row_id != row["id"]:
+                return row_id
+        return None
+
+    def _check(self, row: dict) -> None:
+        for name in self._not_null:
+            if row[name] is None:
+                raise self._violation(f'null value in column "{name}"')
+        if self._conflict(row) is not None:
+            raise self._violation("duplicate key value")
+
+    def _index(self, row: dict) -> None:
+        for columns, index in self._indexes.items():
+            key = tuple(row[name] for name in columns)
+            if None not in key:
+                index[key] = row["id"]
+
+    def _unindex(self, row: dict) -> None:
+        for columns, index in self._indexes.items():
+            index.pop(tuple(row[name] for name in columns), None)
+
+    def _instance(self, row: dict) -> Base:
+        return self.model(**row)
+
+    def _build(self, values: dict) -> dict:
+        unknown = set(values) - set(self._columns)
+        if unknown:
+            raise TypeError(
+                f"{self.model.__name__}: неизвестные колонки {sorted(unknown)}"
+            )
+        row = {name: values.get(name) for name in self._columns}
+        for name, value in self._defaults.items():
+            if row[name] is None:
+                row[name] = value
+        if row["id"] is None:
+            row["id"] = self._table.next_id
+        return row
+
+    def _insert(self, row: dict, session: MemorySession) -> None:
+        if row["id"] in self._rows:
+            raise self._violation("duplicate key value")
+        self._check(row)
+        self._table.next_id = max(self._table.next_id, row["id"] + 1)
+        self._rows[row["id"]] = row
+        self._index(row)
+        session.record(lambda: self._remove(row))
+
+    def _remove(self, row: dict) -> None:
+        self._unindex(row)
+        self._rows.pop(row["id"], None)
+
+    def _restore(self, row: dict) -> None:
+        self._rows[row["id"]] = row
+        self._index(row)
+
+    def _update(self, row: dict, values: dict, session: MemorySession) -> None:
+        unknown = set(values) - set(self._columns)
+        if unknown:
+            raise TypeError(
+                f"{self.model.__name__}: неизвестные колонки {sorted(unknown)}"
+            )
+        instance = self._instance(row)
+        updated = {**row}
+        for name, value in values.items():
+            updated[name] = self._evaluate(instance, value)
+        self._unindex(row)
+        try:
+            self._check(updated)
+        except IntegrityError:
+            self._index(row)
+            raise
+        previous = dict(row)
+        row.update(updated)
+        self._index(row)
+
+        def undo():
+            self._unindex(row)
+            row.update(previous)
+            self._index(row)
+
+        session.record(undo)
+
+    def _evaluate(self, instance: Base, value: Any) -> Any:
+        """Вычисляет значение для UPDATE, в том числе SQL-выражение.
+
+        Выражения над колонками модели вычисляются по текущим значениям
+        записи, func.now() - текущим временем.
+
+        Raises:
+            UnevaluatableError: Если выражение нельзя вычислить в Python.
+        """
+        if isinstance(value, now):
+            return datetime.now(timezone.utc)
+        if isinstance(value, ClauseElement):
+            return self._evaluator.process(value)(instance)
+        return value
+
+    def _find(self, filters: dict) -> List[dict]:
+        return [
+            row
+            for row in self._sorted()
+            if all(row[name] == value for name, value in filters.items())
+        ]
+
+    def _sorted(self) -> List[dict]:
+        return [self._rows[row_id] for row_id in sorted(self._rows)]
+
+    async def create_one(
+        self, data: dict, session: MemorySession, to_commit: bool = True
+    ) -> None:
+        self._insert(self._build(data), session)
+        if to_commit:
+            await session.commit()
+
+    async def add_one(
+        self, instance: Base, session: MemorySession, to_commit: bool = True
+    ) -> None:
+        values = {name: getattr(instance, name) for name in self._columns}
+        row = self._rows.get(values["id"])
+        if row is not None:
+            # Как session.add для сохраненного объекта: записать изменения.
+            del values["id"]
+            self._update(row, values, session)
+        else:
+            row = self._build(values)
+            self._insert(row, session)
+        for name, value in row.items():
+            setattr(instance, name, value)
+        if to_commit:
+            await session.commit()
+
+    async def get_by_attr(
+        self, attribute_name: str, attribute_value: Any, session: MemorySession
+    ) -> Any:
+        index = self._indexes.get((attribute_name,))
+        if index is not None:
+            row = self._rows.get(index.get((attribute_value,)))
+        else:
+            found = self._find({attribute_name: attribute_value})
+            row = found[0] if found else None
+        return self._instance(row) if row is not None else None
+
+    async def find_all(self, session: MemorySession) -> list:
+        return [self._instance(row) for row in self._sorted()]
+
+    async def find_all_columns(
+        self, columns: Sequence[str], session: MemorySession
+    ) -> list:
+        return [
+            tuple(row[name] for name in columns) for row in self._sorted()
+        ]
+
+    async def bulk_update(
+        self, rows: Sequence[dict], session: MemorySession, to_commit: bool = True
+    ) -> None:
+        for values in rows:
+            values = dict(values)
+            row = self._rows.get(values.pop("id"))
+            if row is not None:
+                self._update(row, values, session)
+        if to_commit:
+            await session.commit()
+
+    async def upsert_many(
+        self,
+        rows: Sequence[dict],
+        conflict_column: str,
+        session: MemorySession,
+        to_commit: bool = True,
+    ) -> None:
+        index = self._indexes[(conflict_column,)]
+        for values in rows:
+            row_id = index.get((values[conflict_column],))
+            if row_id is None:
+                self._insert(self._build(values), session)
+            else:
+                self._update(
+                    self._rows[row_id],
+                    {
+                        name: value
+                        for name, value in values.items()
+                        if name != conflict_column
+                    },
+                    session,
+                )
+        if to_commit:
+            await session.commit()
+
+    async def insert_ignore_conflicts(
+        self,
+        rows: Sequence[dict],
+        returning: str,
+        session: MemorySession,
+        to_commit: bool = True,
+    ) -> list:
+        inserted = []
+        for values in rows:
+            row = self._build(values)
+            # ON CONFLICT DO NOTHING пропускает только нарушения уникальности.
+            if row["id"] in self._rows or self._conflict(row) is not None:
+                continue
+            self._insert(row, session)
+            inserted.append(row[returning])
+        if to_commit:
+            await session.commit()
+        return inserted
+
+    async def update_by_attrs(
+        self,
+        filters: dict,
+        values: dict,
+        returning: str,
+        session: MemorySession,
+        to_commit: bool = True,
+    ) -> list:
+        updated = []
+        for row in self._find(filters):
+            self._update(row, values, session)
+            updated.append(row[returning])
+        if to_commit:
+            await session.commit()
+        return updated
+
+    async def delete_by_attrs(
+        self,
+        filters: dict,
+        returning: str,
+        session: MemorySession,
+        to_commit: bool = True,
+    ) -> list:
+        deleted = []
+        for row in self._find(filters):
+            self._remove(row)
+            session.record(lambda row=row: self._restore(row))
+            deleted.append(row[returning])
+        if to_commit:
+            await session.commit()
+        return deleted
+
+    async def stream_columns(
+        self, columns: Sequence[str], session: MemorySession, batch_size: int
+    ) -> AsyncIterator[list]:
+        rows = await self.find_all_columns(columns, session)
+        for start in range(0, len(rows), batch_size):
+            yield rows[start:start + batch_size]
+
+    async def delete(
+        self, instance: Base, session: MemorySession, to_commit: bool = True
+    ) -> None:
+        row = self._rows.get(instance.id)
+        if row is not None:
+            self._remove(row)
+            session.record(lambda: self._restore(row))
+        if to_commit:
+            await session.commit()
@@ -1,7 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, AsyncIterator, Sequence
 
-from sqlalchemy import select
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.db import Base
@@ -73,6 +74,139 @@ class AbstractRepository(ABC):
         """
         raise NotImplementedError
 
+    @abstractmethod
+    async def find_all_columns(
+        self, columns: Sequence[str], session: AsyncSession
+    ) -> list:
+        """Возвращает указанные колонки всех записей без загрузки объектов модели.
+
+        Args:
+            columns (Sequence[str]): Названия колонок.
+            session (AsyncSession): Сессия SQLAlchemy для выполнения запроса.
+
+        Returns:
+            list: Кортежи значений колонок.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def bulk_update(
+        self, rows: Sequence[dict], session: AsyncSession, to_commit: bool
+    ) -> None:
+        """Обновляет записи по первичному ключу одним пакетом.
+
+        Args:
+            rows (Sequence[dict]): Данные записей, каждая с ключом id.
+            session (AsyncSession): Сессия SQLAlchemy для выполнения запроса.
+            to_commit (bool): Флаг, указывающий нужно ли фиксировать изменения в базе данных.
+
+        Returns:
+            None
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def upsert_many(
+        self,
+        rows: Sequence[dict],
+        conflict_column: str,
+        session: AsyncSession,
+        to_commit: bool,
+    ) -> None:
+        """Вставляет записи одним запросом, обновляя существующие.
+
+        Args:
+            rows (Sequence[dict]): Данные записей.
+            conflict_column (str): Уникальная колонка для ON CONFLICT.
+            session (AsyncSession): Сессия SQLAlchemy для выполнения запроса.
+            to_commit (bool): Флаг, указывающий нужно ли фиксировать изменения в базе данных.
+
+        Returns:
+            None
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def insert_ignore_conflicts(
+        self,
+        rows: Sequence[dict],
+        returning: str,
+        session: AsyncSession,
+        to_commit: bool,
+    ) -> list:
+        """Вставляет записи одним запросом, пропуская нарушения уникальности.
+
+        Args:
+            rows (Sequence[dict]): Данные записей.
+            returning (str): Колонка, значения которой нужно вернуть.
+            session (AsyncSession): Сессия SQLAlchemy для выполнения запроса.
+            to_commit (bool): Флаг, указывающий нужно ли фиксировать изменения в базе данных.
+
+        Returns:
+            list: Значения колонки returning для действительно вставленных записей.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_by_attrs(
+        self,
+        filters: dict,
+        values: dict,
+        returning: str,
+        session: AsyncSession,
+        to_commit: bool,
+    ) -> list:
+        """Обновляет записи, подходящие под все фильтры, одним запросом.
+
+        Args:
+            filters (dict): Пары атрибут - значение для условия WHERE.
+            values (dict): Новые значения атрибутов.
+            returning (str): Колонка, значения которой нужно вернуть.
+            session (AsyncSession): Сессия SQLAlchemy для выполнения запроса.
+            to_commit (bool): Флаг, указывающий нужно ли фиксировать изменения в базе данных.
+
+        Returns:
+            list: Значения колонки returning для обновленных записей.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_by_attrs(
+        self,
+        filters: dict,
+        returning: str,
+        session: AsyncSession,
+        to_commit: bool,
+    ) -> list:
+        """Удаляет записи, подходящие под все фильтры, одним запросом.
+
+        Args:
+            filters (dict): Пары атрибут - значение для условия WHERE.
+            returning (str): Колонка, значения которой нужно вернуть.
+            session (AsyncSession): Сессия SQLAlchemy для выполнения запроса.
+            to_commit (bool): Флаг, указывающий нужно ли фиксировать изменения в базе данных.
+
+        Returns:
+            list: Значения колонки returning для удаленных записей.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def stream_columns(
+        self, columns: Sequence[str], session: AsyncSession, batch_size: int
+    ) -> AsyncIterator[list]:
+        """Построчно читает указанные колонки серверным курсором.
+
+        Args:
+            columns (Sequence[str]): Названия колонок.
+            session (AsyncSession): Сессия SQLAlchemy для выполнения запроса.
+            batch_size (int): Количество строк, получаемых за раз.
+
+        Returns:
+            AsyncIterator[list]: Пачки строк не больше batch_size.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     async def delete(
         self, instance: Base, session: AsyncSession, to_commit: bool
@@ -114,6 +248,122 @@ class SQLAlchemyRepository(AbstractRepository):
         results = await session.execute(select(self.model))
         return results.scalars().all()
 
+    async def find_all_columns(
+        self, columns: Sequence[str], session: AsyncSession
+    ) -> list:
+        result = await session.execute(
+            select(*(getattr(self.model, name) for name in columns))
+        )
+        return result.all()
+
+    async def bulk_update(
+        self, rows: Sequence[dict], session: AsyncSession, to_commit: bool = True
+    ) -> None:
+        if not rows:
+            return
+        await session.execute(update(self.model), list(rows))
+        if to_commit:
+            await session.commit()
+
+    async def upsert_many(
+        self,
+        rows: Sequence[dict],
+        conflict_column: str,
+        session: AsyncSession,
+        to_commit: bool = True,
+    ) -> None:
+        if not rows:
+            return
+        statement = insert(self.model).values(list(rows))
+        statement = statement.on_conflict_do_update(
+            index_elements=[conflict_column],
+            set_={
+                name: statement.excluded[name]
+                for name in rows[0]
+                if name != conflict_column
+            },
+        )
+        await session.execute(statement)
+        if to_commit:
+            await session.commit()
+
+    async def insert_ignore_conflicts(
+        self,
+        rows: Sequence[dict],
+        returning: str,
+        session: AsyncSession,
+        to_commit: bool = True,
+    ) -> list:
+        if not rows:
+            return []
+        result = await session.execute(
+            insert(self.model)
+            .values(list(rows))
+            .on_conflict_do_nothing()
+            .returning(getattr(self.model, returning))
+        )
+        inserted = list(result.scalars())
+        if to_commit:
+            await session.commit()
+        return inserted
+
+    async def update_by_attrs(
+        self,
+        filters: dict,
+        values: dict,
+        returning: str,
+        session: AsyncSession,
+        to_commit: bool = True,
+    ) -> list:
+        result = await session.execute(
+            update(self.model)
+            .where(
+                *(
+                    getattr(self.model, name) == value
+                    for name, value in filters.items()
+                )
+            )
+            .values(**values)
+            .returning(getattr(self.model, returning))
+        )
+        updated = list(result.scalars())
+        if to_commit:
+            await session.commit()
+        return updated
+
+    async def delete_by_attrs(
+        self,
+        filters: dict,
+        returning: str,
+        session: AsyncSession,
+        to_commit: bool = True,
+    ) -> list:
+        result = await session.execute(
+            delete(self.model)
+            .where(
+                *(
+                    getattr(self.model, name) == value
+                    for name, value in filters.items()
+                )
+            )
+            .returning(getattr(self.model, returning))
+        )
+        deleted = list(result.scalars())
+        if to_commit:
+            await session.commit()
+        return deleted
+
+    async def stream_columns(
+        self, columns: Sequence[str], session: AsyncSession, batch_size: int
+    ):
+        result = await session.stream(
+            select(*(getattr(self.model, name) for name in columns))
+            .order_by(self.model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async for partition in result.partitions():
+            yield partition
+
     async def delete(
         self, instance: Base, session: AsyncSession, to_commit: bool = True
     ):